@@ -8,18 +8,11 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-import logging
-from logging.handlers import RotatingFileHandler
+from backend.utils.logging_config import configure_logging
 
 def setup_logging(app):
-    handler = RotatingFileHandler('backend_debug.log', maxBytes=10000000, backupCount=5)
-    handler.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    )
-    handler.setFormatter(formatter)
-    app.logger.addHandler(handler)
-    app.logger.setLevel(logging.INFO)
+    # app.logger propagates to the root queue handler; see backend/utils/logging_config.py
+    configure_logging()
 
 def create_app():
     app = Flask(__name__)
@@ -29,8 +22,8 @@ def create_app():
     database_url = os.getenv('DATABASE_URL')
     
     # Normalize Postgres URL if present (Render/Heroku style)
-    if database_url and database_url.startswith("postgres://"):
-        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    from backend.utils.db_profiles import normalize_database_url, configure_engines, init_db_profile
+    database_url = normalize_database_url(database_url)
         
     if database_url:
         app.config['SQLALCHEMY_DATABASE_URI'] = database_url
@@ -59,7 +52,7 @@ def create_app():
         # Format: sqlite:///D:/path/to/db
         db_uri = f"sqlite:///{db_path.as_posix()}"
         app.config['SQLALCHEMY_DATABASE_URI'] = db_uri
-        app.logger.info(f"Using Fallback SQLite Database: {db_uri}")
+        app.logger.info("Using Fallback SQLite Database: %s", db_uri)
         print(f"DATABASE_URI: {db_uri}") # Debug print to console
     
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'roamiq-secret-key')
@@ -67,18 +60,20 @@ def create_app():
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-string')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
     
-    # SQLite Specific optimization to avoid locking
-    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
-        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-            "connect_args": {"timeout": 30},
-            "pool_pre_ping": True
-        }
+    # Pooling and connect-time tuning per database (SQLite: WAL + pragmas,
+    # Postgres: sized pools + statement_timeout), plus the optional read replica
+    configure_engines(app)
     
     # Initialize extensions
     from backend.extensions import db, jwt, cors
     db.init_app(app)
+    init_db_profile(app)
     jwt.init_app(app)
-    cors.init_app(app)
+    cors.init_app(app, expose_headers=["X-Next-Cursor"])
+    
+    # orjson-backed jsonify when available
+    from backend.utils.serialization import init_json_provider
+    init_json_provider(app)
     
     # JWT Error Handlers for Debugging
     @jwt.expired_token_loader
@@ -88,12 +83,12 @@ def create_app():
 
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
-        app.logger.error(f"Invalid token: {error}")
+        app.logger.error("Invalid token: %s", error)
         return jsonify({"message": "Signature verification failed", "error": "invalid_token"}), 401
 
     @jwt.unauthorized_loader
     def missing_token_callback(error):
-        app.logger.error(f"Request missing Authorization header: {error}")
+        app.logger.error("Request missing Authorization header: %s", error)
         return jsonify({"message": "Request does not contain an access token", "error": "authorization_required"}), 401
     
 
@@ -104,14 +99,36 @@ def create_app():
         from backend.routes.travel import travel_bp
         from backend.routes.mood import mood_bp
         from backend.routes.ai_routes import ai_bp
+        from backend.routes.admin import admin_bp
         
         app.register_blueprint(auth_bp, url_prefix='/api/auth')
         app.register_blueprint(travel_bp, url_prefix='/api/travel')
         app.register_blueprint(mood_bp, url_prefix='/api/mood')
         app.register_blueprint(ai_bp, url_prefix='/api/ai')
+        app.register_blueprint(admin_bp, url_prefix='/api/admin')
         
         app.logger.info("Successfully registered all blueprints")
     
+    # Request spans, exported when TRACE_EXPORTER is set
+    from backend.utils.tracing import init_tracing
+    init_tracing(app)
+    
+    # Request/latency metrics, /metrics and /api/health/ready
+    from backend.utils.monitoring import init_monitoring
+    init_monitoring(app)
+    
+    # Per-request query counts, slow-query log and N+1 flagging
+    from backend.utils.db_instrumentation import init_db_instrumentation
+    init_db_instrumentation(app)
+    
+    # Opt-in (LOOP_LAG_MONITOR=1) event-loop lag tracking for async views
+    from backend.utils.loop_monitor import init_loop_monitor
+    init_loop_monitor(app)
+    
+    # Admin-only per-request cProfile via the X-Profile header
+    from backend.utils.profiler import init_request_profiling
+    init_request_profiling(app)
+    
     # Health check endpoint
     @app.route('/api/health')
     def health_check():
@@ -3,24 +3,55 @@ Database migration management system
 """
 import os
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
 class MigrationManager:
-    def __init__(self, db_path='instance/roamiq.db'):
+    """
+    Applies the files in migrations/versions to one database.
+
+    That is the SQLite file at db_path unless database_url (default:
+    DATABASE_URL) names a server database such as Postgres. Migrations get
+    a DBAPI connection either way: a sqlite3.Connection, or the driver's
+    connection for everything else.
+    """
+
+    def __init__(self, db_path='instance/roamiq.db', database_url=None):
+        if database_url is None:
+            database_url = os.getenv('DATABASE_URL')
         self.db_path = db_path
+        self.database_url = None if not database_url or database_url.startswith('sqlite') else database_url
+        # DBAPI paramstyle: sqlite3 is qmark, the Postgres drivers are format
+        self.param = '?' if self.database_url is None else '%s'
         self.migrations_dir = 'backend/migrations/versions'
         os.makedirs(self.migrations_dir, exist_ok=True)
         self.init_migrations_table()
+
+    @contextmanager
+    def connect(self):
+        if self.database_url is None:
+            conn = sqlite3.connect(self.db_path)
+        else:
+            from sqlalchemy import create_engine
+            from sqlalchemy.pool import NullPool
+            from backend.utils.db_profiles import normalize_database_url
+            engine = create_engine(normalize_database_url(self.database_url), poolclass=NullPool)
+            conn = engine.raw_connection().driver_connection
+        try:
+            yield conn
+        finally:
+            conn.close()
     
     def init_migrations_table(self):
         """Initialize migrations tracking table"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
+        id_column = 'INTEGER PRIMARY KEY AUTOINCREMENT' if self.database_url is None else 'SERIAL PRIMARY KEY'
+        with self.connect() as conn:
+            conn.cursor().execute(f'''
                 CREATE TABLE IF NOT EXISTS migrations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id {id_column},
                     version VARCHAR(50) UNIQUE NOT NULL,
                     applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
@@ -62,8 +93,10 @@ def downgrade(conn):
     
     def get_pending_migrations(self):
         """Get list of pending migrations"""
-        with sqlite3.connect(self.db_path) as conn:
-            applied = {row[0] for row in conn.execute("SELECT version FROM migrations")}
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version FROM migrations")
+            applied = {row[0] for row in cursor.fetchall()}
         
         all_migrations = []
         if os.path.exists(self.migrations_dir):
@@ -88,10 +121,10 @@ def downgrade(conn):
         migration_module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(migration_module)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             try:
                 migration_module.upgrade(conn)
-                conn.execute("INSERT INTO migrations (version) VALUES (?)", (version,))
+                conn.cursor().execute(f"INSERT INTO migrations (version) VALUES ({self.param})", (version,))
                 conn.commit()
                 logger.info(f"Applied migration: {version}")
             except Exception as e:
@@ -112,10 +145,10 @@ def downgrade(conn):
         migration_module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(migration_module)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             try:
                 migration_module.downgrade(conn)
-                conn.execute("DELETE FROM migrations WHERE version = ?", (version,))
+                conn.cursor().execute(f"DELETE FROM migrations WHERE version = {self.param}", (version,))
                 conn.commit()
                 logger.info(f"Rolled back migration: {version}")
             except Exception as e:
@@ -140,8 +173,10 @@ def downgrade(conn):
     
     def status(self):
         """Show migration status"""
-        with sqlite3.connect(self.db_path) as conn:
-            applied = {row[0]: row[1] for row in conn.execute("SELECT version, applied_at FROM migrations")}
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version, applied_at FROM migrations")
+            applied = {row[0]: row[1] for row in cursor.fetchall()}
         
         pending = self.get_pending_migrations()
         
@@ -0,0 +1,48 @@
+"""
+Migration: add_composite_indexes
+Created: 2026-10-19T12:00:00
+
+Composite indexes matching the per-user list, per-trip and chat history
+queries. Mirrors the __table_args__ declared on the models, which only
+create_all() applies to new databases.
+"""
+
+# (name, table, columns)
+INDEXES = [
+    ('ix_trips_user_created', 'trips', ('user_id', 'created_at')),
+    ('ix_trips_user_start_date', 'trips', ('user_id', 'start_date')),
+    ('ix_trips_user_status_end_date', 'trips', ('user_id', 'status', 'end_date')),
+    ('ix_expenses_user_date', 'expenses', ('user_id', 'date')),
+    ('ix_expenses_user_trip_date', 'expenses', ('user_id', 'trip_id', 'date')),
+    ('ix_expenses_trip_id', 'expenses', ('trip_id',)),
+    ('ix_tickets_user_trip', 'tickets', ('user_id', 'trip_id')),
+    ('ix_tickets_trip_id', 'tickets', ('trip_id',)),
+    ('ix_packing_items_user_trip_order', 'packing_items', ('user_id', 'trip_id', 'is_packed', 'category', 'item')),
+    ('ix_mood_logs_user_created', 'mood_logs', ('user_id', 'created_at')),
+    ('ix_user_preferences_user_id', 'user_preferences', ('user_id',)),
+    ('ix_chat_messages_conversation_timestamp', 'chat_messages', ('conversation_id', 'timestamp')),
+    ('ix_chat_messages_user_conversation_id', 'chat_messages', ('user_id', 'conversation_id', 'id')),
+]
+
+# Prefix of ix_chat_messages_conversation_timestamp, so no longer needed
+REPLACED_INDEXES = [
+    ('ix_chat_messages_conversation_id', 'chat_messages', ('conversation_id',)),
+]
+
+def upgrade(conn):
+    """Apply migration"""
+    cursor = conn.cursor()
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    for name, _, _ in REPLACED_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    # Refresh planner statistics for the new indexes
+    cursor.execute("ANALYZE")
+
+def downgrade(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    for name, table, columns in REPLACED_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    for name, _, _ in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
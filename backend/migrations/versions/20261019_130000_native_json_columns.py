@@ -0,0 +1,124 @@
+"""
+Migration: native_json_columns
+Created: 2026-10-19T13:00:00
+
+The JSON blobs that were Text columns with json.dumps/json.loads in the
+models are now JSON columns (JSONB on Postgres).
+
+SQLite keeps JSON as text, so only values the JSON type cannot read are
+rewritten: empty strings become NULL and anything that is not valid JSON is
+kept as a JSON string. On Postgres each column is copied into a new JSONB
+column, renamed over the old one, and the GIN indexes are added.
+
+Rows are converted BATCH_SIZE at a time, committing after each batch, so
+the tables are never locked for a whole-table rewrite. Both paths are safe
+to re-run.
+"""
+import json
+import sqlite3
+
+BATCH_SIZE = 500
+
+# table -> JSON columns
+COLUMNS = {
+    'trips': ('itinerary', 'places_visited', 'accommodation_details', 'mood_analysis', 'safety_alerts'),
+    'tickets': ('additional_info',),
+    'user_preferences': (
+        'dietary_restrictions', 'cuisine_preferences', 'activity_interests', 'languages_spoken', 'accessibility_needs'
+    ),
+    'users': ('last_location',),
+}
+
+# (name, table, column); jsonb_path_ops supports @> containment only, which is all we query with
+GIN_INDEXES = [
+    ('ix_trips_itinerary_gin', 'trips', 'itinerary'),
+    ('ix_user_preferences_activity_interests_gin', 'user_preferences', 'activity_interests'),
+]
+
+def _normalize(raw):
+    """JSON text for a legacy value, or None for NULL"""
+    if raw is None or not str(raw).strip():
+        return None
+    try:
+        json.loads(raw)
+        return raw
+    except ValueError:
+        return json.dumps(raw)
+
+def _batches(cursor, table, columns, param):
+    last_id = 0
+    while True:
+        cursor.execute(
+            f"SELECT id, {', '.join(columns)} FROM {table} WHERE id > {param} ORDER BY id LIMIT {BATCH_SIZE}",
+            (last_id,)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+def _upgrade_sqlite(conn):
+    cursor = conn.cursor()
+    for table, columns in COLUMNS.items():
+        for rows in _batches(cursor, table, columns, '?'):
+            for column_index, column in enumerate(columns, start=1):
+                updates = []
+                for row in rows:
+                    value = _normalize(row[column_index])
+                    if value != row[column_index]:
+                        updates.append((value, row[0]))
+                if updates:
+                    cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?", updates)
+            conn.commit()
+
+def _upgrade_postgres(conn):
+    cursor = conn.cursor()
+    for table, columns in COLUMNS.items():
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = %s AND data_type = 'jsonb'", (table,)
+        )
+        columns = [column for column in columns if column not in {row[0] for row in cursor.fetchall()}]
+        if not columns:
+            continue
+        for column in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}__jsonb JSONB")
+        conn.commit()
+
+        for rows in _batches(cursor, table, columns, '%s'):
+            for column_index, column in enumerate(columns, start=1):
+                cursor.executemany(
+                    f"UPDATE {table} SET {column}__jsonb = %s::jsonb WHERE id = %s",
+                    [(_normalize(row[column_index]), row[0]) for row in rows]
+                )
+            conn.commit()
+
+        for column in columns:
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+            cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {column}__jsonb TO {column}")
+        conn.commit()
+
+    for name, table, column in GIN_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} jsonb_path_ops)")
+    conn.commit()
+
+def upgrade(conn):
+    """Apply migration"""
+    if isinstance(conn, sqlite3.Connection):
+        _upgrade_sqlite(conn)
+    else:
+        _upgrade_postgres(conn)
+
+def downgrade(conn):
+    """Rollback migration"""
+    if isinstance(conn, sqlite3.Connection):
+        # Storage is unchanged on SQLite; normalized values are still valid text
+        return
+    cursor = conn.cursor()
+    for name, _, _ in GIN_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    for table, columns in COLUMNS.items():
+        for column in columns:
+            cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE TEXT USING {column}::text")
+    conn.commit()
@@ -0,0 +1,65 @@
+"""
+Migration: expense_rollups
+Created: 2026-10-19T14:00:00
+
+Covering indexes for the expense GROUP BY rollups, replacing the narrower
+(user_id[, trip_id], date) indexes they extend, and the trip_expense_totals
+table the Expense model keeps up to date on insert, update and delete.
+Existing expenses are summed into it once here.
+"""
+
+# (name, table, columns)
+INDEXES = [
+    ('ix_expenses_user_date_cover', 'expenses', ('user_id', 'date', 'category', 'currency', 'amount')),
+    ('ix_expenses_user_trip_date_cover', 'expenses', ('user_id', 'trip_id', 'date', 'category', 'currency', 'amount')),
+    ('ix_trip_expense_totals_user_trip', 'trip_expense_totals', ('user_id', 'trip_id')),
+]
+
+# Prefixes of the covering indexes, so no longer needed
+REPLACED_INDEXES = [
+    ('ix_expenses_user_date', 'expenses', ('user_id', 'date')),
+    ('ix_expenses_user_trip_date', 'expenses', ('user_id', 'trip_id', 'date')),
+]
+
+def upgrade(conn):
+    """Apply migration"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS trip_expense_totals (
+            trip_id INTEGER NOT NULL REFERENCES trips (id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            category VARCHAR(50) NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            total FLOAT NOT NULL DEFAULT 0,
+            expense_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (trip_id, user_id, category, currency)
+        )
+    """)
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    for name, _, _ in REPLACED_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+    # Backfill; safe to re-run since the table is rebuilt from scratch
+    cursor.execute("DELETE FROM trip_expense_totals")
+    cursor.execute("""
+        INSERT INTO trip_expense_totals (trip_id, user_id, category, currency, total, expense_count)
+        SELECT trip_id, user_id, COALESCE(category, ''), COALESCE(currency, 'USD'), SUM(amount), COUNT(*)
+        FROM expenses
+        WHERE trip_id IS NOT NULL
+        GROUP BY trip_id, user_id, COALESCE(category, ''), COALESCE(currency, 'USD')
+    """)
+    conn.commit()
+    # Refresh planner statistics for the new indexes
+    cursor.execute("ANALYZE")
+    conn.commit()
+
+def downgrade(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    for name, table, columns in REPLACED_INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    for name, _, _ in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    cursor.execute("DROP TABLE IF EXISTS trip_expense_totals")
+    conn.commit()
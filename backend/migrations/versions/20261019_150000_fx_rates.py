@@ -0,0 +1,50 @@
+"""
+Migration: fx_rates
+Created: 2026-10-19T15:00:00
+
+Exchange rate snapshots used to convert expense and ticket amounts. An
+empty table is seeded from backend/data/fx_rates.json here, since reads
+never write; backend/scripts/load_fx_rates.py loads newer snapshots.
+"""
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+
+BUNDLED_RATES_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'fx_rates.json')
+
+def upgrade(conn):
+    """Apply migration"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS fx_rates (
+            snapshot_date DATE NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            per_usd FLOAT NOT NULL,
+            source VARCHAR(50),
+            created_at TIMESTAMP,
+            PRIMARY KEY (snapshot_date, currency)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_fx_rates_currency_date ON fx_rates (currency, snapshot_date)")
+
+    cursor.execute("SELECT COUNT(*) FROM fx_rates")
+    if not cursor.fetchone()[0]:
+        with open(BUNDLED_RATES_FILE) as f:
+            payload = json.load(f)
+        usd = payload['rates']['USD']
+        snapshot_date = date.fromisoformat(payload['date'])
+        param = '?' if isinstance(conn, sqlite3.Connection) else '%s'
+        cursor.executemany(
+            f"INSERT INTO fx_rates (snapshot_date, currency, per_usd, source, created_at) "
+            f"VALUES ({', '.join([param] * 5)})",
+            [(snapshot_date, code.upper(), rate / usd, payload.get('source', 'bundled'), datetime.utcnow())
+             for code, rate in payload['rates'].items() if rate]
+        )
+    conn.commit()
+
+def downgrade(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS fx_rates")
+    conn.commit()
@@ -0,0 +1,39 @@
+"""
+Migration: user_travel_stats
+Created: 2026-10-19T16:00:00
+
+Per-user travel analytics read by /api/ai/user/patterns. A user's row is
+created by their first trip or expense commit and updated by deltas after
+that; run backend/scripts/recompute_travel_stats.py after this migration
+to fill every row at once.
+"""
+import sqlite3
+
+def upgrade(conn):
+    """Apply migration"""
+    json_type = 'JSON' if isinstance(conn, sqlite3.Connection) else 'JSONB'
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS user_travel_stats (
+            user_id INTEGER NOT NULL PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+            trip_count INTEGER NOT NULL DEFAULT 0,
+            completed_trip_count INTEGER NOT NULL DEFAULT 0,
+            budget_trip_count INTEGER NOT NULL DEFAULT 0,
+            average_budget FLOAT,
+            budget_p50 FLOAT,
+            budget_p90 FLOAT,
+            budget_counts {json_type},
+            destination_counts {json_type},
+            top_destinations {json_type},
+            trip_types {json_type},
+            spend_by_category {json_type},
+            updated_at TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+def downgrade(conn):
+    """Rollback migration"""
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS user_travel_stats")
+    conn.commit()
@@ -3,9 +3,17 @@ from backend.extensions import db
 
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        # History loads: one conversation in timestamp order
+        db.Index('ix_chat_messages_conversation_timestamp', 'conversation_id', 'timestamp'),
+        # Conversation listing: latest message id per conversation of a user
+        db.Index('ix_chat_messages_user_conversation_id', 'user_id', 'conversation_id', 'id'),
+    )
+    # to_dict() keys, for column-tuple reads through backend.utils.serialization
+    SERIALIZED_FIELDS = ('id', 'conversation_id', 'user_id', 'role', 'content', 'timestamp')
     
     id = db.Column(db.Integer, primary_key=True)
-    conversation_id = db.Column(db.String(100), index=True)
+    conversation_id = db.Column(db.String(100))
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     role = db.Column(db.String(20)) # 'user' or 'ai'
     content = db.Column(db.Text, nullable=False)
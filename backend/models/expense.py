@@ -1,15 +1,29 @@
 from datetime import datetime
+from sqlalchemy import event, inspect
 from backend.extensions import db
+from backend.models.trip_expense_total import TripExpenseTotal
+
+DEFAULT_CURRENCY = 'USD'
 
 class Expense(db.Model):
     __tablename__ = 'expenses'
+    __table_args__ = (
+        # Covering indexes: the list queries use the (user_id[, trip_id], date)
+        # prefix, and the GROUP BY rollups read every column they need from
+        # the index without touching the table
+        db.Index('ix_expenses_user_date_cover', 'user_id', 'date', 'category', 'currency', 'amount'),
+        db.Index('ix_expenses_user_trip_date_cover', 'user_id', 'trip_id', 'date', 'category', 'currency', 'amount'),
+        db.Index('ix_expenses_trip_id', 'trip_id'),
+    )
+    # to_dict() keys, for column-tuple reads through backend.utils.serialization
+    SERIALIZED_FIELDS = ('id', 'user_id', 'trip_id', 'amount', 'currency', 'category', 'description', 'date', 'created_at')
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     trip_id = db.Column(db.Integer, db.ForeignKey('trips.id'), nullable=True)
 
     amount = db.Column(db.Float, nullable=False)
-    currency = db.Column(db.String(3), default='USD')
+    currency = db.Column(db.String(3), default=DEFAULT_CURRENCY)
     category = db.Column(db.String(50))
     description = db.Column(db.String(200))
     date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -29,3 +43,36 @@ class Expense(db.Model):
             'date': self.date.isoformat() + 'Z',
             'created_at': self.created_at.isoformat() + 'Z'
         }
+
+# Keep TripExpenseTotal in step with ORM writes, inside the same flush
+_TOTALS_COLUMNS = ('trip_id', 'user_id', 'category', 'currency', 'amount')
+
+def _apply_totals(connection, values, sign):
+    TripExpenseTotal.apply(
+        connection, values['trip_id'], values['user_id'], values['category'],
+        values['currency'] or DEFAULT_CURRENCY, sign * values['amount'], sign
+    )
+
+def _current_values(expense):
+    return {name: getattr(expense, name) for name in _TOTALS_COLUMNS}
+
+@event.listens_for(Expense, 'after_insert')
+def _add_to_totals(mapper, connection, expense):
+    _apply_totals(connection, _current_values(expense), 1)
+
+@event.listens_for(Expense, 'after_delete')
+def _remove_from_totals(mapper, connection, expense):
+    _apply_totals(connection, _current_values(expense), -1)
+
+@event.listens_for(Expense, 'after_update')
+def _move_totals(mapper, connection, expense):
+    state = inspect(expense)
+    current = _current_values(expense)
+    previous = dict(current)
+    for name in _TOTALS_COLUMNS:
+        history = state.attrs[name].history
+        if history.deleted:
+            previous[name] = history.deleted[0]
+    if previous != current:
+        _apply_totals(connection, previous, -1)
+        _apply_totals(connection, current, 1)
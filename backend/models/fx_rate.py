@@ -0,0 +1,29 @@
+from datetime import datetime
+from backend.extensions import db
+
+class FxRate(db.Model):
+    """
+    One currency's exchange rate on a snapshot date, quoted as units of the
+    currency per 1 USD. Cross rates are derived from two quotes on the same
+    snapshot (see backend.services.fx_service).
+    """
+    __tablename__ = 'fx_rates'
+    __table_args__ = (
+        # Latest snapshot per currency
+        db.Index('ix_fx_rates_currency_date', 'currency', 'snapshot_date'),
+    )
+
+    snapshot_date = db.Column(db.Date, primary_key=True)
+    currency = db.Column(db.String(3), primary_key=True)
+    per_usd = db.Column(db.Float, nullable=False)
+    source = db.Column(db.String(50))
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'snapshot_date': self.snapshot_date.isoformat(),
+            'currency': self.currency,
+            'per_usd': self.per_usd,
+            'source': self.source
+        }
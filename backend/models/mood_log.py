@@ -3,6 +3,11 @@ from backend.extensions import db
 
 class MoodLog(db.Model):
     __tablename__ = 'mood_logs'
+    __table_args__ = (
+        db.Index('ix_mood_logs_user_created', 'user_id', 'created_at'),
+    )
+    # to_dict() keys, for column-tuple reads through backend.utils.serialization
+    SERIALIZED_FIELDS = ('id', 'user_id', 'mood', 'energy', 'polarity', 'subjectivity', 'note', 'created_at')
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
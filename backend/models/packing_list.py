@@ -3,6 +3,11 @@ from backend.extensions import db
 
 class PackingItem(db.Model):
     __tablename__ = 'packing_items'
+    __table_args__ = (
+        db.Index('ix_packing_items_user_trip_order', 'user_id', 'trip_id', 'is_packed', 'category', 'item'),
+    )
+    # to_dict() keys, for column-tuple reads through backend.utils.serialization
+    SERIALIZED_FIELDS = ('id', 'user_id', 'trip_id', 'item', 'category', 'is_packed', 'quantity', 'created_at')
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
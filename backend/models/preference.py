@@ -1,9 +1,19 @@
 from datetime import datetime
-import json
+from sqlalchemy import exists, func, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 from backend.extensions import db
+from backend.models.types import JSONType
 
 class UserPreference(db.Model):
     __tablename__ = 'user_preferences'
+    __table_args__ = (
+        db.Index('ix_user_preferences_user_id', 'user_id'),
+        # Containment (@>) queries on interests; Postgres only
+        db.Index(
+            'ix_user_preferences_activity_interests_gin', 'activity_interests',
+            postgresql_using='gin', postgresql_ops={'activity_interests': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -14,56 +24,64 @@ class UserPreference(db.Model):
     group_type = db.Column(db.String(50))    # 'solo', 'couple', 'family', 'friends'
     
     # Food Preferences
-    dietary_restrictions = db.Column(db.Text)  # JSON string
-    cuisine_preferences = db.Column(db.Text)   # JSON string
+    dietary_restrictions = db.Column(JSONType)  # list
+    cuisine_preferences = db.Column(JSONType)   # list
     food_adventure_level = db.Column(db.String(20))  # 'conservative', 'moderate', 'adventurous'
     
     # Activity Preferences
-    activity_interests = db.Column(db.Text)    # JSON string
+    activity_interests = db.Column(JSONType)    # list
     fitness_level = db.Column(db.String(20))   # 'low', 'moderate', 'high'
     
     # Accommodation Preferences
     accommodation_type = db.Column(db.String(50))  # 'hotel', 'hostel', 'airbnb', 'resort'
     
     # Other Preferences
-    languages_spoken = db.Column(db.Text)      # JSON string
-    accessibility_needs = db.Column(db.Text)   # JSON string
+    languages_spoken = db.Column(JSONType)      # list
+    accessibility_needs = db.Column(JSONType)   # list
     sustainability_priority = db.Column(db.Boolean, default=False)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_dietary_restrictions(self, restrictions_list):
-        """Set dietary restrictions as JSON"""
-        self.dietary_restrictions = json.dumps(restrictions_list)
+        """Set dietary restrictions"""
+        self.dietary_restrictions = restrictions_list
     
     def get_dietary_restrictions(self):
         """Get dietary restrictions as list"""
-        return json.loads(self.dietary_restrictions) if self.dietary_restrictions else []
+        return self.dietary_restrictions or []
     
     def set_cuisine_preferences(self, cuisines_list):
-        """Set cuisine preferences as JSON"""
-        self.cuisine_preferences = json.dumps(cuisines_list)
+        """Set cuisine preferences"""
+        self.cuisine_preferences = cuisines_list
     
     def get_cuisine_preferences(self):
         """Get cuisine preferences as list"""
-        return json.loads(self.cuisine_preferences) if self.cuisine_preferences else []
+        return self.cuisine_preferences or []
     
     def set_activity_interests(self, activities_list):
-        """Set activity interests as JSON"""
-        self.activity_interests = json.dumps(activities_list)
+        """Set activity interests"""
+        self.activity_interests = activities_list
     
     def get_activity_interests(self):
         """Get activity interests as list"""
-        return json.loads(self.activity_interests) if self.activity_interests else []
+        return self.activity_interests or []
     
     def get_languages_spoken(self):
         """Get languages spoken as list"""
-        return json.loads(self.languages_spoken) if self.languages_spoken else []
+        return self.languages_spoken or []
     
     def get_accessibility_needs(self):
         """Get accessibility needs as list"""
-        return json.loads(self.accessibility_needs) if self.accessibility_needs else []
+        return self.accessibility_needs or []
+    
+    @classmethod
+    def has_activity_interest(cls, interest):
+        """Filter: activity_interests contains this value (JSONB @> on Postgres, json_each on SQLite)"""
+        if db.session.get_bind().dialect.name == 'postgresql':
+            return type_coerce(cls.activity_interests, JSONB).contains([interest])
+        interests = func.json_each(cls.activity_interests).table_valued('value').alias('interests')
+        return exists(select(1).select_from(interests).where(interests.c.value == interest))
     
     def to_dict(self):
         return {
@@ -1,9 +1,20 @@
 from datetime import datetime
-import json
 from backend.extensions import db
+from backend.models.types import JSONType
 
 class Ticket(db.Model):
     __tablename__ = 'tickets'
+    __table_args__ = (
+        db.Index('ix_tickets_user_trip', 'user_id', 'trip_id'),
+        db.Index('ix_tickets_trip_id', 'trip_id'),
+    )
+    JSON_FIELDS = {'additional_info': dict}
+    # to_dict() keys, for column-tuple reads through backend.utils.serialization
+    SERIALIZED_FIELDS = (
+        'id', 'user_id', 'trip_id', 'ticket_type', 'title', 'description', 'booking_reference',
+        'confirmation_number', 'price', 'currency', 'booking_date', 'valid_from', 'valid_until',
+        'status', 'additional_info', 'created_at', 'updated_at'
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -29,18 +40,18 @@ class Ticket(db.Model):
     
     # Meta
     status = db.Column(db.String(20), default='confirmed')  # 'confirmed', 'cancelled', 'used', 'expired'
-    additional_info = db.Column(db.Text)  # JSON string for platform specific details
+    additional_info = db.Column(JSONType)  # Platform specific details
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_additional_info(self, data):
-        """Set info as JSON"""
-        self.additional_info = json.dumps(data)
+        """Set platform specific info"""
+        self.additional_info = data
     
     def get_additional_info(self):
         """Get info as dict"""
-        return json.loads(self.additional_info) if self.additional_info else {}
+        return self.additional_info if self.additional_info is not None else {}
     
     def to_dict(self):
         return {
@@ -1,9 +1,26 @@
 from datetime import datetime
-import json
+from sqlalchemy import exists, func, select, true, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
 from backend.extensions import db
+from backend.models.types import JSONType
 
 class Trip(db.Model):
     __tablename__ = 'trips'
+    __table_args__ = (
+        db.Index('ix_trips_user_created', 'user_id', 'created_at'),
+        db.Index('ix_trips_user_start_date', 'user_id', 'start_date'),
+        db.Index('ix_trips_user_status_end_date', 'user_id', 'status', 'end_date'),
+        # Containment (@>) queries into itineraries; Postgres only
+        db.Index(
+            'ix_trips_itinerary_gin', 'itinerary',
+            postgresql_using='gin', postgresql_ops={'itinerary': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
+    # JSON columns and the value each reads as when empty
+    JSON_FIELDS = {
+        'itinerary': dict, 'places_visited': list, 'accommodation_details': dict,
+        'mood_analysis': dict, 'safety_alerts': list
+    }
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -24,9 +41,12 @@ class Trip(db.Model):
     trip_type = db.Column(db.String(50))  # 'leisure', 'business', 'adventure', etc.
     
     # Itinerary and Planning
-    itinerary = db.Column(db.Text)  # JSON string
-    places_visited = db.Column(db.Text)  # JSON string
-    accommodation_details = db.Column(db.Text)  # JSON string
+    # The JSON blobs (tens of KB with an AI itinerary) are deferred as one group:
+    # list queries skip them, and the first access loads all of them together.
+    # Queries that serialize full trips should use options(undefer_group('blobs')).
+    itinerary = db.deferred(db.Column(JSONType), group='blobs')
+    places_visited = db.deferred(db.Column(JSONType), group='blobs')
+    accommodation_details = db.deferred(db.Column(JSONType), group='blobs')
     
     # Status and Metadata
     status = db.Column(db.String(20), default='planned')  # 'planned', 'ongoing', 'completed', 'cancelled'
@@ -34,36 +54,53 @@ class Trip(db.Model):
     notes = db.Column(db.Text)
     
     # AI Generated Data
-    mood_analysis = db.Column(db.Text)  # JSON string
+    mood_analysis = db.deferred(db.Column(JSONType), group='blobs')
     sustainability_score = db.Column(db.Float)
-    safety_alerts = db.Column(db.Text)  # JSON string
+    safety_alerts = db.deferred(db.Column(JSONType), group='blobs')
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_itinerary(self, itinerary_data):
-        """Set itinerary as JSON"""
-        self.itinerary = json.dumps(itinerary_data)
+        """Set itinerary"""
+        self.itinerary = itinerary_data
     
     def get_itinerary(self):
         """Get itinerary as dict"""
-        return json.loads(self.itinerary) if self.itinerary else {}
+        return self.itinerary if self.itinerary is not None else {}
     
     def set_places_visited(self, places_list):
-        """Set places visited as JSON"""
-        self.places_visited = json.dumps(places_list)
+        """Set places visited"""
+        self.places_visited = places_list
     
     def get_places_visited(self):
         """Get places visited as list"""
-        return json.loads(self.places_visited) if self.places_visited else []
+        return self.places_visited if self.places_visited is not None else []
     
     def set_safety_alerts(self, alerts_list):
-        """Set safety alerts as JSON"""
-        self.safety_alerts = json.dumps(alerts_list)
+        """Set safety alerts"""
+        self.safety_alerts = alerts_list
     
     def get_safety_alerts(self):
         """Get safety alerts as list"""
-        return json.loads(self.safety_alerts) if self.safety_alerts else []
+        return self.safety_alerts if self.safety_alerts is not None else []
+    
+    @classmethod
+    def has_activity_type(cls, activity_type):
+        """Filter: the itinerary has an activity of this type on any day.
+
+        Postgres answers it with JSONB containment (served by the GIN index),
+        SQLite by walking the arrays with json_each.
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            document = {'days': [{'activities': [{'type': activity_type}]}]}
+            return type_coerce(cls.itinerary, JSONB).contains(document)
+        days = func.json_each(cls.itinerary, '$.days').table_valued('value').alias('itinerary_days')
+        activities = func.json_each(days.c.value, '$.activities').table_valued('value').alias('itinerary_activities')
+        return exists(
+            select(1).select_from(days).join(activities, true())
+            .where(func.json_extract(activities.c.value, '$.type') == activity_type)
+        )
     
     def calculate_duration(self):
         """Calculate trip duration in days"""
@@ -94,4 +131,21 @@ class Trip(db.Model):
             'safety_alerts': self.get_safety_alerts(),
             'created_at': self.created_at.isoformat() + 'Z',
             'updated_at': self.updated_at.isoformat() + 'Z'
+        }
+    
+    def to_summary_dict(self):
+        """List-view fields only; never touches the deferred JSON blobs"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'destination': self.destination,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'duration_days': self.duration_days,
+            'lat': self.lat,
+            'lng': self.lng,
+            'budget': self.budget,
+            'trip_type': self.trip_type,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() + 'Z'
         }
\ No newline at end of file
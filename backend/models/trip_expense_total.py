@@ -0,0 +1,81 @@
+from sqlalchemy import event, func, insert, select, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from backend.extensions import db
+from backend.models.trip import Trip
+
+_UPSERT_INSERTS = {'postgresql': pg_insert, 'sqlite': sqlite_insert}
+
+class TripExpenseTotal(db.Model):
+    """
+    Running expense totals per trip, category and currency.
+
+    Maintained from the Expense mapper events in the same transaction as the
+    expense write, so per-trip rollups read a handful of rows instead of
+    scanning every expense. Deleting a trip drops its rows explicitly, since
+    SQLite runs without foreign key enforcement and ignores ON DELETE CASCADE.
+    Bulk operations that bypass the ORM (bulk_*, query.delete) skip the
+    events; rebuild() recomputes the table.
+    """
+    __tablename__ = 'trip_expense_totals'
+    __table_args__ = (
+        db.Index('ix_trip_expense_totals_user_trip', 'user_id', 'trip_id'),
+    )
+
+    trip_id = db.Column(db.Integer, db.ForeignKey('trips.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)  # '' for uncategorized
+    currency = db.Column(db.String(3), primary_key=True)
+
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    expense_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def apply(cls, connection, trip_id, user_id, category, currency, amount, count):
+        """Add amount/count (negative to remove) to one totals row on this connection"""
+        if trip_id is None or not amount and not count:
+            return
+        key = {'trip_id': trip_id, 'user_id': user_id, 'category': category or '', 'currency': currency}
+        table = cls.__table__
+        dialect = connection.dialect.name
+        if dialect in _UPSERT_INSERTS:
+            # Atomic under concurrent writers to the same trip
+            stmt = _UPSERT_INSERTS[dialect](table).values(**key, total=amount, expense_count=count)
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=list(key),
+                set_={'total': table.c.total + stmt.excluded.total,
+                      'expense_count': table.c.expense_count + stmt.excluded.expense_count}
+            ))
+        else:
+            changed = connection.execute(
+                update(table)
+                .where(*(table.c[name] == value for name, value in key.items()))
+                .values(total=table.c.total + amount, expense_count=table.c.expense_count + count)
+            ).rowcount
+            if not changed:
+                connection.execute(insert(table).values(**key, total=amount, expense_count=count))
+        if count < 0:
+            connection.execute(
+                delete(table)
+                .where(*(table.c[name] == value for name, value in key.items()))
+                .where(table.c.expense_count <= 0)
+            )
+
+    @classmethod
+    def rebuild(cls, connection=None):
+        """Recompute every row from the expenses table"""
+        from backend.models.expense import Expense, DEFAULT_CURRENCY
+        connection = connection or db.session.connection()
+        category = func.coalesce(Expense.category, '')
+        currency = func.coalesce(Expense.currency, DEFAULT_CURRENCY)
+        connection.execute(delete(cls.__table__))
+        connection.execute(insert(cls.__table__).from_select(
+            ['trip_id', 'user_id', 'category', 'currency', 'total', 'expense_count'],
+            select(Expense.trip_id, Expense.user_id, category, currency, func.sum(Expense.amount), func.count())
+            .where(Expense.trip_id.isnot(None))
+            .group_by(Expense.trip_id, Expense.user_id, category, currency)
+        ))
+
+@event.listens_for(Trip, 'after_delete')
+def _drop_trip_totals(mapper, connection, trip):
+    connection.execute(delete(TripExpenseTotal.__table__).where(TripExpenseTotal.trip_id == trip.id))
@@ -0,0 +1,9 @@
+"""
+Column types shared by the models
+"""
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Native JSON: JSONB on Postgres (queryable, GIN-indexable), JSON text on SQLite.
+# Python None is stored as SQL NULL rather than the JSON literal null.
+JSONType = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql')
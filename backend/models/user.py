@@ -1,7 +1,7 @@
 from datetime import datetime
 import bcrypt
-import json
 from backend.extensions import db
+from backend.models.types import JSONType
 from backend.models.ticket import Ticket
 from backend.models.chat_message import ChatMessage
 from backend.models.preference import UserPreference
@@ -18,7 +18,7 @@ class User(db.Model):
     phone = db.Column(db.String(20))
     date_of_birth = db.Column(db.Date)
     preferred_currency = db.Column(db.String(3), default='INR') # Global currency support
-    last_location = db.Column(db.Text)  # JSON string format {"lat": float, "lng": float, "updated_at": "ISOString"}
+    last_location = db.Column(JSONType)  # {"lat": float, "lng": float, "address": str, "updated_at": "ISOString"}
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -37,12 +37,7 @@ class User(db.Model):
         return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
     
     def _get_location_data(self):
-        if not self.last_location:
-            return None
-        try:
-            return json.loads(self.last_location)
-        except (ValueError, TypeError):
-            return None
+        return self.last_location if isinstance(self.last_location, dict) else None
 
     def to_dict(self):
         return {
@@ -0,0 +1,49 @@
+from datetime import datetime
+from backend.extensions import db
+from backend.models.types import JSONType
+
+class UserTravelStats(db.Model):
+    """
+    Precomputed travel analytics per user, read by /api/ai/user/patterns.
+
+    backend.services.travel_analytics applies each commit's trip and
+    expense changes to the user's row as deltas, and the nightly batch
+    (backend/scripts/recompute_travel_stats.py) rebuilds every row.
+    budget_counts and destination_counts hold the full multisets the
+    percentiles and top destinations are derived from, so a delta never
+    needs the user's other trips.
+    """
+    __tablename__ = 'user_travel_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+
+    trip_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_trip_count = db.Column(db.Integer, nullable=False, default=0)
+    # Over trips with a budget set
+    budget_trip_count = db.Column(db.Integer, nullable=False, default=0)
+    average_budget = db.Column(db.Float)
+    budget_p50 = db.Column(db.Float)
+    budget_p90 = db.Column(db.Float)
+
+    budget_counts = db.Column(JSONType)  # [[budget, trips]], ascending budget
+    destination_counts = db.Column(JSONType)  # {destination: trips}
+    top_destinations = db.Column(JSONType)  # [{'destination', 'count'}], most frequent first
+    trip_types = db.Column(JSONType)  # [{'trip_type', 'count'}], most frequent first
+    spend_by_category = db.Column(JSONType)  # [{'category', 'currency', 'total', 'count'}] as recorded, by category
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'trip_count': self.trip_count,
+            'completed_trip_count': self.completed_trip_count,
+            'budget_trip_count': self.budget_trip_count,
+            'average_budget': self.average_budget,
+            'budget_p50': self.budget_p50,
+            'budget_p90': self.budget_p90,
+            'top_destinations': self.top_destinations or [],
+            'trip_types': self.trip_types or [],
+            'spend_by_category': self.spend_by_category or [],
+            'updated_at': self.updated_at.isoformat() + 'Z' if self.updated_at else None
+        }
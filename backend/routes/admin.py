@@ -0,0 +1,96 @@
+from flask import Blueprint, Response, jsonify, request
+from flask_jwt_extended import jwt_required
+from backend.utils.admin import admin_required
+from backend.utils.loop_monitor import loop_monitor
+from backend.utils.profiler import (
+    sampling_profiler, ProfilerBusy, MAX_PROFILE_SECONDS, to_collapsed, to_speedscope, get_request_profile
+)
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/loop-lag', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_loop_lag():
+    """Worst event-loop blocking call sites seen by this worker"""
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        'enabled': loop_monitor.enabled,
+        'interval_ms': loop_monitor.interval * 1000,
+        'threshold_ms': loop_monitor.threshold * 1000,
+        'sites': loop_monitor.report(limit) if loop_monitor.enabled else []
+    }), 200
+
+@admin_bp.route('/loop-lag', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def reset_loop_lag():
+    loop_monitor.reset()
+    return jsonify({'message': 'Loop lag report cleared'}), 200
+
+@admin_bp.route('/profile', methods=['POST'])
+@jwt_required()
+@admin_required
+def start_worker_profile():
+    """Start sampling every thread of this worker for ?seconds= in the background.
+
+    Returns 202 with a profile_id; fetch the result from /profile/<profile_id>.
+    """
+    seconds = request.args.get('seconds', 10, type=float)
+    interval_ms = request.args.get('interval_ms', 5, type=float)
+    if seconds is None or seconds <= 0 or interval_ms is None or interval_ms <= 0:
+        return jsonify({'error': 'seconds and interval_ms must be positive'}), 400
+    if seconds > MAX_PROFILE_SECONDS:
+        return jsonify({'error': f'seconds must be at most {MAX_PROFILE_SECONDS:g}'}), 400
+
+    try:
+        profile_id = sampling_profiler.start(seconds, interval_ms / 1000)
+    except ProfilerBusy as e:
+        return jsonify({'error': str(e)}), 409
+    logger.info("Profiling worker %d for %.1fs as %s", os.getpid(), seconds, profile_id)
+    return jsonify({'profile_id': profile_id, 'pid': os.getpid(), 'seconds': seconds}), 202
+
+@admin_bp.route('/profile/<profile_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_worker_profile(profile_id):
+    """Stacks of a background profile.
+
+    format=collapsed (default, for flamegraph.pl/speedscope) or speedscope (JSON).
+    202 while the profile is still running.
+    """
+    output_format = request.args.get('format', 'collapsed')
+    if output_format not in ('collapsed', 'speedscope'):
+        return jsonify({'error': 'format is collapsed or speedscope'}), 400
+    result = sampling_profiler.fetch(profile_id)
+    if result is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if result['status'] == 'running':
+        return jsonify({'status': 'running', 'pid': result['pid']}), 202
+    if result['status'] == 'failed':
+        return jsonify({'error': result['error'], 'pid': result['pid']}), 500
+
+    stacks, interval = result['stacks'], result['interval']
+    filename = f"roamiq-{result['pid']}-{profile_id[:8]}"
+    if output_format == 'speedscope':
+        response = jsonify(to_speedscope(stacks, interval))
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}.speedscope.json"'
+        return response
+    response = Response(to_collapsed(stacks), mimetype='text/plain')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.collapsed.txt"'
+    return response
+
+@admin_bp.route('/profile/requests/<profile_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_request_profile_report(profile_id):
+    """cProfile report for a request sent with X-Profile: 1"""
+    profile = get_request_profile(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(profile), 200
@@ -10,6 +10,11 @@ from datetime import datetime
 from backend.services.ai_service import ai_service
 from backend.services.ai.llm_provider import llm_provider
 from backend.utils.error_handler import api_error_handler, validate_required_fields
+from backend.utils.cost_limiter import (
+    cost_limit, estimate_chat_cost, estimate_upload_cost, estimate_audio_cost, fixed_cost
+)
+from backend.utils.pagination import KeysetPage, parse_limit, decode_cursor, encode_cursor, keyset_filter
+from backend.utils.db_routing import replica_reads
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +35,12 @@ def get_available_models():
             'total_models': len(models)
         })
     except Exception as e:
-        logger.error(f"Error getting models: {e}")
+        logger.error("Error getting models: %s", e)
         return jsonify({'error': 'Failed to retrieve models'}), 500
 
 @ai_bp.route('/chat', methods=['POST'])
 @jwt_required()
+@cost_limit(estimate_chat_cost)
 @api_error_handler
 async def chat_with_ai():
     """Unified chat endpoint using the NEW AIService."""
@@ -65,28 +71,33 @@ async def chat_with_ai():
     except Exception as e:
         import traceback
         traceback.print_exc()
-        logger.error(f"Chat route error: {str(e)}")
+        logger.error("Chat route error: %s", e)
         return jsonify({'error': 'Failed to generate AI response', 'details': str(e)}), 500
 
 @ai_bp.route('/chat/history/<conversation_id>', methods=['GET'])
 @jwt_required()
 @api_error_handler
+@replica_reads()
 def get_chat_history(conversation_id):
     """Retrieve chat history for a specific conversation."""
     try:
         from backend.models.chat_message import ChatMessage
         user_identity = get_jwt_identity()
         user_id = int(user_identity) if user_identity and str(user_identity).isdigit() else None
+        try:
+            page = KeysetPage(ChatMessage, (ChatMessage.timestamp, ChatMessage.id), descending=False)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Check if conversation messages exist for this user
-        messages = ChatMessage.query.filter_by(
+        messages = page.fetch(ChatMessage.query.filter_by(
             conversation_id=conversation_id,
             user_id=user_id
-        ).order_by(ChatMessage.timestamp.asc()).all()
+        ))
         
-        return jsonify([msg.to_dict() for msg in messages])
+        return page.add_cursor(jsonify([page.serialize(msg) for msg in messages]))
     except Exception as e:
-        logger.error(f"Error fetching chat history: {e}")
+        logger.error("Error fetching chat history: %s", e)
         return jsonify({'error': 'Failed to fetch history'}), 500
 
 @ai_bp.route('/user/patterns', methods=['GET'])
@@ -102,50 +113,77 @@ async def get_user_patterns():
 @ai_bp.route('/chat/conversations', methods=['GET'])
 @jwt_required()
 @api_error_handler
+@replica_reads()
 def get_conversations():
-    """List summary of all conversations for the current user."""
+    """List summary of all conversations for the current user.
+
+    Newest first. Optional keyset pagination: ?limit=N returns one page and an
+    X-Next-Cursor header to pass back as ?cursor= for the next one.
+    """
     try:
         from backend.models.chat_message import ChatMessage
         from backend.extensions import db
         from sqlalchemy import func
         user_identity = get_jwt_identity()
         user_id = int(user_identity) if user_identity and str(user_identity).isdigit() else None
+
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor, 2) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        logger.debug(f"Fetching conversations for user_id: {user_id}")
+        logger.debug("Fetching conversations for user_id: %s", user_id)
         
-        # Robust query: get latest message per conversation using max(id)
-        # Re-restoring filter now that debugging is complete
-        conversations = ChatMessage.query.filter(
-            ChatMessage.user_id == user_id,
-            ChatMessage.id.in_(
-                db.session.query(func.max(ChatMessage.id))
-                .filter(ChatMessage.user_id == user_id)
-                .group_by(ChatMessage.conversation_id)
-            )
-        ).order_by(ChatMessage.timestamp.desc()).all()
+        # Latest message per conversation (covering index on user_id, conversation_id, id)
+        latest = db.session.query(func.max(ChatMessage.id).label('id'))\
+            .filter(ChatMessage.user_id == user_id)\
+            .group_by(ChatMessage.conversation_id)\
+            .subquery()
+
+        # First user message per conversation, for the title
+        ranked = db.session.query(
+            ChatMessage.conversation_id.label('conversation_id'),
+            func.substr(ChatMessage.content, 1, 41).label('title'),
+            func.row_number().over(
+                partition_by=ChatMessage.conversation_id,
+                order_by=(ChatMessage.timestamp.asc(), ChatMessage.id.asc())
+            ).label('position')
+        ).filter(ChatMessage.user_id == user_id, ChatMessage.role == 'user').subquery()
+
+        query = db.session.query(
+            ChatMessage.id,
+            ChatMessage.conversation_id,
+            ChatMessage.timestamp,
+            func.substr(ChatMessage.content, 1, 61).label('preview'),
+            ranked.c.title
+        ).join(latest, ChatMessage.id == latest.c.id)\
+            .outerjoin(ranked, (ranked.c.conversation_id == ChatMessage.conversation_id) & (ranked.c.position == 1))
+
+        if after:
+            query = query.filter(keyset_filter((ChatMessage.timestamp, ChatMessage.id), after))
+        query = query.order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc())
+        if limit:
+            query = query.limit(limit)
+        conversations = query.all()
         
-        logger.debug(f"SQLite query returned {len(conversations)} conversations for user {user_id}")
+        logger.debug("Fetched %s conversations for user %s", len(conversations), user_id)
         
-        results = []
-        for conv in conversations:
-            # Try to get the first user message as the title
-            first_msg = ChatMessage.query.filter_by(
-                conversation_id=conv.conversation_id, 
-                role='user'
-            ).order_by(ChatMessage.timestamp.asc()).first()
-            
-            title = first_msg.content[:40] + "..." if first_msg and len(first_msg.content) > 40 else (first_msg.content if first_msg else "New Chat")
-            
-            results.append({
-                'id': conv.conversation_id,
-                'title': title,
-                'last_message': conv.content[:60] + "..." if len(conv.content) > 60 else conv.content,
-                'timestamp': conv.timestamp.isoformat() + "Z"
-            })
-            
-        return jsonify(results)
+        results = [{
+            'id': conv.conversation_id,
+            'title': (conv.title[:40] + "..." if len(conv.title) > 40 else conv.title) if conv.title else "New Chat",
+            'last_message': conv.preview[:60] + "..." if len(conv.preview) > 60 else conv.preview,
+            'timestamp': conv.timestamp.isoformat() + "Z"
+        } for conv in conversations]
+
+        response = jsonify(results)
+        if limit and len(conversations) == limit:
+            last = conversations[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(last.timestamp, last.id)
+        return response
     except Exception as e:
-        logger.error(f"Error listing conversations: {e}")
+        logger.error("Error listing conversations: %s", e)
         return jsonify({'error': 'Failed to list conversations'}), 500
 
 @ai_bp.route('/chat/conversations/<conversation_id>', methods=['DELETE'])
@@ -166,7 +204,7 @@ def delete_conversation(conversation_id):
         ).delete()
         
         db.session.commit()
-        logger.info(f"Deleted {deleted_count} messages for conversation {conversation_id}")
+        logger.info("Deleted %s messages for conversation %s", deleted_count, conversation_id)
         
         return jsonify({
             'success': True, 
@@ -175,11 +213,12 @@ def delete_conversation(conversation_id):
         })
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting conversation {conversation_id}: {e}")
+        logger.error("Error deleting conversation %s: %s", conversation_id, e)
         return jsonify({'error': 'Failed to delete conversation'}), 500
 
 @ai_bp.route('/generate/itinerary', methods=['POST'])
 @jwt_required()
+@cost_limit(fixed_cost(3000))
 @api_error_handler
 async def generate_itinerary():
     """Structured itinerary generation."""
@@ -197,11 +236,12 @@ async def generate_itinerary():
         
         return jsonify(itinerary)
     except Exception as e:
-        logger.error(f"Itinerary route error: {e}")
+        logger.error("Itinerary route error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @ai_bp.route('/generate/packing-list', methods=['POST'])
 @jwt_required()
+@cost_limit(fixed_cost(1000))
 @api_error_handler
 async def generate_packing_list():
     """Smart packing list generation."""
@@ -218,11 +258,12 @@ async def generate_packing_list():
         
         return jsonify(packing_list)
     except Exception as e:
-        logger.error(f"Packing list route error: {e}")
+        logger.error("Packing list route error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @ai_bp.route('/file/analyze', methods=['POST'])
 @jwt_required()
+@cost_limit(estimate_upload_cost)
 @api_error_handler
 async def analyze_file():
     """Analyze ANY uploaded file."""
@@ -238,11 +279,12 @@ async def analyze_file():
         result = await ai_service.analyze_file(file_data, mime_type, filename)
         return jsonify(result)
     except Exception as e:
-        logger.error(f"File analysis route error: {e}")
+        logger.error("File analysis route error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @ai_bp.route('/audio/transcribe', methods=['POST'])
 @jwt_required()
+@cost_limit(estimate_audio_cost)
 @api_error_handler
 async def transcribe_audio():
     """Transcribe voice input."""
@@ -265,7 +307,7 @@ async def transcribe_audio():
         )
         return jsonify(result)
     except Exception as e:
-        logger.error(f"Transcription route error: {e}")
+        logger.error("Transcription route error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @ai_bp.route('/audio/synthesize', methods=['POST'])
@@ -280,7 +322,7 @@ async def synthesize_audio():
         result = await ai_service.synthesize_speech(text)
         return jsonify(result)
     except Exception as e:
-        logger.error(f"Synthesis route error: {e}")
+        logger.error("Synthesis route error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @ai_bp.route('/status', methods=['GET'])
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from backend.models.user import User, db
 from backend.models.preference import UserPreference
+from backend.services.cache_service import cache_service
+from backend.utils.http_cache import conditional_cache
 import sys
 from datetime import datetime
 import logging
@@ -18,22 +20,22 @@ def before_auth_request():
 def register():
     try:
         data = request.get_json()
-        logger.debug(f"Registration attempt for user: {data.get('username')}")
+        logger.debug("Registration attempt for user: %s", data.get('username'))
         
         # Validate required fields
         required_fields = ['username', 'email', 'password']
         for field in required_fields:
             if not data.get(field):
-                logger.warning(f"Registration failed: {field} is required")
+                logger.warning("Registration failed: %s is required", field)
                 return jsonify({'error': f'{field} is required'}), 400
         
         # Check if user already exists
         if User.query.filter_by(username=data['username']).first():
-            logger.warning(f"Registration failed: Username '{data['username']}' already exists")
+            logger.warning("Registration failed: Username '%s' already exists", data['username'])
             return jsonify({'error': 'Username already exists'}), 400
         
         if User.query.filter_by(email=data['email']).first():
-            logger.warning(f"Registration failed: Email '{data['email']}' already exists")
+            logger.warning("Registration failed: Email '%s' already exists", data['email'])
             return jsonify({'error': 'Email already exists'}), 400
         
         # Create new user
@@ -50,21 +52,21 @@ def register():
             try:
                 user.date_of_birth = datetime.strptime(data['date_of_birth'], '%Y-%m-%d').date()
             except ValueError:
-                logger.warning(f"Registration failed: Invalid date format '{data['date_of_birth']}'")
+                logger.warning("Registration failed: Invalid date format '%s'", data['date_of_birth'])
                 return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         db.session.add(user)
         db.session.commit()
-        logger.info(f"User '{user.username}' created successfully with ID: {user.id}")
+        logger.info("User '%s' created successfully with ID: %s", user.username, user.id)
         
         # Create default preferences
         try:
             preferences = UserPreference(user_id=user.id)
             db.session.add(preferences)
             db.session.commit()
-            logger.debug(f"Default preferences created for user ID: {user.id}")
+            logger.debug("Default preferences created for user ID: %s", user.id)
         except Exception as pref_e:
-            logger.warning(f"Failed to create preferences for user {user.id}: {pref_e}")
+            logger.warning("Failed to create preferences for user %s: %s", user.id, pref_e)
             # Continue even if preferences fail
         
         # Generate access token
@@ -79,7 +81,7 @@ def register():
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        logger.error(f"Registration error: {str(e)}\n{error_trace}")
+        logger.error("Registration error: %s\n%s", e, error_trace)
         db.session.rollback()
         return jsonify({
             'error': str(e),
@@ -90,7 +92,7 @@ def register():
 def login():
     try:
         data = request.get_json()
-        logger.debug(f"Login attempt for user/email: {data.get('username')}")
+        logger.debug("Login attempt for user/email: %s", data.get('username'))
         
         if not data.get('username') or not data.get('password'):
             logger.warning("Login failed: Username and password are required")
@@ -102,16 +104,16 @@ def login():
         ).first()
         
         if not user:
-            logger.warning(f"Login failed: User '{data['username']}' not found")
+            logger.warning("Login failed: User '%s' not found", data['username'])
             return jsonify({'error': 'Invalid credentials'}), 401
             
         if not user.check_password(data['password']):
-            logger.warning(f"Login failed: Incorrect password for user '{user.username}'")
+            logger.warning("Login failed: Incorrect password for user '%s'", user.username)
             return jsonify({'error': 'Invalid credentials'}), 401
         
         # Generate access token
         access_token = create_access_token(identity=str(user.id))
-        logger.info(f"Login successful for user '{user.username}' (ID: {user.id})")
+        logger.info("Login successful for user '%s' (ID: %s)", user.username, user.id)
         
         return jsonify({
             'message': 'Login successful',
@@ -122,7 +124,7 @@ def login():
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        logger.error(f"Login error: {str(e)}\n{error_trace}")
+        logger.error("Login error: %s\n%s", e, error_trace)
         return jsonify({
             'error': str(e),
             'traceback': error_trace if request.args.get('debug') else None
@@ -130,6 +132,7 @@ def login():
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
+@conditional_cache()
 def get_profile():
     try:
         user_id = get_jwt_identity()
@@ -141,7 +144,7 @@ def get_profile():
         return jsonify({'user': user.to_dict()}), 200
         
     except Exception as e:
-        logger.error(f"Profile GET error: {str(e)}")
+        logger.error("Profile GET error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['PUT'])
@@ -169,6 +172,7 @@ def update_profile():
         
         user.updated_at = datetime.utcnow()
         db.session.commit()
+        cache_service.invalidate_user(user_id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -176,6 +180,6 @@ def update_profile():
         }), 200
         
     except Exception as e:
-        logger.error(f"Profile PUT error: {str(e)}")
+        logger.error("Profile PUT error: %s", e)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
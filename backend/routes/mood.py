@@ -1,7 +1,9 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from backend.models.mood_log import MoodLog
-from sqlalchemy import desc
+from backend.utils.cost_limiter import cost_limit, fixed_cost
+from backend.utils.pagination import KeysetPage
+from backend.utils.db_routing import replica_reads
 
 import logging
 
@@ -11,26 +13,29 @@ mood_bp = Blueprint('mood', __name__)
 
 @mood_bp.route('/history', methods=['GET'])
 @jwt_required()
+@replica_reads()
 def get_mood_history():
     try:
         user_id = get_jwt_identity()
-        limit = request.args.get('limit', 10, type=int)
+        try:
+            # Newest `limit` logs (default 10), returned oldest first; the cursor pages further back
+            page = KeysetPage(MoodLog, (MoodLog.created_at, MoodLog.id), default_limit=10)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        logs = MoodLog.query.filter_by(user_id=user_id)\
-            .order_by(desc(MoodLog.created_at))\
-            .limit(limit)\
-            .all()
+        logs = page.fetch(MoodLog.query.filter_by(user_id=user_id))
             
-        return jsonify({
-            'history': [log.to_dict() for log in reversed(logs)]
-        }), 200
+        return page.add_cursor(jsonify({
+            'history': [page.serialize(log) for log in reversed(logs)]
+        })), 200
         
     except Exception as e:
-        logger.error(f"Error fetching mood history: {e}")
+        logger.error("Error fetching mood history: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @mood_bp.route('/recommendations', methods=['POST'])
 @jwt_required()
+@cost_limit(fixed_cost(800))
 async def get_recommendations():
     try:
         data = request.get_json()
@@ -44,7 +49,7 @@ async def get_recommendations():
             'recommendations': recommendations
         }), 200
     except Exception as e:
-        logger.error(f"Error getting recommendations: {e}")
+        logger.error("Error getting recommendations: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @mood_bp.route('/log', methods=['POST'])
@@ -68,5 +73,5 @@ def log_mood():
         
         return jsonify(new_log.to_dict()), 201
     except Exception as e:
-        logger.error(f"Error logging mood: {e}")
+        logger.error("Error logging mood: %s", e)
         return jsonify({'error': str(e)}), 500
@@ -7,8 +7,16 @@ from backend.models.packing_list import PackingItem
 from backend.models.preference import UserPreference, db
 from backend.models.ticket import Ticket
 from backend.services.ai_service import AIService
+from backend.services.cache_service import cache_service
+from backend.services.expense_service import expense_service
+from backend.services.fx_service import fx_service
+from backend.utils.http_cache import conditional_cache
+from backend.utils.cost_limiter import cost_limit, fixed_cost
+from backend.utils.pagination import KeysetPage
+from backend.utils.db_routing import replica_reads
+from sqlalchemy import func
+from sqlalchemy.orm import undefer_group
 from datetime import datetime, date
-import json
 import logging
 import requests
 
@@ -19,6 +27,7 @@ from backend.services.ai_service import ai_service
 
 @travel_bp.route('/preferences', methods=['GET'])
 @jwt_required()
+@conditional_cache()
 def get_preferences():
     try:
         user_id = get_jwt_identity()
@@ -29,13 +38,14 @@ def get_preferences():
             preferences = UserPreference(user_id=user_id)
             db.session.add(preferences)
             db.session.commit()
-            logger.debug(f"Created default preferences for user {user_id}")
+            cache_service.invalidate_user(user_id)
+            logger.debug("Created default preferences for user %s", user_id)
         
-        logger.debug(f"Fetched preferences for user {user_id}")
+        logger.debug("Fetched preferences for user %s", user_id)
         return jsonify({'preferences': preferences.to_dict()}), 200
         
     except Exception as e:
-        logger.error(f"Error fetching preferences for user {get_jwt_identity()}: {str(e)}")
+        logger.error("Error fetching preferences for user %s: %s", get_jwt_identity(), e)
         return jsonify({'error': str(e)}), 500
 
 @travel_bp.route('/preferences', methods=['PUT'])
@@ -48,7 +58,7 @@ def update_preferences():
         preferences = UserPreference.query.filter_by(user_id=user_id).first()
         if not preferences:
             preferences = UserPreference(user_id=user_id)
-            logger.debug(f"Creating new preferences for user {user_id} during update as none existed.")
+            logger.debug("Creating new preferences for user %s during update as none existed.", user_id)
         
         # Update preferences
         if 'budget_range' in data:
@@ -75,8 +85,9 @@ def update_preferences():
         preferences.updated_at = datetime.utcnow()
         db.session.add(preferences)
         db.session.commit()
+        cache_service.invalidate_user(user_id)
         
-        logger.debug(f"Preferences updated successfully for user {user_id}")
+        logger.debug("Preferences updated successfully for user %s", user_id)
         return jsonify({
             'message': 'Preferences updated successfully',
             'preferences': preferences.to_dict()
@@ -84,23 +95,40 @@ def update_preferences():
         
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error updating preferences for user {get_jwt_identity()}: {str(e)}")
+        logger.error("Error updating preferences for user %s: %s", get_jwt_identity(), e)
         return jsonify({'error': str(e)}), 500
 
 @travel_bp.route('/trips', methods=['GET'])
 @jwt_required()
+@conditional_cache()
+@replica_reads()
 def get_trips():
+    """List the user's trips.
+
+    ?view=summary returns list-view fields without the JSON blobs;
+    ?activity_type= keeps trips whose itinerary has an activity of that type.
+    """
     try:
         user_id = get_jwt_identity()
-        trips = Trip.query.filter_by(user_id=user_id).order_by(Trip.created_at.desc()).all()
-        
-        logger.debug(f"Fetched {len(trips)} trips for user {user_id}")
-        return jsonify({
-            'trips': [trip.to_dict() for trip in trips]
-        }), 200
+        summary = request.args.get('view') == 'summary'
+        try:
+            page = KeysetPage(Trip, (Trip.created_at, Trip.id), serializer=Trip.to_summary_dict if summary else None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = Trip.query.filter_by(user_id=user_id)
+        if request.args.get('activity_type'):
+            query = query.filter(Trip.has_activity_type(request.args['activity_type']))
+        if not summary and not page.fields:
+            query = query.options(undefer_group('blobs'))
+        trips = page.fetch(query)
+        
+        logger.debug("Fetched %s trips for user %s", len(trips), user_id)
+        return page.add_cursor(jsonify({
+            'trips': [page.serialize(trip) for trip in trips]
+        })), 200
         
     except Exception as e:
-        logger.error(f"Error fetching trips for user {get_jwt_identity()}: {str(e)}")
+        logger.error("Error fetching trips for user %s: %s", get_jwt_identity(), e)
         return jsonify({'error': str(e)}), 500
 
 # ==========================================
@@ -109,21 +137,27 @@ def get_trips():
 
 @travel_bp.route('/tickets', methods=['GET'])
 @jwt_required()
+@conditional_cache()
+@replica_reads()
 def get_tickets():
     """Get all tickets for the user, optionally filtered by trip"""
     try:
         user_id = get_jwt_identity()
         trip_id = request.args.get('trip_id')
+        try:
+            page = KeysetPage(Ticket, (Ticket.id,), descending=False)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         query = Ticket.query.filter_by(user_id=user_id)
         if trip_id:
             query = query.filter_by(trip_id=trip_id)
             
-        tickets = query.all()
-        logger.debug(f"Fetched {len(tickets)} tickets for user {user_id}, trip_id: {trip_id}")
-        return jsonify([t.to_dict() for t in tickets])
+        tickets = page.fetch(query)
+        logger.debug("Fetched %s tickets for user %s, trip_id: %s", len(tickets), user_id, trip_id)
+        return page.add_cursor(jsonify([page.serialize(t) for t in tickets]))
     except Exception as e:
-        logger.error(f"Error fetching tickets for user {get_jwt_identity()}: {str(e)}")
+        logger.error("Error fetching tickets for user %s: %s", get_jwt_identity(), e)
         return jsonify({'error': str(e)}), 500
 
 @travel_bp.route('/tickets', methods=['POST'])
@@ -135,7 +169,7 @@ def add_ticket():
         data = request.get_json()
         
         if not data.get('ticket_type') or not data.get('title'):
-            logger.debug(f"Missing required fields for adding ticket for user {user_id}")
+            logger.debug("Missing required fields for adding ticket for user %s", user_id)
             return jsonify({'error': 'Missing required fields'}), 400
             
         ticket = Ticket(
@@ -158,12 +192,13 @@ def add_ticket():
             
         db.session.add(ticket)
         db.session.commit()
+        cache_service.invalidate_user(user_id, ticket.trip_id)
         
-        logger.debug(f"Ticket added successfully for user {user_id}: {ticket.id}")
+        logger.debug("Ticket added successfully for user %s: %s", user_id, ticket.id)
         return jsonify(ticket.to_dict()), 201
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error adding ticket for user {get_jwt_identity()}: {str(e)}")
+        logger.error("Error adding ticket for user %s: %s", get_jwt_identity(), e)
         return jsonify({'error': str(e)}), 500
 
 @travel_bp.route('/tickets/<int:ticket_id>', methods=['DELETE'])
@@ -176,12 +211,13 @@ def delete_ticket(ticket_id):
         
         db.session.delete(ticket)
         db.session.commit()
+        cache_service.invalidate_user(user_id, ticket.trip_id)
         
-        logger.debug(f"Ticket {ticket_id} deleted successfully for user {user_id}")
+        logger.debug("Ticket %s deleted successfully for user %s", ticket_id, user_id)
         return jsonify({'message': 'Ticket deleted'})
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Error deleting ticket {ticket_id} for user {get_jwt_identity()}: {str(e)}")
+        logger.error("Error deleting ticket %s for user %s: %s", ticket_id, get_jwt_identity(), e)
         return jsonify({'error': str(e)}), 500
 
 # ==========================================
@@ -197,12 +233,12 @@ def update_location():
         data = request.get_json()
         
         if not data or 'lat' not in data or 'lng' not in data:
-            logger.debug(f"Missing lat/lng for user {user_id} location update")
+            logger.debug("Missing lat/lng for user %s location update", user_id)
             return jsonify({'error': 'Latitude and longitude required'}), 400
             
         user = User.query.get(user_id)
         if not user:
-            logger.debug(f"User {user_id} not found for location update")
+            logger.debug("User %s not found for location update", user_id)
             return jsonify({'error': 'User not found'}), 404
 
         location_data = {
@@ -212,13 +248,14 @@ def update_location():
             'updated_at': datetime.utcnow().isoformat()
         }
         
-        user.last_location = json.dumps(location_data)
+        user.last_location = location_data
         db.session.commit()
+        cache_service.invalidate_user(user_id)
         
-        logger.debug(f"Updated location for user {user_id}: {location_data}")
+        logger.debug("Updated location for user %s: %s", user_id, location_data)
         return jsonify({'message': 'Location updated', 'location': location_data})
     except Exception as e:
-        logger.error(f"Failed to update location for user {get_jwt_identity()}: {str(e)}")
+        logger.error("Failed to update location for user %s: %s", get_jwt_identity(), e)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -260,9 +297,9 @@ async def create_trip():
                 loc = geo_res.json()[0]
                 trip.lat = float(loc['lat'])
                 trip.lng = float(loc['lon'])
-                logger.info(f"Geocoded '{trip.destination}' to {trip.lat}, {trip.lng}")
+                logger.info("Geocoded '%s' to %s, %s", trip.destination, trip.lat, trip.lng)
         except Exception as ge:
-            logger.warning(f"Failed to geocode destination '{trip.destination}': {ge}")
+            logger.warning("Failed to geocode destination '%s': %s", trip.destination, ge)
         
         # Calculate duration
         trip.calculate_duration()
@@ -294,6 +331,7 @@ async def create_trip():
         
         db.session.add(trip)
         db.session.commit()
+        cache_service.invalidate_user(user_id, trip.id)
         
         return jsonify({
             'message': 'Trip created successfully',
@@ -306,10 +344,12 @@ async def create_trip():
 
 @travel_bp.route('/trips/<int:trip_id>', methods=['GET'])
 @jwt_required()
+@conditional_cache()
+@replica_reads()
 def get_trip(trip_id):
     try:
         user_id = get_jwt_identity()
-        trip = Trip.query.filter_by(id=trip_id, user_id=user_id).first()
+        trip = Trip.query.filter_by(id=trip_id, user_id=user_id).options(undefer_group('blobs')).first()
         
         if not trip:
             return jsonify({'error': 'Trip not found'}), 404
@@ -362,6 +402,7 @@ def update_trip(trip_id):
         
         trip.updated_at = datetime.utcnow()
         db.session.commit()
+        cache_service.invalidate_user(user_id, trip.id)
         
         return jsonify({
             'message': 'Trip updated successfully',
@@ -384,6 +425,7 @@ def delete_trip(trip_id):
         
         db.session.delete(trip)
         db.session.commit()
+        cache_service.invalidate_user(user_id, trip_id)
         
         return jsonify({'message': 'Trip deleted successfully'}), 200
         
@@ -465,17 +507,23 @@ def generate_destination_suggestions(query, mood, budget):
 
 @travel_bp.route('/expenses', methods=['GET'])
 @jwt_required()
+@conditional_cache()
+@replica_reads()
 def get_expenses():
     try:
         user_id = get_jwt_identity()
         trip_id = request.args.get('trip_id')
+        try:
+            page = KeysetPage(Expense, (Expense.date, Expense.id))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         query = Expense.query.filter_by(user_id=user_id)
         if trip_id:
             query = query.filter_by(trip_id=trip_id)
 
-        expenses = query.order_by(Expense.date.desc()).all()
-        return jsonify([e.to_dict() for e in expenses]), 200
+        expenses = page.fetch(query)
+        return page.add_cursor(jsonify([page.serialize(e) for e in expenses])), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -497,6 +545,7 @@ def add_expense():
         )
         db.session.add(expense)
         db.session.commit()
+        cache_service.invalidate_user(user_id, expense.trip_id)
         return jsonify(expense.to_dict()), 201
     except Exception as e:
         db.session.rollback()
@@ -513,28 +562,100 @@ def delete_expense(expense_id):
         
         db.session.delete(expense)
         db.session.commit()
+        cache_service.invalidate_user(user_id, expense.trip_id)
         return jsonify({'message': 'Expense deleted'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@travel_bp.route('/expenses/summary', methods=['GET'])
+@jwt_required()
+# Converted totals change when a new FX snapshot is loaded
+@conditional_cache(vary=fx_service.version)
+@replica_reads()
+def get_expense_summary():
+    """Expense totals grouped by ?group_by=category|day|trip|currency.
+
+    Optional trip_id, inclusive start/end ISO dates, and a currency to
+    convert the totals into.
+    """
+    try:
+        user_id = get_jwt_identity()
+        trip_id = request.args.get('trip_id', type=int)
+        try:
+            summary = expense_service.summarize(
+                user_id,
+                request.args.get('group_by', 'category'),
+                trip_id=trip_id,
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                currency=request.args.get('currency')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(summary), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@travel_bp.route('/trips/<int:trip_id>/budget', methods=['GET'])
+@jwt_required()
+# Days elapsed and the burn rate move with the calendar, and converted amounts with FX snapshots
+@conditional_cache(vary=lambda: f"{date.today().isoformat()}|{fx_service.version()}")
+@replica_reads()
+def get_trip_budget(trip_id):
+    """Budget vs actual, burn rate and running daily spend for a trip"""
+    try:
+        try:
+            budget = expense_service.trip_budget(get_jwt_identity(), trip_id, currency=request.args.get('currency'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if budget is None:
+            return jsonify({'error': 'Trip not found'}), 404
+        return jsonify(budget), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@travel_bp.route('/fx/rates', methods=['GET'])
+@jwt_required()
+def get_fx_rates():
+    """Latest exchange rates as units of each currency per 1 ?base= (default USD)"""
+    try:
+        try:
+            rates = fx_service.matrix().to_dict(request.args.get('base', 'USD').upper())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(rates), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ==========================================
 # PACKING LIST ROUTES
 # ==========================================
 
 @travel_bp.route('/packing-list', methods=['GET'])
 @jwt_required()
+@conditional_cache()
+@replica_reads()
 def get_packing_list():
     try:
         user_id = get_jwt_identity()
         trip_id = request.args.get('trip_id')
+        try:
+            # Unchecked first, then checked; NULLs coalesced so cursors can compare them
+            page = KeysetPage(PackingItem, (
+                func.coalesce(PackingItem.is_packed, False),
+                func.coalesce(PackingItem.category, ''),
+                PackingItem.item,
+                PackingItem.id
+            ), descending=False)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         query = PackingItem.query.filter_by(user_id=user_id)
         if trip_id:
             query = query.filter_by(trip_id=trip_id)
         
-        # Sort manually or via SQL: unchecked first, then checked
-        items = query.order_by(PackingItem.is_packed, PackingItem.category, PackingItem.item).all()
-        return jsonify([i.to_dict() for i in items]), 200
+        items = page.fetch(query)
+        return page.add_cursor(jsonify([page.serialize(i) for i in items])), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -555,6 +676,7 @@ def add_packing_item():
         )
         db.session.add(item)
         db.session.commit()
+        cache_service.invalidate_user(user_id, item.trip_id)
         return jsonify(item.to_dict()), 201
     except Exception as e:
         db.session.rollback()
@@ -578,6 +700,7 @@ def update_packing_item(item_id):
             item.item = data['item']
         
         db.session.commit()
+        cache_service.invalidate_user(user_id, item.trip_id)
         return jsonify(item.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -594,11 +717,13 @@ def delete_packing_item(item_id):
         
         db.session.delete(item)
         db.session.commit()
+        cache_service.invalidate_user(user_id, item.trip_id)
         return jsonify({'message': 'Item deleted'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 @travel_bp.route('/packing-list/generate', methods=['POST'])
 @jwt_required()
+@cost_limit(fixed_cost(1000))
 async def generate_packing_list_ai():
     try:
         user_id = get_jwt_identity()
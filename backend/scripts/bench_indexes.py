@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query plans and latency of the hot list queries before and after
+the composite-index migration
+
+Builds the schema from the models in a scratch SQLite file, seeds it with
+many users' worth of rows, then runs each query with the migration's
+indexes dropped (before) and applied (after), printing EXPLAIN QUERY PLAN
+and mean latency for both.
+
+Usage: python backend/scripts/bench_indexes.py [--users 2000] [--rows 50] [--repeat 50]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from sqlalchemy import create_engine
+from backend.extensions import db
+import backend.models.user  # noqa: F401  registers every model on db.metadata
+import backend.models.expense  # noqa: F401
+import backend.models.packing_list  # noqa: F401
+import backend.models.mood_log  # noqa: F401
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), '..', 'migrations', 'versions', '20261019_120000_add_composite_indexes.py'
+)
+
+# (label, sql, params); user 7 / trip 7*rows-ish stand in for an arbitrary heavy user
+QUERIES = [
+    ('trips list', "SELECT * FROM trips WHERE user_id = ? ORDER BY created_at DESC", (7,)),
+    ('trips by start date', "SELECT * FROM trips WHERE user_id = ? ORDER BY start_date DESC", (7,)),
+    ('expenses list', "SELECT * FROM expenses WHERE user_id = ? ORDER BY date DESC", (7,)),
+    ('expenses for trip', "SELECT * FROM expenses WHERE user_id = ? AND trip_id = ? ORDER BY date DESC", (7, None)),
+    ('trip report expenses', "SELECT * FROM expenses WHERE trip_id = ?", (None,)),
+    ('tickets for trip', "SELECT * FROM tickets WHERE user_id = ? AND trip_id = ?", (7, None)),
+    ('packing list', "SELECT * FROM packing_items WHERE user_id = ? AND trip_id = ? "
+                     "ORDER BY is_packed, category, item", (7, None)),
+    ('mood history', "SELECT * FROM mood_logs WHERE user_id = ? ORDER BY created_at DESC LIMIT 10", (7,)),
+    ('preferences', "SELECT * FROM user_preferences WHERE user_id = ? LIMIT 1", (7,)),
+    ('chat history', "SELECT * FROM chat_messages WHERE conversation_id = ? ORDER BY timestamp DESC LIMIT 8",
+     ('conv-7-3',)),
+    ('latest per conversation', "SELECT max(id) FROM chat_messages WHERE user_id = ? GROUP BY conversation_id",
+     (7,)),
+]
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location('add_composite_indexes', MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def seed(conn, users, rows):
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    stamp = lambda: (start + timedelta(minutes=rng.randrange(1_000_000))).isoformat(' ')
+
+    conn.executemany(
+        "INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, 'x')",
+        [(u, f"user{u}", f"user{u}@example.com") for u in range(1, users + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO user_preferences (user_id) VALUES (?)", [(u,) for u in range(1, users + 1)]
+    )
+    trips_per_user = max(1, rows // 10)
+    conn.executemany(
+        "INSERT INTO trips (id, user_id, title, destination, start_date, end_date, status, created_at) "
+        "VALUES (?, ?, 'Trip', 'Somewhere', ?, ?, ?, ?)",
+        [((u - 1) * trips_per_user + t + 1, u, stamp()[:10], stamp()[:10],
+          rng.choice(['planned', 'completed']), stamp())
+         for u in range(1, users + 1) for t in range(trips_per_user)]
+    )
+    trip_of = lambda u: (u - 1) * trips_per_user + rng.randrange(trips_per_user) + 1
+    conn.executemany(
+        "INSERT INTO expenses (user_id, trip_id, amount, category, date, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [(u, trip_of(u), rng.uniform(1, 500), rng.choice(['food', 'transport', 'stay']), stamp(), stamp())
+         for u in range(1, users + 1) for _ in range(rows)]
+    )
+    conn.executemany(
+        "INSERT INTO tickets (user_id, trip_id, ticket_type, title) VALUES (?, ?, 'flight', 'Ticket')",
+        [(u, trip_of(u)) for u in range(1, users + 1) for _ in range(rows // 5)]
+    )
+    conn.executemany(
+        "INSERT INTO packing_items (user_id, trip_id, item, category, is_packed) VALUES (?, ?, ?, ?, ?)",
+        [(u, trip_of(u), f"item{i}", rng.choice(['clothes', 'documents']), rng.random() < 0.5)
+         for u in range(1, users + 1) for i in range(rows)]
+    )
+    conn.executemany(
+        "INSERT INTO mood_logs (user_id, mood, energy, polarity, subjectivity, created_at) "
+        "VALUES (?, 'happy', 'high', 0.5, 0.5, ?)",
+        [(u, stamp()) for u in range(1, users + 1) for _ in range(rows // 2)]
+    )
+    conn.executemany(
+        "INSERT INTO chat_messages (conversation_id, user_id, role, content, timestamp) VALUES (?, ?, ?, 'hi', ?)",
+        [(f"conv-{u}-{i % 10}", u, rng.choice(['user', 'ai']), stamp())
+         for u in range(1, users + 1) for i in range(rows * 2)]
+    )
+    conn.commit()
+    return trips_per_user
+
+def run(conn, repeat, trip_id):
+    results = {}
+    for label, sql, params in QUERIES:
+        params = tuple(trip_id if p is None else p for p in params)
+        plan = '; '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        started = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params).fetchall()
+        results[label] = (plan, (time.perf_counter() - started) / repeat * 1000)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=50, help='expenses/packing items per user (others scale from it)')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    migration = load_migration()
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'bench.db')
+        db.metadata.create_all(create_engine(f"sqlite:///{path}"))
+        conn = sqlite3.connect(path)
+
+        print(f"Seeding {args.users:,} users x {args.rows} rows ...")
+        trips_per_user = seed(conn, args.users, args.rows)
+        trip_id = 6 * trips_per_user + 1  # first trip of user 7
+
+        migration.downgrade(conn)
+        conn.execute("ANALYZE")
+        before = run(conn, args.repeat, trip_id)
+        migration.upgrade(conn)
+        after = run(conn, args.repeat, trip_id)
+        conn.close()
+
+    print(f"\n{'query':<26}{'before ms':>10}{'after ms':>10}{'speedup':>9}")
+    for label, _, _ in QUERIES:
+        (plan_before, ms_before), (plan_after, ms_after) = before[label], after[label]
+        print(f"{label:<26}{ms_before:>10.3f}{ms_after:>10.3f}{ms_before / max(ms_after, 1e-9):>8.1f}x")
+        print(f"    before: {plan_before}")
+        print(f"    after:  {plan_after}")
+
+if __name__ == '__main__':
+    main()
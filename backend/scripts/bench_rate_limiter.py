@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: sliding-window-counter limiter vs. the original deque limiter
+
+Measures retained memory (tracemalloc) and per-call latency when N distinct
+identifiers each make a few requests, which is what an IP-keyed limiter sees
+under broad traffic.
+
+Usage: python backend/scripts/bench_rate_limiter.py [--identifiers 1000000] [--requests 5]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils.rate_limiter import SlidingWindowLimiter
+
+class DequeRateLimiter:
+    """The previous implementation: one float per request, keys never dropped"""
+    def __init__(self):
+        self.requests = defaultdict(deque)
+
+    def hit(self, identifier, max_requests, window_seconds, now=None):
+        now = time.time() if now is None else now
+        window_start = now - window_seconds
+        while self.requests[identifier] and self.requests[identifier][0] < window_start:
+            self.requests[identifier].popleft()
+        if len(self.requests[identifier]) >= max_requests:
+            return True
+        self.requests[identifier].append(now)
+        return False
+
+def drive(limiter, identifiers, requests_per_id, start):
+    now = start
+    for r in range(requests_per_id):
+        for i in range(identifiers):
+            limiter.hit(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 100, 3600, now)
+        now += 1.0
+    return now
+
+def measure_memory(factory, identifiers, requests_per_id):
+    gc.collect()
+    tracemalloc.start()
+    limiter = factory()
+    drive(limiter, identifiers, requests_per_id, 1_000_000.0)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return limiter, current
+
+def measure_latency(factory, identifiers, requests_per_id):
+    limiter = factory()
+    gc.collect()
+    started = time.perf_counter()
+    drive(limiter, identifiers, requests_per_id, 1_000_000.0)
+    elapsed = time.perf_counter() - started
+    return elapsed / (identifiers * requests_per_id) * 1e9
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--identifiers', type=int, default=1_000_000)
+    parser.add_argument('--requests', type=int, default=5, help='requests per identifier')
+    args = parser.parse_args()
+
+    engines = [
+        ('deque (old)', DequeRateLimiter),
+        ('sliding window', SlidingWindowLimiter),
+    ]
+
+    print(f"{args.identifiers:,} identifiers x {args.requests} requests")
+    print(f"{'engine':<16}{'memory MiB':>12}{'bytes/id':>10}{'ns/call':>10}")
+    for name, factory in engines:
+        limiter, used = measure_memory(factory, args.identifiers, args.requests)
+        del limiter
+        ns_per_call = measure_latency(factory, args.identifiers, args.requests)
+        print(f"{name:<16}{used / 2**20:>12.1f}{used / args.identifiers:>10.0f}{ns_per_call:>10.0f}")
+
+    # Idle keys: two windows later each request evicts up to max_evictions of them
+    limiter = SlidingWindowLimiter()
+    end = drive(limiter, args.identifiers, 1, 1_000_000.0)
+    for _ in range(args.identifiers // limiter.max_evictions + 1):
+        limiter.hit('late-arrival', 10 ** 9, 3600, end + 2 * 3600)
+    print(f"sliding window keys retained after idle eviction: {len(limiter)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ORM + to_dict() + stdlib JSON against column tuples + RowEncoder + orjson
+
+Seeds a scratch SQLite database with `--rows` expenses and chat messages for
+one user, then times each list read end to end (query, build dicts, encode
+the response body), split by stage, for both serialization paths.
+
+Usage: python backend/scripts/bench_serialization.py [--rows 10000] [--repeat 10]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from backend.extensions import db
+from backend.models.chat_message import ChatMessage
+from backend.models.expense import Expense
+import backend.models.user  # noqa: F401  users table for the foreign keys
+from backend.utils.serialization import OrjsonProvider, encoder_for, orjson
+
+def seed(rows):
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    db.session.bulk_insert_mappings(Expense, [{
+        'user_id': 1, 'trip_id': None, 'amount': round(rng.uniform(1, 500), 2), 'currency': 'USD',
+        'category': rng.choice(['food', 'transport', 'stay']), 'description': f"Expense {i}",
+        'date': start + timedelta(minutes=i), 'created_at': start + timedelta(minutes=i)
+    } for i in range(rows)])
+    db.session.bulk_insert_mappings(ChatMessage, [{
+        'conversation_id': f"conv-{i % 50}", 'user_id': 1, 'role': rng.choice(['user', 'ai']),
+        'content': "Suggest a three day itinerary for Lisbon with food stops " * 4,
+        'timestamp': start + timedelta(seconds=i)
+    } for i in range(rows)])
+    db.session.commit()
+
+def time_stages(repeat, query, build, encode):
+    totals = [0.0, 0.0, 0.0]
+    for _ in range(repeat):
+        db.session.expunge_all()
+        t0 = time.perf_counter()
+        rows = query()
+        t1 = time.perf_counter()
+        payload = build(rows)
+        t2 = time.perf_counter()
+        encode(payload)
+        t3 = time.perf_counter()
+        totals[0] += t1 - t0
+        totals[1] += t2 - t1
+        totals[2] += t3 - t2
+    return [total / repeat * 1000 for total in totals]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    if orjson is None:
+        sys.exit("orjson is not installed")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+        db.init_app(app)
+        stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+
+        with app.app_context():
+            db.create_all()
+            print(f"Seeding {args.rows:,} expenses and chat messages ...")
+            seed(args.rows)
+
+            print(f"\n{'list':<16}{'path':<10}{'query ms':>10}{'dicts ms':>10}{'json ms':>10}{'total ms':>10}")
+            for model, order in ((Expense, Expense.date.desc()), (ChatMessage, ChatMessage.timestamp.asc())):
+                encoder = encoder_for(model)
+                results = {
+                    'to_dict': time_stages(
+                        args.repeat,
+                        lambda: model.query.filter_by(user_id=1).order_by(order).all(),
+                        lambda rows: [row.to_dict() for row in rows],
+                        lambda payload: stdlib.response(payload)
+                    ),
+                    'tuples': time_stages(
+                        args.repeat,
+                        lambda: db.session.query(*encoder.columns).filter(model.user_id == 1).order_by(order).all(),
+                        encoder.encode_all,
+                        lambda payload: fast.response(payload)
+                    ),
+                }
+                baseline = sum(results['to_dict'])
+                for path, stages in results.items():
+                    total = sum(stages)
+                    print(f"{model.__tablename__:<16}{path:<10}" + ''.join(f"{ms:>10.1f}" for ms in stages)
+                          + f"{total:>10.1f}" + (f"  ({baseline / total:.1f}x)" if path == 'tuples' else ''))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Load an FX rate snapshot into the fx_rates table
+
+Reads a {"base": "USD", "date": "YYYY-MM-DD", "rates": {...}} JSON file
+(default: the bundled backend/data/fx_rates.json), or fetches one from
+FX_RATES_URL with --provider. Loading a date again replaces its rates, so
+this is safe to run from a daily cron.
+
+Usage: python backend/scripts/load_fx_rates.py [--file rates.json | --provider [--url URL]]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.app import app
+from backend.services.fx_service import fx_service, BUNDLED_RATES_FILE
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=BUNDLED_RATES_FILE)
+    parser.add_argument('--provider', action='store_true', help='fetch from FX_RATES_URL instead of a file')
+    parser.add_argument('--url', help='provider URL, overriding FX_RATES_URL')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.provider:
+            count = fx_service.refresh_from_provider(args.url)
+        else:
+            count = fx_service.load_file(args.file)
+        print(f"Loaded {count} rates")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Nightly batch: rebuild user_travel_stats for every user
+
+Commits keep each user's row current as their trips and expenses change;
+this full recompute catches writes that bypass the ORM (bulk operations,
+manual SQL) and runs vectorized in pandas when it is installed. Schedule it
+once a day, e.g. `0 3 * * * python backend/scripts/recompute_travel_stats.py`.
+
+Usage: python backend/scripts/recompute_travel_stats.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.app import app
+from backend.services.travel_analytics import travel_analytics, pd
+
+def main():
+    with app.app_context():
+        started = time.perf_counter()
+        count = travel_analytics.recompute_all()
+        engine = 'pandas' if pd is not None else 'python'
+        print(f"Recomputed travel stats for {count:,} users in {time.perf_counter() - started:.2f}s ({engine})")
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ import time
 from typing import Dict, List, Optional, Any, Union, AsyncGenerator
 from enum import Enum
 from dataclasses import dataclass
+from contextlib import contextmanager
+from contextvars import ContextVar
 import asyncio
 import aiohttp
 try:
@@ -38,8 +40,35 @@ from google.genai import types
 import anthropic
 import cohere
 
+from backend.utils.monitoring import monitor
+from backend.utils.tracing import tracer
+
 logger = logging.getLogger(__name__)
 
+@dataclass
+class TokenUsage:
+    """Tokens reported by providers for the calls made while tracking is active"""
+    total_tokens: int = 0
+    calls: int = 0
+
+_token_usage: ContextVar[Optional[TokenUsage]] = ContextVar('llm_token_usage', default=None)
+
+@contextmanager
+def track_token_usage():
+    """Collect provider-reported token usage for LLM calls made inside the block"""
+    usage = TokenUsage()
+    reset_token = _token_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(reset_token)
+
+def record_token_usage(tokens: Optional[int]):
+    usage = _token_usage.get()
+    if usage is not None and tokens:
+        usage.total_tokens += int(tokens)
+        usage.calls += 1
+
 class ModelProvider(Enum):
     OPENAI = "openai"
     GOOGLE = "google"
@@ -142,18 +171,21 @@ class LLMProvider:
             return f"Mock response ({model_name} not configured): {self._generate_mock_response(prompt)}"
 
         try:
-            if provider == ModelProvider.OPENAI:
-                return await self._call_openai(prompt, target_model, system_prompt, **kwargs)
-            elif provider == ModelProvider.GOOGLE:
-                return await self._call_google(prompt, target_model, system_prompt, **kwargs)
-            elif provider == ModelProvider.ANTHROPIC:
-                return await self._call_anthropic(prompt, target_model, system_prompt, **kwargs)
-            elif provider == ModelProvider.COHERE:
-                return await self._call_cohere(prompt, target_model, system_prompt, **kwargs)
-            elif provider == ModelProvider.HUGGINGFACE:
-                return await self._call_huggingface(prompt, target_model, system_prompt, **kwargs)
-            elif provider == ModelProvider.OLLAMA:
-                return await self._call_ollama(prompt, target_model, system_prompt, **kwargs)
+            with tracer.span('llm.attempt', model=target_model, provider=provider.value,
+                             attempt=len(tried_models), fallback_from=tried_models[0] if len(tried_models) > 1 else ''), \
+                    monitor.track_ai_request(target_model):
+                if provider == ModelProvider.OPENAI:
+                    return await self._call_openai(prompt, target_model, system_prompt, **kwargs)
+                elif provider == ModelProvider.GOOGLE:
+                    return await self._call_google(prompt, target_model, system_prompt, **kwargs)
+                elif provider == ModelProvider.ANTHROPIC:
+                    return await self._call_anthropic(prompt, target_model, system_prompt, **kwargs)
+                elif provider == ModelProvider.COHERE:
+                    return await self._call_cohere(prompt, target_model, system_prompt, **kwargs)
+                elif provider == ModelProvider.HUGGINGFACE:
+                    return await self._call_huggingface(prompt, target_model, system_prompt, **kwargs)
+                elif provider == ModelProvider.OLLAMA:
+                    return await self._call_ollama(prompt, target_model, system_prompt, **kwargs)
         except Exception as e:
             error_str = str(e).upper()
             
@@ -285,6 +317,8 @@ class LLMProvider:
             messages=messages,
             **kwargs
         )
+        if response.usage:
+            record_token_usage(response.usage.total_tokens)
         return response.choices[0].message.content
 
     async def _call_google(self, prompt, model_name, system, **kwargs):
@@ -302,16 +336,19 @@ class LLMProvider:
             tools = kwargs.get('tools')
             
             try:
-                response = await client.aio.models.generate_content(
-                    model=model_name,
-                    contents=contents,
-                    config=types.GenerateContentConfig(
-                        temperature=kwargs.get('temperature', 0.7),
-                        top_p=kwargs.get('top_p', 0.9),
-                        system_instruction=system,
-                        tools=tools
+                # Keys are identified by position only so they never reach the trace sink
+                with tracer.span('google.generate_content', model=model_name, key_index=self.google_keys.index(api_key),
+                                 key_rotation=attempt_num):
+                    response = await client.aio.models.generate_content(
+                        model=model_name,
+                        contents=contents,
+                        config=types.GenerateContentConfig(
+                            temperature=kwargs.get('temperature', 0.7),
+                            top_p=kwargs.get('top_p', 0.9),
+                            system_instruction=system,
+                            tools=tools
+                        )
                     )
-                )
                 return response
             except Exception as e:
                 # If quota exceeded and we have other keys, raise special exception to trigger retry
@@ -332,6 +369,8 @@ class LLMProvider:
             logger.info(f"Rate limited on key ...{current_key[-4:]}. Rotating to ...{new_key[-4:]}")
             response = await try_with_key(new_key, attempt_num=1)
         
+        if response.usage_metadata:
+            record_token_usage(response.usage_metadata.total_token_count)
 
         
         # Handle Tool Calls
@@ -369,6 +408,8 @@ class LLMProvider:
             system=system,
             messages=[{"role": "user", "content": content}]
         )
+        if response.usage:
+            record_token_usage(response.usage.input_tokens + response.usage.output_tokens)
         return response.content[0].text
 
     async def _call_cohere(self, prompt, model, system, **kwargs):
@@ -386,6 +427,9 @@ class LLMProvider:
             chat_history=chat_history,
             **kwargs
         )
+        meta = getattr(response, 'meta', None)
+        billed = (meta.get('billed_units') or {}) if isinstance(meta, dict) else {}
+        record_token_usage(billed.get('input_tokens', 0) + billed.get('output_tokens', 0))
         return response.text
 
     async def _call_huggingface(self, prompt, model, system, **kwargs):
@@ -441,6 +485,7 @@ class LLMProvider:
                 if response.status != 200:
                     raise Exception(f"Ollama API error: {await response.text()}")
                 result = await response.json()
+                record_token_usage(result.get('prompt_eval_count', 0) + result.get('eval_count', 0))
                 return result.get('response', '')
 
     def get_available_models(self) -> Dict[str, Any]:
@@ -2,10 +2,15 @@ import logging
 import json
 from datetime import datetime
 from typing import Dict, List, Any, Optional
+from sqlalchemy.orm import undefer_group
 from backend.extensions import db
 from backend.models.trip import Trip
 from backend.models.ticket import Ticket
 from backend.models.expense import Expense
+from backend.services.cache_service import cache_service
+from backend.services.expense_service import expense_service
+from backend.services.fx_service import fx_service
+from backend.utils.db_routing import replica_reads
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +35,7 @@ def create_trip(user_id: int, destination: str, title: str, start_date: str, end
         new_trip.calculate_duration()
         db.session.add(new_trip)
         db.session.commit()
+        cache_service.invalidate_user(user_id, new_trip.id)
         return {"success": True, "trip": new_trip.to_dict()}
     except Exception as e:
         logger.error(f"Error creating trip: {e}")
@@ -43,6 +49,7 @@ def delete_trip(user_id: int, trip_id: int) -> Dict[str, Any]:
             return {"success": False, "error": "Trip not found"}
         db.session.delete(trip)
         db.session.commit()
+        cache_service.invalidate_user(user_id, trip_id)
         return {"success": True, "message": "Trip deleted successfully"}
     except Exception as e:
         db.session.rollback()
@@ -65,6 +72,7 @@ def add_ticket(user_id: int, trip_id: Optional[int], ticket_type: str, title: st
         )
         db.session.add(new_ticket)
         db.session.commit()
+        cache_service.invalidate_user(user_id, trip_id)
         return {"success": True, "ticket": new_ticket.to_dict()}
     except Exception as e:
         logger.error(f"Error adding ticket: {e}")
@@ -85,30 +93,37 @@ def add_expense(user_id: int, trip_id: int, title: str, amount: float, category:
         )
         db.session.add(new_expense)
         db.session.commit()
+        cache_service.invalidate_user(user_id, trip_id)
         return {"success": True, "expense": new_expense.to_dict()}
     except Exception as e:
         logger.error(f"Error adding expense: {e}")
         return {"success": False, "error": str(e)}
 
+@replica_reads()
 def get_user_trips(user_id: int) -> Dict[str, Any]:
     """Get list of active/planned trips for the user."""
     try:
-        trips = Trip.query.filter_by(user_id=user_id).order_by(Trip.start_date.desc()).all()
+        trips = Trip.query.filter_by(user_id=user_id).options(undefer_group('blobs'))\
+            .order_by(Trip.start_date.desc()).all()
         return {"success": True, "trips": [t.to_dict() for t in trips]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@replica_reads()
 def get_finalized_trips(user_id: int) -> Dict[str, Any]:
     """Get list of completed/finalized trips for report generation."""
     try:
-        trips = Trip.query.filter_by(user_id=user_id, status='completed').order_by(Trip.end_date.desc()).all()
+        trips = Trip.query.filter_by(user_id=user_id, status='completed').options(undefer_group('blobs'))\
+            .order_by(Trip.end_date.desc()).all()
         # If no completed trips, just show most recent ones as fallback
         if not trips:
-             trips = Trip.query.filter_by(user_id=user_id).order_by(Trip.end_date.desc()).limit(5).all()
+             trips = Trip.query.filter_by(user_id=user_id).options(undefer_group('blobs'))\
+                 .order_by(Trip.end_date.desc()).limit(5).all()
         return {"success": True, "trips": [t.to_dict() for t in trips]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+@replica_reads()
 def generate_trip_report(user_id: int, trip_id: int) -> Dict[str, Any]:
     """
     Generate a detailed textual report of a trip including costs and tickets.
@@ -120,20 +135,34 @@ def generate_trip_report(user_id: int, trip_id: int) -> Dict[str, Any]:
             return {"success": False, "error": "Trip not found"}
         
         tickets = Ticket.query.filter_by(trip_id=trip_id).all()
-        expenses = Expense.query.filter_by(trip_id=trip_id).all()
-        
-        total_spent = sum(e.amount for e in expenses)
-        ticket_summary = [{"type": t.ticket_type, "title": t.title, "price": t.price} for t in tickets]
+        expenses = db.session.query(Expense.description, Expense.amount, Expense.currency, Expense.category)\
+            .filter_by(trip_id=trip_id).order_by(Expense.date).all()
+        # Totals in the user's preferred currency; tickets are converted in one call
+        spending = expense_service.trip_budget(user_id, trip_id)
+        currency = spending['currency']
+        rates = fx_service.matrix()
+        priced = [t for t in tickets if t.price and (t.currency or 'USD') in rates]
+        ticket_total = sum(rates.convert_many([t.price for t in priced], [t.currency or 'USD' for t in priced], currency))
+        ticket_summary = [{"type": t.ticket_type, "title": t.title, "price": t.price, "currency": t.currency} for t in tickets]
         
         report_data = {
             "title": trip.title,
             "destination": trip.destination,
             "dates": f"{trip.start_date} to {trip.end_date}",
             "budget": trip.budget,
-            "actual_spending": total_spent,
+            "currency": currency,
+            "actual_spending": spending['spent'],
+            "spending_by_category": expense_service.summarize(
+                user_id, 'category', trip_id=trip_id, currency=currency
+            )['groups'],
+            "ticket_total": round(ticket_total, 2),
+            "burn_rate_per_day": spending['burn_rate'],
             "ticket_count": len(tickets),
             "tickets": ticket_summary,
-            "expenses": [{"title": e.description, "amount": e.amount, "category": e.category} for e in expenses],
+            "expenses": [
+                {"title": e.description, "amount": e.amount, "currency": e.currency, "category": e.category}
+                for e in expenses
+            ],
             "notes": trip.notes or "No notes added."
         }
         
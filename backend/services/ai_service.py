@@ -1,8 +1,11 @@
 import logging
 import json
+import os
 from typing import Dict, List, Optional, Any
 from backend.services.ai.llm_provider import llm_provider
 from backend.services.ai.rag_service import rag_service
+from backend.services.travel_analytics import travel_analytics
+from backend.utils.monitoring import monitor
 from datetime import datetime
 import asyncio
 
@@ -40,21 +43,28 @@ class AIService:
                 except (ValueError, TypeError):
                     pass
 
+            # A "model": null request falls back to the provider's default model
+            if not model:
+                model = os.getenv('DEFAULT_LLM_MODEL', 'gemini-2.0-flash-lite')
+            provider = llm_provider._get_provider_for_model(model).value
+
             # 1 & 3. Parallelize History and RAG
             async def get_history():
                 if not conversation_id:
                     return []
                 # access db in current context
-                past_messages = ChatMessage.query.filter_by(conversation_id=conversation_id)\
-                    .order_by(ChatMessage.timestamp.desc())\
-                    .limit(8).all() # Slightly reduced limit for speed
+                with monitor.track_chat_stage('history', model, provider):
+                    past_messages = ChatMessage.query.filter_by(conversation_id=conversation_id)\
+                        .order_by(ChatMessage.timestamp.desc())\
+                        .limit(8).all() # Slightly reduced limit for speed
                 past_messages.reverse()
                 return [{"role": 'user' if msg.role == 'user' else 'model', "parts": [{"text": msg.content}]} for msg in past_messages]
 
             async def get_rag_context():
                 # Only RAG if there's enough substance in the query
                 if len(message.split()) > 3 and any(word in message.lower() for word in ['where', 'plan', 'visit', 'trip', 'travel', 'hotel', 'flight', 'recommend']):
-                    related_docs = await rag_service.search(message)
+                    with monitor.track_chat_stage('rag', model, provider):
+                        related_docs = await rag_service.search(message)
                     if related_docs:
                         return "\nRelevant Info:\n" + "\n".join([d['content'] for d in related_docs])
                 return ""
@@ -64,9 +74,10 @@ class AIService:
 
             # 2. Save user message (Done after history pull to avoid self-inclusion)
             if conversation_id:
-                 user_msg = ChatMessage(conversation_id=conversation_id, user_id=user_id, role='user', content=message)
-                 db.session.add(user_msg)
-                 db.session.commit()
+                 with monitor.track_chat_stage('persist', model, provider):
+                     user_msg = ChatMessage(conversation_id=conversation_id, user_id=user_id, role='user', content=message)
+                     db.session.add(user_msg)
+                     db.session.commit()
 
             # 4. System Prompt
             system_prompt = (
@@ -78,9 +89,11 @@ class AIService:
             
             if user_id:
                 from backend.models.user import User
-                user = User.query.get(user_id)
+                with monitor.track_chat_stage('user_lookup', model, provider):
+                    user = User.query.get(user_id)
                 if user and user.last_location:
-                    system_prompt += f"\nUser's current location: {user.last_location}"
+                    # Stored as a JSON document now; keep the JSON text the prompt always had
+                    system_prompt += f"\nUser's current location: {json.dumps(user.last_location)}"
 
             if context:
                 system_prompt += f"\n\nContext for advice: {context}"
@@ -90,12 +103,13 @@ class AIService:
             tools = [{"function_declarations": TOOL_DECLARATIONS}]
             
             # Initial LLM call
-            response = await llm_provider.generate_response(
-                prompt=contents,
-                model_name=model,
-                system_prompt=system_prompt,
-                tools=tools
-            )
+            with monitor.track_chat_stage('llm', model, provider):
+                response = await llm_provider.generate_response(
+                    prompt=contents,
+                    model_name=model,
+                    system_prompt=system_prompt,
+                    tools=tools
+                )
 
             # Execution loop (up to 3 iterations to prevent infinite loops and reduce lag)
             for _ in range(3):
@@ -116,7 +130,8 @@ class AIService:
                             # Execute within app context
                             # tools run synchronously, so just call them
                             try:
-                                result = AVAILABLE_TOOLS[tool_name](**args)
+                                with monitor.track_chat_stage('tool', model, provider, tool_name):
+                                    result = AVAILABLE_TOOLS[tool_name](**args)
                             except Exception as e:
                                 logger.error(f"Tool {tool_name} failed: {e}")
                                 result = {"error": str(e)}
@@ -136,12 +151,13 @@ class AIService:
                     contents.append({"role": "user", "parts": tool_results_parts})
                     
                     # Call LLM again with results
-                    response = await llm_provider.generate_response(
-                        prompt=contents,
-                        model_name=model,
-                        system_prompt=system_prompt,
-                        tools=tools
-                    )
+                    with monitor.track_chat_stage('llm', model, provider):
+                        response = await llm_provider.generate_response(
+                            prompt=contents,
+                            model_name=model,
+                            system_prompt=system_prompt,
+                            tools=tools
+                        )
                 else:
                     # Final text response received
                     break
@@ -151,9 +167,10 @@ class AIService:
 
             # 6. Save AI response
             if conversation_id:
-                 ai_msg = ChatMessage(conversation_id=conversation_id, user_id=user_id, role='ai', content=ai_text)
-                 db.session.add(ai_msg)
-                 db.session.commit()
+                 with monitor.track_chat_stage('persist', model, provider):
+                     ai_msg = ChatMessage(conversation_id=conversation_id, user_id=user_id, role='ai', content=ai_text)
+                     db.session.add(ai_msg)
+                     db.session.commit()
 
             mood = self._basic_mood_analysis(message)
 
@@ -381,50 +398,17 @@ class AIService:
             ]
 
     async def get_user_patterns(self, user_id: Optional[int] = None) -> Dict[str, Any]:
-        """Analyze user behavior and travel preferences."""
-        from backend.models.trip import Trip
-        from backend.models.preference import UserPreference
-        
+        """Analyze user behavior and travel preferences from the precomputed stats row."""
         # Ensure user_id is int
         if user_id:
             try:
                 user_id = int(user_id)
             except (ValueError, TypeError):
                 user_id = None
-        
-        patterns = {
-            "travel_frequency": 0,
-            "favorite_destinations": [],
-            "preferred_travel_style": "Discovering",
-            "average_budget": 0,
-            "common_activities": ["Sightseeing", "Cultural Tours"]
-        }
-        
-        if user_id:
-            trips = Trip.query.filter_by(user_id=user_id).all()
-            patterns["travel_frequency"] = len(trips)
-            
-            if trips:
-                dests = [t.destination for t in trips if t.destination]
-                patterns["favorite_destinations"] = list(set(dests))[:3]
-                
-                budgets = [t.budget for t in trips if t.budget]
-                if budgets:
-                    patterns["average_budget"] = sum(budgets) / len(budgets)
-            
-            prefs = UserPreference.query.filter_by(user_id=user_id).first()
-            if prefs:
-                patterns["preferred_travel_style"] = prefs.travel_style or "Discovering"
-        
-        return {
-            "patterns": patterns,
-            "recommendations": [
-                "Based on your interest in culture, we recommend Kyoto for your next trip.",
-                "You tend to travel solo; check out our new safety-first group tours!",
-                "Most of your trips are mid-range; we've found 3 premium deals in your budget."
-            ],
-            "timestamp": datetime.now().isoformat()
-        }
+
+        result = travel_analytics.user_patterns(user_id or None)
+        result["timestamp"] = datetime.now().isoformat()
+        return result
 
     def calculate_sustainability_score(self, trip_data: Dict) -> float:
         """Calculate a sustainability score from 0 to 1 based on transport and distance."""
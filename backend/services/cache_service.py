@@ -5,16 +5,31 @@ import json
 import hashlib
 import pickle
 import os
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Iterable
 import logging
 
 logger = logging.getLogger(__name__)
 
+def user_tag(user_id) -> str:
+    """Tag for everything cached on behalf of a user"""
+    return f"user:{user_id}"
+
+def trip_tag(trip_id) -> str:
+    """Tag for everything derived from a single trip"""
+    return f"trip:{trip_id}"
+
 class CacheService:
+    # Tag sets outlive the entries they point at so a long-TTL entry is never orphaned
+    TAG_TTL_SECONDS = 7 * 86400
+
     def __init__(self, cache_dir='backend/cache'):
         self.cache_dir = cache_dir
-        os.makedirs(cache_dir, exist_ok=True)
+        self.tags_dir = os.path.join(cache_dir, 'tags')
+        self.versions_dir = os.path.join(cache_dir, 'versions')
+        os.makedirs(self.tags_dir, exist_ok=True)
+        os.makedirs(self.versions_dir, exist_ok=True)
         
         # Try to use Redis if available, fallback to file cache
         try:
@@ -51,7 +66,7 @@ class CacheService:
                 if cached:
                     return json.loads(cached)
             else:
-                cache_file = os.path.join(self.cache_dir, f"{key}.cache")
+                cache_file = self._cache_file(key)
                 if os.path.exists(cache_file):
                     with open(cache_file, 'rb') as f:
                         cached_data = pickle.load(f)
@@ -60,29 +75,169 @@ class CacheService:
                         else:
                             os.remove(cache_file)
         except Exception as e:
-            logger.error(f"Cache get error: {e}")
+            logger.error("Cache get error: %s", e)
         
         return None
     
-    def set(self, key: str, value: Any, ttl_seconds: int = 3600):
-        """Set cached value with TTL"""
+    def set(self, key: str, value: Any, ttl_seconds: int = 3600, tags: Optional[Iterable[str]] = None):
+        """Set cached value with TTL, optionally registering it under invalidation tags"""
+        tags = list(tags or [])
         try:
             if self.use_redis:
-                self.redis_client.setex(
+                pipe = self.redis_client.pipeline()
+                pipe.setex(
                     key, 
                     ttl_seconds, 
                     json.dumps(value, default=str)
                 )
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), max(ttl_seconds, self.TAG_TTL_SECONDS))
+                pipe.execute()
             else:
-                cache_file = os.path.join(self.cache_dir, f"{key}.cache")
+                cache_file = self._cache_file(key)
                 cached_data = {
                     'data': value,
                     'expires': datetime.now() + timedelta(seconds=ttl_seconds)
                 }
                 with open(cache_file, 'wb') as f:
                     pickle.dump(cached_data, f)
+                for tag in tags:
+                    self._add_file_tag(tag, key)
+        except Exception as e:
+            logger.error("Cache set error: %s", e)
+    
+    def delete(self, key: str):
+        """Remove a single cached value"""
+        try:
+            if self.use_redis:
+                self.redis_client.delete(key)
+            else:
+                cache_file = self._cache_file(key)
+                if os.path.exists(cache_file):
+                    os.remove(cache_file)
+        except Exception as e:
+            logger.error("Cache delete error: %s", e)
+    
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every entry registered under any of the given tags.
+        
+        Cost is proportional to the number of tagged keys, not the cache size.
+        Returns the number of keys removed.
+        """
+        removed = 0
+        for tag in tags:
+            if not tag:
+                continue
+            try:
+                if self.use_redis:
+                    tag_key = self._tag_key(tag)
+                    keys = self.redis_client.smembers(tag_key)
+                    pipe = self.redis_client.pipeline()
+                    if keys:
+                        pipe.delete(*keys)
+                    pipe.delete(tag_key)
+                    pipe.execute()
+                    removed += len(keys)
+                else:
+                    removed += self._invalidate_file_tag(tag)
+                self.bump_tag_version(tag)
+            except Exception as e:
+                logger.error("Cache invalidate error for tag %s: %s", tag, e)
+        return removed
+    
+    def get_tag_version(self, tag: str) -> str:
+        """Current version token of a tag; changes every time the tag is invalidated.
+        
+        Tokens are random rather than counters so a version lost to eviction or a
+        restart can never come back and match a stale ETag.
+        """
+        try:
+            if self.use_redis:
+                version_key = self._version_key(tag)
+                version = self.redis_client.get(version_key)
+                if version is None:
+                    self.redis_client.set(version_key, uuid.uuid4().hex, nx=True)
+                    version = self.redis_client.get(version_key)
+                return version
+            version_file = self._version_file(tag)
+            if os.path.exists(version_file):
+                with open(version_file) as f:
+                    version = f.read()
+                if version:
+                    return version
+            return self.bump_tag_version(tag)
         except Exception as e:
-            logger.error(f"Cache set error: {e}")
+            logger.error("Cache version error for tag %s: %s", tag, e)
+            # A fresh token forces a miss, which is always safe
+            return uuid.uuid4().hex
+    
+    def bump_tag_version(self, tag: str) -> str:
+        """Replace the version token of a tag"""
+        version = uuid.uuid4().hex
+        if self.use_redis:
+            self.redis_client.set(self._version_key(tag), version)
+        else:
+            version_file = self._version_file(tag)
+            tmp_file = f"{version_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w') as f:
+                f.write(version)
+            os.replace(tmp_file, version_file)
+        return version
+    
+    def invalidate_user(self, user_id, trip_id=None) -> int:
+        """Invalidate cached data for a user and, optionally, one of their trips"""
+        tags = [user_tag(user_id)]
+        if trip_id:
+            tags.append(trip_tag(trip_id))
+        return self.invalidate_tags(*tags)
+    
+    def _tag_key(self, tag: str) -> str:
+        return f"tag:{tag}"
+    
+    def _version_key(self, tag: str) -> str:
+        return f"tagver:{tag}"
+    
+    def _version_file(self, tag: str) -> str:
+        return os.path.join(self.versions_dir, hashlib.md5(tag.encode()).hexdigest())
+    
+    def _cache_file(self, key: str) -> str:
+        # Keys contain ':' (http_response:..., replica_sticky:...) which is not a valid filename character on Windows
+        return os.path.join(self.cache_dir, f"{hashlib.md5(key.encode()).hexdigest()}.cache")
+
+    def _tag_dir(self, tag: str) -> str:
+        # Tag names contain ':' which is not a valid filename character on Windows
+        return os.path.join(self.tags_dir, hashlib.md5(tag.encode()).hexdigest())
+    
+    def _add_file_tag(self, tag: str, key: str):
+        """Record key under tag as a marker file so all workers share the index"""
+        tag_dir = self._tag_dir(tag)
+        os.makedirs(tag_dir, exist_ok=True)
+        marker = os.path.join(tag_dir, hashlib.md5(key.encode()).hexdigest())
+        with open(marker, 'w') as f:
+            f.write(key)
+    
+    def _invalidate_file_tag(self, tag: str) -> int:
+        tag_dir = self._tag_dir(tag)
+        if not os.path.isdir(tag_dir):
+            return 0
+        removed = 0
+        for marker_name in os.listdir(tag_dir):
+            marker = os.path.join(tag_dir, marker_name)
+            try:
+                with open(marker) as f:
+                    key = f.read()
+                os.remove(marker)
+            except OSError:
+                # Another worker invalidated the same tag concurrently
+                continue
+            self.delete(key)
+            removed += 1
+        try:
+            os.rmdir(tag_dir)
+        except OSError:
+            pass
+        return removed
     
     def cache_ai_response(self, prompt: str, response: str, ttl_seconds: int = 1800):
         """Cache AI response"""
@@ -120,7 +275,7 @@ class CacheService:
                             # Remove corrupted cache files
                             os.remove(filepath)
             except Exception as e:
-                logger.error(f"Cache cleanup error: {e}")
+                logger.error("Cache cleanup error: %s", e)
 
 # Global cache instance
 cache_service = CacheService()
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+Expense rollups computed in SQL: totals by category, day, trip and currency,
+and budget vs actual for a trip, optionally converted into one currency
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func
+from backend.extensions import db
+from backend.models.expense import Expense, DEFAULT_CURRENCY
+from backend.models.trip import Trip
+from backend.models.trip_expense_total import TripExpenseTotal
+from backend.models.user import User
+from backend.services.fx_service import fx_service, UnknownCurrency
+
+logger = logging.getLogger(__name__)
+
+GROUP_BY_OPTIONS = ('category', 'day', 'trip', 'currency')
+
+def _parse_day(raw: Optional[str], name: str) -> Optional[date]:
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD)")
+
+def _day_key(value) -> str:
+    # date() is a DATE on Postgres and text on SQLite
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+def _rounded(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [dict(group, total=round(group['total'], 2)) for group in groups]
+
+class ExpenseService:
+    """
+    Amounts are summed per currency as recorded, so every group row carries
+    its currency; pass a target currency to get converted totals instead.
+    """
+
+    def _rates(self, currency: str):
+        matrix = fx_service.matrix()
+        # An empty matrix (no snapshot loaded) leaves every group unconverted
+        if matrix.codes and currency not in matrix:
+            raise UnknownCurrency(currency)
+        return matrix
+
+    def summarize(self, user_id, group_by: str, trip_id=None, start=None, end=None,
+                  currency: Optional[str] = None) -> Dict[str, Any]:
+        """Totals and counts for the user's expenses grouped by one dimension.
+
+        start and end are inclusive ISO dates. Per-trip groupings without a
+        date range read TripExpenseTotal; everything else is a GROUP BY
+        answered from the covering indexes. With currency, each group is
+        converted at the latest FX snapshot. Raises ValueError for an unknown
+        group_by or currency, or a malformed date.
+        """
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY_OPTIONS)}")
+        start, end = _parse_day(start, 'start'), _parse_day(end, 'end')
+
+        per_trip = group_by == 'trip' or (trip_id is not None and group_by != 'day')
+        if per_trip and start is None and end is None:
+            groups = self._from_trip_totals(user_id, group_by, trip_id)
+        else:
+            groups = self._from_expenses(user_id, group_by, trip_id, start, end)
+
+        conversion = {}
+        if currency:
+            currency = currency.upper()
+            matrix = self._rates(currency)
+            groups, unconverted = matrix.convert_groups(groups, currency)
+            conversion = {
+                'currency': currency,
+                'rates_as_of': matrix.as_of.isoformat() if matrix.as_of else None,
+                'unconverted': _rounded(unconverted),
+            }
+
+        totals: Dict[str, Dict[str, Any]] = {}
+        for group in groups:
+            entry = totals.setdefault(group['currency'], {'currency': group['currency'], 'total': 0.0, 'count': 0})
+            entry['total'] += group['total']
+            entry['count'] += group['count']
+        return {
+            'group_by': group_by,
+            'groups': _rounded(groups),
+            'totals': _rounded(sorted(totals.values(), key=lambda t: t['currency'])),
+            **conversion,
+        }
+
+    def _from_expenses(self, user_id, group_by, trip_id, start, end) -> List[Dict[str, Any]]:
+        currency = func.coalesce(Expense.currency, DEFAULT_CURRENCY)
+        keys = {
+            'category': [Expense.category],
+            'day': [func.date(Expense.date)],
+            'trip': [Expense.trip_id],
+            'currency': [],
+        }[group_by]
+        query = db.session.query(*keys, currency, func.sum(Expense.amount), func.count()).filter(Expense.user_id == user_id)
+        if trip_id is not None:
+            query = query.filter(Expense.trip_id == trip_id)
+        if group_by == 'trip':
+            query = query.filter(Expense.trip_id.isnot(None))
+        if start is not None:
+            query = query.filter(Expense.date >= datetime.combine(start, datetime.min.time()))
+        if end is not None:
+            query = query.filter(Expense.date < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        rows = query.group_by(*keys, currency).order_by(*keys, currency).all()
+        return self._shape(group_by, [(row[0] if keys else None, *row[-3:]) for row in rows], user_id)
+
+    def _from_trip_totals(self, user_id, group_by, trip_id) -> List[Dict[str, Any]]:
+        keys = {
+            # Totals rows store uncategorized as ''
+            'category': [func.nullif(TripExpenseTotal.category, '')],
+            'trip': [TripExpenseTotal.trip_id],
+            'currency': [],
+        }[group_by]
+        query = db.session.query(
+            *keys, TripExpenseTotal.currency, func.sum(TripExpenseTotal.total), func.sum(TripExpenseTotal.expense_count)
+        ).filter(TripExpenseTotal.user_id == user_id)
+        if trip_id is not None:
+            query = query.filter(TripExpenseTotal.trip_id == trip_id)
+        rows = query.group_by(*keys, TripExpenseTotal.currency).order_by(*keys, TripExpenseTotal.currency).all()
+        return self._shape(group_by, [(row[0] if keys else None, *row[-3:]) for row in rows], user_id)
+
+    def _shape(self, group_by, rows, user_id) -> List[Dict[str, Any]]:
+        groups = []
+        for key, currency, total, count in rows:
+            group = {'currency': currency, 'total': total or 0.0, 'count': int(count)}
+            if group_by == 'day':
+                group['day'] = _day_key(key)
+            elif group_by != 'currency':
+                group['trip_id' if group_by == 'trip' else group_by] = key
+            groups.append(group)
+
+        if group_by == 'trip' and groups:
+            trips = dict(
+                (trip_id, (title, budget)) for trip_id, title, budget in db.session.query(Trip.id, Trip.title, Trip.budget)
+                .filter(Trip.user_id == user_id, Trip.id.in_({g['trip_id'] for g in groups}))
+            )
+            # Totals of deleted trips are dropped
+            groups = [dict(g, title=trips[g['trip_id']][0], budget=trips[g['trip_id']][1])
+                      for g in groups if g['trip_id'] in trips]
+        return groups
+
+    def trip_budget(self, user_id, trip_id, currency: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Budget vs actual, burn rate and the running daily spend for one trip; None if not found.
+
+        Spend is converted into currency, by default the user's preferred
+        currency, which the trip budget is assumed to be set in.
+        """
+        trip = db.session.query(Trip.id, Trip.budget, Trip.start_date, Trip.end_date, Trip.duration_days)\
+            .filter(Trip.id == trip_id, Trip.user_id == user_id).first()
+        if trip is None:
+            return None
+
+        if not currency:
+            currency = db.session.query(User.preferred_currency).filter(User.id == user_id).scalar()
+        currency = (currency or DEFAULT_CURRENCY).upper()
+        matrix = self._rates(currency)
+
+        by_currency = self._from_trip_totals(user_id, 'currency', trip_id)
+        converted, unconverted = matrix.convert_groups(by_currency, currency)
+        spent = round(sum(g['total'] for g in converted), 2)
+
+        day = func.date(Expense.date)
+        expense_currency = func.coalesce(Expense.currency, DEFAULT_CURRENCY)
+        rows = db.session.query(day, expense_currency, func.sum(Expense.amount), func.count())\
+            .filter(Expense.user_id == user_id, Expense.trip_id == trip_id)\
+            .group_by(day, expense_currency).order_by(day, expense_currency).all()
+        days, _ = matrix.convert_groups(self._shape('day', rows, user_id), currency)
+        daily, cumulative = [], 0.0
+        for entry in days:
+            cumulative += entry['total']
+            daily.append({'day': entry['day'], 'total': round(entry['total'], 2), 'cumulative': round(cumulative, 2)})
+
+        # Burn rate over the days elapsed so far: from the trip start (or the
+        # first expense) to today, capped at the trip end
+        first_day = trip.start_date or (date.fromisoformat(daily[0]['day']) if daily else None)
+        last_day = min(filter(None, (date.today(), trip.end_date)))
+        days_elapsed = max((last_day - first_day).days + 1, 1) if first_day else 0
+        burn_rate = round(spent / days_elapsed, 2) if days_elapsed else 0.0
+        days_total = trip.duration_days or (
+            (trip.end_date - trip.start_date).days + 1 if trip.start_date and trip.end_date else None
+        )
+
+        budget = trip.budget
+        return {
+            'trip_id': trip.id,
+            'currency': currency,
+            'rates_as_of': matrix.as_of.isoformat() if matrix.as_of else None,
+            'budget': budget,
+            'spent': spent,
+            'by_currency': _rounded(by_currency),
+            'unconverted': _rounded(unconverted),
+            'remaining': round(budget - spent, 2) if budget is not None else None,
+            'percent_used': round(spent / budget * 100, 1) if budget else None,
+            'days_elapsed': days_elapsed,
+            'days_total': days_total,
+            'burn_rate': burn_rate,
+            'projected_total': round(burn_rate * days_total, 2) if days_total else None,
+            'daily': daily,
+        }
+
+expense_service = ExpenseService()
@@ -0,0 +1,197 @@
+"""
+Currency conversion: FX rate snapshots in the fx_rates table and an
+in-memory cross-rate matrix for converting amounts in bulk
+"""
+import json
+import logging
+import os
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from backend.extensions import db
+from backend.models.fx_rate import FxRate
+from backend.services.cache_service import cache_service
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_RATES_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'fx_rates.json')
+# Optional provider returning {"base": ..., "date": ..., "rates": {...}}
+FX_RATES_URL = os.getenv('FX_RATES_URL')
+# How long a worker reuses the rate matrix before re-reading fx_rates
+FX_CACHE_SECONDS = int(os.getenv('FX_CACHE_SECONDS', 3600))
+# Cache tag bumped whenever a snapshot is loaded; shared by every worker
+FX_RATES_TAG = 'fx_rates'
+
+class UnknownCurrency(ValueError):
+    def __init__(self, currency):
+        super().__init__(f"No exchange rate for currency: {currency}")
+        self.currency = currency
+
+class RateMatrix:
+    """
+    Cross rates between every pair of currencies in a snapshot.
+
+    matrix[i][j] is the units of codes[j] per unit of codes[i]. With numpy
+    installed it is an ndarray and convert_many is vectorized; otherwise a
+    list of lists with the same interface.
+    """
+
+    def __init__(self, per_usd: Dict[str, float], as_of: Optional[date] = None):
+        self.codes = tuple(sorted(per_usd))
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.as_of = as_of
+        if np is not None:
+            quotes = np.array([per_usd[code] for code in self.codes], dtype=float)
+            self.matrix = np.outer(1.0 / quotes, quotes)
+        else:
+            self.matrix = [[per_usd[target] / per_usd[source] for target in self.codes] for source in self.codes]
+
+    def __contains__(self, currency) -> bool:
+        return currency in self.index
+
+    def _position(self, currency) -> int:
+        try:
+            return self.index[currency]
+        except KeyError:
+            raise UnknownCurrency(currency)
+
+    def rate(self, source: str, target: str) -> float:
+        return float(self.matrix[self._position(source)][self._position(target)])
+
+    def convert(self, amount: float, source: str, target: str) -> float:
+        return amount * self.rate(source, target)
+
+    def convert_many(self, amounts: Iterable[float], currencies: Iterable[str], target: str) -> List[float]:
+        """Convert amounts[i] from currencies[i] into target in one pass"""
+        column = self._position(target)
+        amounts, currencies = list(amounts), list(currencies)
+        if np is None:
+            rates = {code: self.matrix[self._position(code)][column] for code in set(currencies)}
+            return [amount * rates[code] for amount, code in zip(amounts, currencies)]
+        if not amounts:
+            return []
+        # Look up each distinct currency once, then gather its rate per amount
+        codes, inverse = np.unique(np.asarray(currencies, dtype=object), return_inverse=True)
+        rows = np.array([self._position(code) for code in codes])
+        return (np.asarray(amounts, dtype=float) * self.matrix[rows, column][inverse]).tolist()
+
+    def convert_groups(self, groups: List[Dict], target: str) -> Tuple[List[Dict], List[Dict]]:
+        """Fold {'currency', 'total', 'count', <key fields>} groups into one per key in target.
+
+        Callers sum per (key, currency) in SQL first, so this converts a few
+        rows per key with one convert_many call. Groups in currencies
+        without a rate are returned separately, unconverted; with an empty
+        matrix (no snapshot loaded) that is every group.
+        """
+        if target not in self:
+            return [], list(groups)
+        known = [group for group in groups if group['currency'] in self]
+        unconverted = [group for group in groups if group['currency'] not in self]
+        amounts = self.convert_many([g['total'] for g in known], [g['currency'] for g in known], target)
+
+        folded: Dict[tuple, Dict] = {}
+        for group, amount in zip(known, amounts):
+            key = tuple(value for name, value in group.items() if name not in ('currency', 'total', 'count'))
+            entry = folded.get(key)
+            if entry is None:
+                folded[key] = dict(group, currency=target, total=amount)
+            else:
+                entry['total'] += amount
+                entry['count'] += group['count']
+        return list(folded.values()), unconverted
+
+    def to_dict(self, base: str = 'USD') -> Dict:
+        if not self.codes:
+            return {'base': base, 'as_of': None, 'rates': {}}
+        column = self._position(base)
+        return {
+            'base': base,
+            'as_of': self.as_of.isoformat() if self.as_of else None,
+            # units of each currency per 1 base
+            'rates': {code: float(self.matrix[column][i]) for code, i in self.index.items()},
+        }
+
+class FxService:
+    def __init__(self):
+        self._cache: Dict[Optional[date], tuple] = {}
+
+    def invalidate(self):
+        """Drop this worker's cached rate matrices"""
+        self._cache.clear()
+
+    def version(self) -> str:
+        """Token that changes whenever any worker loads a snapshot.
+
+        Responses with converted amounts mix it into their ETag, and the
+        per-worker matrices are only reused while it is unchanged.
+        """
+        return cache_service.get_tag_version(FX_RATES_TAG)
+
+    def load_snapshot(self, payload: Dict, source: str) -> int:
+        """Store a {"base", "date", "rates"} snapshot, replacing that date's rates; returns the row count"""
+        base = payload.get('base', 'USD').upper()
+        rates = {code.upper(): float(rate) for code, rate in payload['rates'].items() if rate}
+        rates[base] = 1.0
+        if 'USD' not in rates:
+            raise ValueError("FX snapshot must include a USD rate")
+        snapshot_date = date.fromisoformat(payload['date']) if payload.get('date') else date.today()
+
+        usd = rates['USD']
+        FxRate.query.filter_by(snapshot_date=snapshot_date).delete()
+        db.session.add_all(
+            FxRate(snapshot_date=snapshot_date, currency=code, per_usd=rate / usd, source=source)
+            for code, rate in rates.items()
+        )
+        db.session.commit()
+        self.invalidate()
+        cache_service.invalidate_tags(FX_RATES_TAG)
+        logger.info("Loaded %d FX rates for %s from %s", len(rates), snapshot_date, source)
+        return len(rates)
+
+    def load_file(self, path: str = BUNDLED_RATES_FILE) -> int:
+        with open(path) as f:
+            payload = json.load(f)
+        return self.load_snapshot(payload, payload.get('source') or os.path.basename(path))
+
+    def refresh_from_provider(self, url: Optional[str] = None) -> int:
+        """Fetch today's snapshot from FX_RATES_URL (or url)"""
+        import requests
+        url = url or FX_RATES_URL
+        if not url:
+            raise ValueError("FX_RATES_URL is not configured")
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        return self.load_snapshot(response.json(), 'provider')
+
+    def matrix(self, as_of: Optional[date] = None) -> RateMatrix:
+        """Latest rate per currency on or before as_of (default: today), cached per worker.
+
+        Read-only: with no snapshot loaded the matrix is empty and callers
+        leave amounts unconverted. The fx_rates migration seeds the bundled
+        snapshot; backend/scripts/load_fx_rates.py loads others.
+        """
+        version = self.version()
+        cached = self._cache.get(as_of)
+        if cached and cached[1] > time.monotonic() and cached[2] == version:
+            return cached[0]
+
+        latest = db.session.query(FxRate.currency, func.max(FxRate.snapshot_date).label('snapshot_date'))
+        if as_of is not None:
+            latest = latest.filter(FxRate.snapshot_date <= as_of)
+        latest = latest.group_by(FxRate.currency).subquery()
+        rows = db.session.query(FxRate.currency, FxRate.per_usd, FxRate.snapshot_date).join(
+            latest, (FxRate.currency == latest.c.currency) & (FxRate.snapshot_date == latest.c.snapshot_date)
+        ).all()
+
+        matrix = RateMatrix({currency: per_usd for currency, per_usd, _ in rows},
+                            max((snapshot for _, _, snapshot in rows), default=None))
+        self._cache[as_of] = (matrix, time.monotonic() + FX_CACHE_SECONDS, version)
+        return matrix
+
+fx_service = FxService()
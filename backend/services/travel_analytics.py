@@ -0,0 +1,439 @@
+"""
+Per-user travel analytics: computes the user_travel_stats rows behind
+/api/ai/user/patterns and keeps them current as trips and expenses change
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import bindparam, delete, event, func, insert, inspect, select, update
+from sqlalchemy.orm import object_session
+from backend.extensions import db
+from backend.models.expense import Expense, DEFAULT_CURRENCY
+from backend.models.preference import UserPreference
+from backend.models.trip import Trip
+from backend.models.user import User
+from backend.models.user_travel_stats import UserTravelStats
+from backend.services.fx_service import fx_service
+from backend.utils.db_routing import RoutingSession
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+logger = logging.getLogger(__name__)
+
+TOP_DESTINATIONS = 5
+TRIP_COLUMNS = ('user_id', 'destination', 'budget', 'trip_type', 'status')
+SPEND_COLUMNS = ('user_id', 'category', 'currency', 'total', 'count')
+EXPENSE_COLUMNS = ('user_id', 'category', 'currency', 'amount')
+STATS_COLUMNS = (
+    'trip_count', 'completed_trip_count', 'budget_trip_count', 'average_budget', 'budget_p50', 'budget_p90',
+    'budget_counts', 'destination_counts', 'top_destinations', 'trip_types', 'spend_by_category',
+)
+INSERT_BATCH_SIZE = 1000
+DEFAULT_ACTIVITIES = ["Sightseeing", "Cultural Tours"]
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        'trip_count': 0, 'completed_trip_count': 0, 'budget_trip_count': 0,
+        'average_budget': None, 'budget_p50': None, 'budget_p90': None,
+        'budget_counts': [], 'destination_counts': {},
+        'top_destinations': [], 'trip_types': [], 'spend_by_category': [],
+    }
+
+def _percentile(counts: List[List], total: int, q: float) -> float:
+    """Linear interpolation between closest ranks, as numpy and pandas default to.
+
+    counts are ascending [value, occurrences] pairs covering `total` values.
+    """
+    position = (total - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, total - 1)
+    low = high = None
+    seen = 0
+    for value, count in counts:
+        seen += count
+        if low is None and seen > lower:
+            low = value
+        if seen > upper:
+            high = value
+            break
+    return low + (high - low) * (position - lower)
+
+def _ranked(counter: Counter, name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    # Most frequent first, ties alphabetical, so both build paths agree
+    ranked = sorted(((value, count) for value, count in counter.items() if count > 0),
+                    key=lambda item: (-item[1], item[0]))[:limit]
+    return [{name: value, 'count': count} for value, count in ranked]
+
+def _spend_entry(category, currency, total, count) -> Dict[str, Any]:
+    return {'category': category, 'currency': currency, 'total': round(total or 0.0, 2), 'count': int(count)}
+
+def _sorted_spend(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Databases disagree on where NULL sorts, so order in Python
+    return sorted(entries, key=lambda entry: (entry['category'] is not None, entry['category'] or '', entry['currency']))
+
+def _budget_fields(pairs: List[List]) -> Dict[str, Any]:
+    """Budget columns from ascending [budget, trips] pairs"""
+    total = sum(count for _, count in pairs)
+    if not total:
+        return {'budget_counts': pairs, 'budget_trip_count': 0,
+                'average_budget': None, 'budget_p50': None, 'budget_p90': None}
+    return {
+        'budget_counts': pairs,
+        'budget_trip_count': total,
+        'average_budget': round(sum(value * count for value, count in pairs) / total, 2),
+        'budget_p50': round(_percentile(pairs, total, 0.5), 2),
+        'budget_p90': round(_percentile(pairs, total, 0.9), 2),
+    }
+
+def _derive(stats: Dict[str, Any], budgets: Counter, destinations: Counter, trip_types: Counter) -> Dict[str, Any]:
+    """Store the budget and destination multisets and everything derived from them"""
+    stats.update(_budget_fields(sorted([float(value), count] for value, count in budgets.items() if count > 0)))
+    stats.update(
+        destination_counts={value: count for value, count in destinations.items() if count > 0},
+        top_destinations=_ranked(destinations, 'destination', TOP_DESTINATIONS),
+        trip_types=_ranked(trip_types, 'trip_type'),
+    )
+    return stats
+
+def build_stats(trip_rows: Iterable[tuple], spend_rows: Iterable[tuple]) -> Dict[int, Dict[str, Any]]:
+    """Stats per user from TRIP_COLUMNS and SPEND_COLUMNS rows, in one pass over each"""
+    stats = defaultdict(_empty_stats)
+    budgets, destinations, trip_types = defaultdict(Counter), defaultdict(Counter), defaultdict(Counter)
+    for user_id, destination, budget, trip_type, status in trip_rows:
+        entry = stats[user_id]
+        entry['trip_count'] += 1
+        entry['completed_trip_count'] += status == 'completed'
+        if budget:
+            budgets[user_id][float(budget)] += 1
+        if destination:
+            destinations[user_id][destination] += 1
+        if trip_type:
+            trip_types[user_id][trip_type] += 1
+
+    for user_id, category, currency, total, count in spend_rows:
+        stats[user_id]['spend_by_category'].append(_spend_entry(category, currency, total, count))
+    for user_id, entry in stats.items():
+        entry['spend_by_category'] = _sorted_spend(entry['spend_by_category'])
+        _derive(entry, budgets[user_id], destinations[user_id], trip_types[user_id])
+    return dict(stats)
+
+class _StatsDelta:
+    """What one transaction's trip and expense writes change in a user's stats"""
+
+    def __init__(self):
+        self.trip_count = 0
+        self.completed_trip_count = 0
+        self.budgets = Counter()
+        self.destinations = Counter()
+        self.trip_types = Counter()
+        self.spend = defaultdict(lambda: [0.0, 0])
+
+    def add_trip(self, values: Dict[str, Any], sign: int):
+        self.trip_count += sign
+        self.completed_trip_count += sign * (values['status'] == 'completed')
+        if values['budget']:
+            self.budgets[float(values['budget'])] += sign
+        if values['destination']:
+            self.destinations[values['destination']] += sign
+        if values['trip_type']:
+            self.trip_types[values['trip_type']] += sign
+
+    def add_expense(self, values: Dict[str, Any], sign: int):
+        entry = self.spend[(values['category'], values['currency'] or DEFAULT_CURRENCY)]
+        entry[0] += sign * (values['amount'] or 0.0)
+        entry[1] += sign
+
+    def apply(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """stats with this delta added; reads only the row itself"""
+        budgets = Counter({value: count for value, count in stats['budget_counts'] or []})
+        destinations = Counter(stats['destination_counts'] or {})
+        trip_types = Counter({entry['trip_type']: entry['count'] for entry in stats['trip_types'] or []})
+        budgets.update(self.budgets)
+        destinations.update(self.destinations)
+        trip_types.update(self.trip_types)
+
+        spend = {(entry['category'], entry['currency']): [entry['total'], entry['count']]
+                 for entry in stats['spend_by_category'] or []}
+        for key, (total, count) in self.spend.items():
+            entry = spend.setdefault(key, [0.0, 0])
+            entry[0] += total
+            entry[1] += count
+
+        updated = dict(stats,
+                       trip_count=stats['trip_count'] + self.trip_count,
+                       completed_trip_count=stats['completed_trip_count'] + self.completed_trip_count)
+        updated['spend_by_category'] = _sorted_spend(
+            _spend_entry(category, currency, total, count)
+            for (category, currency), (total, count) in spend.items() if count > 0
+        )
+        return _derive(updated, budgets, destinations, trip_types)
+
+def build_stats_frame(trip_rows: Iterable[tuple], spend_rows: Iterable[tuple]) -> Dict[int, Dict[str, Any]]:
+    """build_stats with the per-user aggregation vectorized in pandas; same output"""
+    trips = pd.DataFrame(list(trip_rows), columns=TRIP_COLUMNS)
+    spend = pd.DataFrame(list(spend_rows), columns=SPEND_COLUMNS)
+    stats = {user_id: _empty_stats() for user_id in set(trips['user_id'].tolist()) | set(spend['user_id'].tolist())}
+
+    # Aggregates are vectorized; only the final per-user dicts are built in
+    # Python, from plain column lists rather than per-group frames
+    if not trips.empty:
+        counts = trips.groupby('user_id').size()
+        for user_id, count in zip(counts.index.tolist(), counts.tolist()):
+            stats[user_id]['trip_count'] = count
+        completed = trips[trips['status'] == 'completed'].groupby('user_id').size()
+        for user_id, count in zip(completed.index.tolist(), completed.tolist()):
+            stats[user_id]['completed_trip_count'] = count
+
+        # Percentiles come from the (few) distinct budgets per user, with the
+        # same interpolation the incremental path uses
+        budgets = trips.loc[trips['budget'].fillna(0) != 0, ['user_id', 'budget']].astype({'budget': float})
+        pairs = budgets.groupby(['user_id', 'budget']).size()
+        for (user_id, value), count in zip(pairs.index.tolist(), pairs.tolist()):
+            stats[user_id]['budget_counts'].append([value, count])
+        for user_id in pairs.index.unique(level='user_id').tolist():
+            stats[user_id].update(_budget_fields(stats[user_id]['budget_counts']))
+
+        for column, key, limit in (('destination', 'top_destinations', TOP_DESTINATIONS), ('trip_type', 'trip_types', None)):
+            present = trips[trips[column].fillna('') != '']
+            counts = present.groupby(['user_id', column]).size().rename('count').reset_index()
+            counts = counts.sort_values(['user_id', 'count', column], ascending=[True, False, True])
+            if column == 'destination':
+                for user_id, value, count in zip(counts['user_id'].tolist(), counts[column].tolist(), counts['count'].tolist()):
+                    stats[user_id]['destination_counts'][value] = count
+            if limit:
+                counts = counts.groupby('user_id').head(limit)
+            for user_id, value, count in zip(counts['user_id'].tolist(), counts[column].tolist(), counts['count'].tolist()):
+                stats[user_id][key].append({column: value, 'count': count})
+
+    for user_id, category, currency, total, count in zip(*(spend[column].tolist() for column in SPEND_COLUMNS)):
+        category = None if pd.isna(category) else category
+        stats[user_id]['spend_by_category'].append(_spend_entry(category, currency, total, count))
+    for entry in stats.values():
+        entry['spend_by_category'] = _sorted_spend(entry['spend_by_category'])
+    return stats
+
+class TravelAnalytics:
+    def _trip_rows(self, connection, user_ids=None):
+        query = select(*(getattr(Trip, column) for column in TRIP_COLUMNS))
+        if user_ids is not None:
+            query = query.where(Trip.user_id.in_(user_ids))
+        return connection.execute(query).all()
+
+    def _spend_rows(self, connection, user_ids=None):
+        currency = func.coalesce(Expense.currency, DEFAULT_CURRENCY)
+        query = select(Expense.user_id, Expense.category, currency, func.sum(Expense.amount), func.count())
+        if user_ids is not None:
+            query = query.where(Expense.user_id.in_(user_ids))
+        return connection.execute(query.group_by(Expense.user_id, Expense.category, currency)).all()
+
+    def _write(self, connection, stats: Dict[int, Dict[str, Any]]):
+        now = datetime.utcnow()
+        rows = [dict(values, user_id=user_id, updated_at=now) for user_id, values in stats.items()]
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            connection.execute(insert(UserTravelStats.__table__), rows[start:start + INSERT_BATCH_SIZE])
+
+    def compute_users(self, user_ids: Iterable[int], connection=None) -> Dict[int, Dict[str, Any]]:
+        """Stats of these users from their trips and expenses, without storing them"""
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        connection = connection or db.session.connection()
+        stats = build_stats(self._trip_rows(connection, user_ids), self._spend_rows(connection, user_ids))
+        return {user_id: stats.get(user_id) or _empty_stats() for user_id in user_ids}
+
+    def apply_deltas(self, deltas: Dict[int, _StatsDelta], connection):
+        """Add each user's delta to their row, on the committing connection.
+
+        Only the users' own rows are read (locked on Postgres against
+        concurrent commits for the same user). A user without a row yet
+        gets one computed in full, once; every later commit is a delta.
+        """
+        table = UserTravelStats.__table__
+        rows = connection.execute(
+            select(table.c.user_id, *(table.c[column] for column in STATS_COLUMNS))
+            .where(table.c.user_id.in_(sorted(deltas)))
+            .with_for_update()
+        ).mappings().all()
+        now = datetime.utcnow()
+        updates = [
+            dict(deltas[row['user_id']].apply(dict(row)), key=row['user_id'], updated_at=now)
+            for row in rows
+        ]
+        for entry in updates:
+            entry.pop('user_id')
+        if updates:
+            connection.execute(
+                update(table).where(table.c.user_id == bindparam('key'))
+                .values({column: bindparam(column) for column in STATS_COLUMNS + ('updated_at',)}),
+                updates
+            )
+        missing = set(deltas) - {row['user_id'] for row in rows}
+        if missing:
+            # The flushed data already includes this commit, so the deltas are not added again
+            self._write(connection, self.compute_users(missing, connection))
+
+    def recompute_all(self) -> int:
+        """Rebuild every row in one transaction (the nightly batch); returns the user count.
+
+        Reads all trips and the per-user expense GROUP BY once, and
+        aggregates them with pandas when it is installed.
+        """
+        connection = db.session.connection()
+        trip_rows, spend_rows = self._trip_rows(connection), self._spend_rows(connection)
+        stats = (build_stats_frame if pd is not None else build_stats)(trip_rows, spend_rows)
+        connection.execute(delete(UserTravelStats.__table__))
+        self._write(connection, stats)
+        db.session.commit()
+        logger.info("Recomputed travel stats for %d users", len(stats))
+        return len(stats)
+
+    def forget_users(self, user_ids: Iterable[int], connection=None):
+        connection = connection or db.session.connection()
+        connection.execute(delete(UserTravelStats.__table__).where(UserTravelStats.user_id.in_(list(user_ids))))
+
+    def user_patterns(self, user_id: Optional[int]) -> Dict[str, Any]:
+        """Patterns and recommendations from one indexed read of the user's stats row"""
+        row = None if user_id is None else db.session.query(
+            UserTravelStats, UserPreference.travel_style, UserPreference.activity_interests, User.preferred_currency
+        ).select_from(User)\
+            .outerjoin(UserTravelStats, UserTravelStats.user_id == User.id)\
+            .outerjoin(UserPreference, UserPreference.user_id == User.id)\
+            .filter(User.id == user_id).first()
+
+        stats, travel_style, activities, currency = row if row else (None, None, None, None)
+        if stats is not None:
+            stats = stats.to_dict()
+        elif row:
+            # No row yet (the user predates the table and the batch has not
+            # run): compute for this response only; reads never write
+            stats = dict(self.compute_users([user_id])[user_id], updated_at=None)
+        else:
+            stats = dict(_empty_stats(), updated_at=None)
+
+        # Spend is stored per currency as recorded and converted on read
+        currency = currency or DEFAULT_CURRENCY
+        rates = fx_service.matrix()
+        spend = rates.convert_groups(stats['spend_by_category'], currency)[0] if currency in rates else []
+        spend = sorted((dict(entry, total=round(entry['total'], 2)) for entry in spend), key=lambda e: -e['total'])
+
+        patterns = {
+            "travel_frequency": stats['trip_count'],
+            "completed_trips": stats['completed_trip_count'],
+            "favorite_destinations": [d['destination'] for d in stats['top_destinations'][:3]],
+            "top_destinations": stats['top_destinations'],
+            "preferred_travel_style": travel_style or "Discovering",
+            "preferred_trip_types": [t['trip_type'] for t in stats['trip_types']],
+            "average_budget": stats['average_budget'] or 0,
+            "budget_percentiles": {"p50": stats['budget_p50'], "p90": stats['budget_p90']},
+            "spend_by_category": spend,
+            "currency": currency,
+            "common_activities": list(activities or DEFAULT_ACTIVITIES),
+        }
+        return {"patterns": patterns, "recommendations": self._recommendations(patterns), "stats_updated_at": stats['updated_at']}
+
+    def _recommendations(self, patterns: Dict[str, Any]) -> List[str]:
+        recommendations = []
+        top = patterns['top_destinations'][0] if patterns['top_destinations'] else None
+        if top and top['count'] > 1:
+            recommendations.append(
+                f"You keep coming back to {top['destination']} ({top['count']} trips); "
+                f"ask the assistant for places with a similar feel."
+            )
+        if patterns['preferred_trip_types']:
+            recommendations.append(
+                f"Most of your trips are {patterns['preferred_trip_types'][0]} trips; "
+                f"we'll prioritise those in suggestions."
+            )
+        if patterns['budget_percentiles']['p50']:
+            recommendations.append(
+                f"Your typical trip budget is around {patterns['budget_percentiles']['p50']:,.0f}; "
+                f"new plans are sized to match."
+            )
+        if patterns['spend_by_category']:
+            biggest = patterns['spend_by_category'][0]
+            recommendations.append(
+                f"{(biggest['category'] or 'Uncategorized').title()} is your largest expense "
+                f"({biggest['total']:,.0f} {biggest['currency']}); set a per-day limit to keep it in check."
+            )
+        if not recommendations:
+            recommendations.append("Plan your first trip to start getting personalised recommendations.")
+        return recommendations[:3]
+
+travel_analytics = TravelAnalytics()
+
+# Trip and expense mapper events collect per-user deltas on the session; the
+# commit applies them to user_travel_stats in the same transaction. Bulk
+# operations that bypass the ORM skip the events; the nightly batch repairs.
+_PENDING_DELTAS = 'travel_stats_deltas'
+_DELETED_USERS = 'travel_stats_deleted_users'
+
+def _values(obj, columns) -> Dict[str, Any]:
+    return {name: getattr(obj, name) for name in columns}
+
+def _previous_values(obj, columns, current) -> Dict[str, Any]:
+    state = inspect(obj)
+    previous = dict(current)
+    for name in columns:
+        history = state.attrs[name].history
+        if history.deleted:
+            previous[name] = history.deleted[0]
+    return previous
+
+def _record(obj, values, sign):
+    session = object_session(obj)
+    if session is None or values['user_id'] is None:
+        return
+    deltas = session.info.setdefault(_PENDING_DELTAS, {})
+    delta = deltas.get(values['user_id'])
+    if delta is None:
+        delta = deltas[values['user_id']] = _StatsDelta()
+    if isinstance(obj, Trip):
+        delta.add_trip(values, sign)
+    else:
+        delta.add_expense(values, sign)
+
+def _columns(obj):
+    return TRIP_COLUMNS if isinstance(obj, Trip) else EXPENSE_COLUMNS
+
+def _on_insert(mapper, connection, obj):
+    _record(obj, _values(obj, _columns(obj)), 1)
+
+def _on_delete(mapper, connection, obj):
+    _record(obj, _values(obj, _columns(obj)), -1)
+
+def _on_update(mapper, connection, obj):
+    columns = _columns(obj)
+    current = _values(obj, columns)
+    previous = _previous_values(obj, columns, current)
+    if previous != current:
+        _record(obj, previous, -1)
+        _record(obj, current, 1)
+
+for _model in (Trip, Expense):
+    event.listen(_model, 'after_insert', _on_insert)
+    event.listen(_model, 'after_delete', _on_delete)
+    event.listen(_model, 'after_update', _on_update)
+
+@event.listens_for(User, 'after_delete')
+def _collect_deleted_user(mapper, connection, user):
+    session = object_session(user)
+    if session is not None:
+        session.info.setdefault(_DELETED_USERS, set()).add(user.id)
+
+@event.listens_for(RoutingSession, 'before_commit')
+def _apply_pending_deltas(session):
+    session.flush()
+    deltas = session.info.pop(_PENDING_DELTAS, None) or {}
+    deleted = session.info.pop(_DELETED_USERS, None) or set()
+    if deleted:
+        travel_analytics.forget_users(deleted, session.connection())
+    deltas = {user_id: delta for user_id, delta in deltas.items() if user_id not in deleted}
+    if deltas:
+        travel_analytics.apply_deltas(deltas, session.connection())
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_pending_deltas(session):
+    session.info.pop(_PENDING_DELTAS, None)
+    session.info.pop(_DELETED_USERS, None)
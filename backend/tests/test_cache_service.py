@@ -0,0 +1,89 @@
+"""
+Unit tests for tag-based cache invalidation
+"""
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.services.cache_service import CacheService, user_tag, trip_tag
+
+class TestCacheTags(unittest.TestCase):
+    def setUp(self):
+        """Use an isolated file-backed cache"""
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = CacheService(cache_dir=self.cache_dir)
+        self.cache.use_redis = False
+        self.cache.redis_client = None
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_invalidate_user_tag(self):
+        """Entries tagged for a user are dropped, others survive"""
+        self.cache.set('trips_42', ['a'], tags=[user_tag(42)])
+        self.cache.set('trips_7', ['b'], tags=[user_tag(7)])
+
+        removed = self.cache.invalidate_tags(user_tag(42))
+
+        self.assertEqual(removed, 1)
+        self.assertIsNone(self.cache.get('trips_42'))
+        self.assertEqual(self.cache.get('trips_7'), ['b'])
+
+    def test_entry_with_multiple_tags(self):
+        """Invalidating any tag of an entry removes it"""
+        self.cache.set('trip_17_report', {'total': 10}, tags=[user_tag(42), trip_tag(17)])
+
+        self.cache.invalidate_tags(trip_tag(17))
+
+        self.assertIsNone(self.cache.get('trip_17_report'))
+        # The user tag still points at the removed key, which is harmless
+        self.assertEqual(self.cache.invalidate_tags(user_tag(42)), 1)
+
+    def test_invalidate_user_with_trip(self):
+        """invalidate_user covers both the user and trip tags"""
+        self.cache.set('profile_42', {'id': 42}, tags=[user_tag(42)])
+        self.cache.set('trip_3', {'id': 3}, tags=[trip_tag(3)])
+
+        self.cache.invalidate_user(42, trip_id=3)
+
+        self.assertIsNone(self.cache.get('profile_42'))
+        self.assertIsNone(self.cache.get('trip_3'))
+
+    def test_shared_index_across_instances(self):
+        """A second worker sharing the cache dir can invalidate the first worker's entries"""
+        other = CacheService(cache_dir=self.cache_dir)
+        other.use_redis = False
+        self.cache.set('expenses_42', [1, 2], tags=[user_tag(42)])
+
+        other.invalidate_tags(user_tag(42))
+
+        self.assertIsNone(self.cache.get('expenses_42'))
+
+    def test_file_names_are_portable(self):
+        """Keys with ':' are stored under hashed file names valid on every platform"""
+        self.cache.set('http_response:abc', {'body': '{}'}, tags=[user_tag(42)])
+        self.assertEqual(self.cache.get('http_response:abc'), {'body': '{}'})
+        self.assertFalse([name for name in os.listdir(self.cache_dir) if ':' in name])
+        self.cache.invalidate_user(42)
+        self.assertIsNone(self.cache.get('http_response:abc'))
+
+    def test_tag_version_changes_on_invalidate(self):
+        """Version tokens are stable until the tag is invalidated"""
+        first = self.cache.get_tag_version(user_tag(42))
+        self.assertEqual(self.cache.get_tag_version(user_tag(42)), first)
+
+        self.cache.invalidate_user(42)
+
+        self.assertNotEqual(self.cache.get_tag_version(user_tag(42)), first)
+
+    def test_unknown_tag(self):
+        """Invalidating a tag with no entries is a no-op"""
+        self.assertEqual(self.cache.invalidate_tags(user_tag(999)), 0)
+
+if __name__ == '__main__':
+    unittest.main()
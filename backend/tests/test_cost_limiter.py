@@ -0,0 +1,125 @@
+"""
+Unit tests for the token-budget decorator on AI endpoints
+"""
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+from backend.services.ai.llm_provider import record_token_usage
+from backend.utils import cost_limiter
+from backend.utils.cost_limiter import cost_limit, fixed_cost, get_budget, resolve_tier
+from backend.utils.rate_limiter import RateLimiter, SlidingWindowLimiter, TokenBucketLimiter
+
+BUDGETS = {'free': {'default': 3600, 'ai.upload': 7200}, 'pro': {'default': 36000}}
+
+class TestCostLimit(unittest.TestCase):
+    def setUp(self):
+        self.buckets = TokenBucketLimiter()
+        for target, value in (
+            ('rate_limiter', RateLimiter(engine=SlidingWindowLimiter(), buckets=self.buckets)),
+            ('AI_TOKEN_BUDGETS', BUDGETS),
+            ('PRO_USER_IDS', {'9'}),
+        ):
+            patcher = patch.object(cost_limiter, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Frozen clock: no refill between requests
+        clock = patch('backend.utils.rate_limiter.time.time', return_value=1000.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+        self.reported = []
+        app = Flask(__name__)
+        app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-sufficient-length'
+        JWTManager(app)
+
+        @app.route('/chat', endpoint='ai.chat', methods=['POST'])
+        @jwt_required()
+        @cost_limit(fixed_cost(1000))
+        def chat():
+            for tokens in self.reported:
+                record_token_usage(tokens)
+            return jsonify({'ok': True})
+
+        @app.route('/upload', endpoint='ai.upload', methods=['POST'])
+        @jwt_required()
+        @cost_limit(fixed_cost(1000))
+        async def upload():
+            for tokens in self.reported:
+                record_token_usage(tokens)
+            return jsonify({'ok': True})
+
+        with app.app_context():
+            self.headers = {'Authorization': f"Bearer {create_access_token(identity='7')}"}
+            self.pro_headers = {'Authorization': f"Bearer {create_access_token(identity='9')}"}
+        self.client = app.test_client()
+
+    def _tokens(self, key):
+        return self.buckets.states[key].tokens
+
+    def test_debit_then_reject(self):
+        """The estimate is charged up front and an empty bucket answers 429 without running the view"""
+        self.reported = [1000]
+        statuses = [self.client.post('/chat', headers=self.headers).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(self._tokens('ai.chat:user_7'), 600)
+
+    def test_reconciled_to_reported_usage(self):
+        """The difference between reported tokens and the estimate is refunded or charged"""
+        self.reported = [150, 50]
+        self.client.post('/chat', headers=self.headers)
+        self.assertEqual(self._tokens('ai.chat:user_7'), 3400)
+
+        self.reported = [1500]
+        self.client.post('/chat', headers=self.headers)
+        self.assertEqual(self._tokens('ai.chat:user_7'), 1900)
+
+    def test_no_usage_is_refunded(self):
+        """A call that reports no usage costs nothing"""
+        self.client.post('/chat', headers=self.headers)
+        self.assertEqual(self._tokens('ai.chat:user_7'), 3600)
+
+    def test_async_view(self):
+        """Async views are debited and reconciled the same way, under their endpoint budget"""
+        self.reported = [400]
+        response = self.client.post('/upload', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._tokens('ai.upload:user_7'), 6800)
+
+    def test_tier_budget(self):
+        """Pro users are charged against the pro budget under their own key"""
+        self.reported = [1000]
+        self.client.post('/chat', headers=self.pro_headers)
+        self.assertEqual(self._tokens('ai.chat:user_9'), 35000)
+        self.assertNotIn('ai.chat:user_7', self.buckets.states)
+
+class TestBudgets(unittest.TestCase):
+    def test_resolution(self):
+        """Endpoint budgets fall back to the tier default, and unknown tiers to free"""
+        with patch.object(cost_limiter, 'AI_TOKEN_BUDGETS', BUDGETS), \
+                patch.object(cost_limiter, 'PRO_USER_IDS', {'9'}):
+            self.assertEqual(resolve_tier(9), 'pro')
+            self.assertEqual(resolve_tier('7'), 'free')
+            self.assertEqual(get_budget('free', 'ai.upload'), 7200)
+            self.assertEqual(get_budget('free', 'ai.chat'), 3600)
+            self.assertEqual(get_budget('enterprise', 'ai.chat'), 3600)
+
+    def test_env_override(self):
+        """AI_TOKEN_BUDGETS merges into the defaults; invalid JSON is ignored"""
+        with patch.dict(os.environ, {'AI_TOKEN_BUDGETS': '{"free": {"default": 30000}, "team": {"default": 5}}'}):
+            budgets = cost_limiter._load_budgets()
+        self.assertEqual(budgets['free']['default'], 30000)
+        self.assertEqual(budgets['free']['ai.analyze_file'], 150000)
+        self.assertEqual(budgets['team'], {'default': 5})
+
+        with patch.dict(os.environ, {'AI_TOKEN_BUDGETS': 'not json'}):
+            self.assertEqual(cost_limiter._load_budgets(), cost_limiter.DEFAULT_AI_TOKEN_BUDGETS)
+
+if __name__ == '__main__':
+    unittest.main()
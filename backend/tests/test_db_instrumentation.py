@@ -0,0 +1,64 @@
+"""
+Unit tests for SQL query instrumentation
+"""
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from sqlalchemy import text
+from backend.extensions import db
+from backend.utils.db_instrumentation import fingerprint, init_db_instrumentation, QueryStats
+
+class TestFingerprint(unittest.TestCase):
+    def test_literals_are_stripped(self):
+        """Statements differing only in literals share a fingerprint"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM trips WHERE user_id = 7 AND name = 'Paris'"),
+            fingerprint("SELECT * FROM trips  WHERE user_id = 42 AND name = 'O''Hare'")
+        )
+
+    def test_in_lists_collapse(self):
+        """IN lists of any length normalize to one shape"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (?, ?)"),
+            fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?, ?)")
+        )
+
+    def test_repeated_statement_flags_request(self):
+        """One statement shape repeated past the threshold marks the request"""
+        stats = QueryStats()
+        for conversation_id in range(12):
+            stats.record(f"SELECT * FROM chat_messages WHERE conversation_id = '{conversation_id}'", 0.001)
+        self.assertTrue(stats.is_query_heavy())
+        self.assertEqual(stats.most_repeated()[1], 12)
+
+class TestRequestStats(unittest.TestCase):
+    def setUp(self):
+        os.environ['SQL_DEBUG_HEADERS'] = '1'
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        init_db_instrumentation(self.app)
+
+        @self.app.route('/three')
+        def three():
+            for _ in range(3):
+                db.session.execute(text('SELECT 1'))
+            return 'ok'
+
+    def tearDown(self):
+        os.environ.pop('SQL_DEBUG_HEADERS', None)
+
+    def test_query_count_header(self):
+        """Each request reports only its own statements"""
+        client = self.app.test_client()
+        self.assertEqual(client.get('/three').headers['X-DB-Query-Count'], '3')
+        self.assertEqual(client.get('/three').headers['X-DB-Query-Count'], '3')
+        self.assertIn('db;dur=', client.get('/three').headers['Server-Timing'])
+
+if __name__ == '__main__':
+    unittest.main()
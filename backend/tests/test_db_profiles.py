@@ -0,0 +1,56 @@
+"""
+Unit tests for database engine profiles
+"""
+import unittest
+import sys
+import os
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from sqlalchemy import text
+from backend.extensions import db
+from backend.utils.db_profiles import engine_options, init_db_profile
+
+class TestSqliteProfile(unittest.TestCase):
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        uri = f"sqlite:///{os.path.join(self.scratch.name, 'profile.db')}"
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = uri
+        self.app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+        db.init_app(self.app)
+        init_db_profile(self.app)
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.engine.dispose()
+        self.scratch.cleanup()
+
+    def test_memory_database_keeps_default_pool(self):
+        """In-memory databases get no pool sizing or WAL"""
+        self.assertNotIn('poolclass', engine_options('sqlite://'))
+
+    def test_pragmas_applied_on_connect(self):
+        """Every pooled connection runs in WAL with the tuned pragmas"""
+        with self.app.app_context():
+            pragma = lambda name: db.session.execute(text(f"PRAGMA {name}")).scalar()
+            self.assertEqual(pragma('journal_mode'), 'wal')
+            self.assertEqual(pragma('synchronous'), 1)
+            self.assertEqual(pragma('temp_store'), 2)
+            self.assertGreater(pragma('busy_timeout'), 0)
+
+    def test_maintenance_checkpoints_wal(self):
+        """A maintenance pass checkpoints the pages written so far"""
+        with self.app.app_context():
+            db.session.execute(text("CREATE TABLE t (x INTEGER)"))
+            db.session.execute(text("INSERT INTO t VALUES (1)"))
+            db.session.commit()
+            result = self.app.extensions['sqlite_maintenance'].run_once()
+        self.assertEqual(result['mode'], 'PASSIVE')
+        self.assertEqual(result['wal_pages'], result['checkpointed'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Unit tests for read-replica routing
+"""
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from backend.extensions import db
+from backend.models.expense import Expense
+import backend.models.user  # noqa: F401  users table for the foreign keys
+from backend.utils.db_profiles import engine_options, _postgres_options
+from backend.services.cache_service import cache_service
+from backend.utils.db_routing import REPLICA_BIND, replica_reads, mark_user_write
+
+class TestReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        # Two SQLite files stand in for the primary and the replica; each gets
+        # a differently described row so a read shows where it went
+        self.scratch = tempfile.TemporaryDirectory()
+        # Stickiness markers go to a scratch file cache, not backend/cache
+        for attr in ('cache_dir', 'tags_dir', 'versions_dir'):
+            patcher = patch.object(cache_service, attr, self.scratch.name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(self.scratch.name, 'primary.db')}"
+        self.app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: f"sqlite:///{os.path.join(self.scratch.name, 'replica.db')}"
+        }
+        db.init_app(self.app)
+        with self.app.app_context():
+            for name, engine in db.engines.items():
+                db.metadata.create_all(engine)
+                with engine.begin() as conn:
+                    conn.execute(Expense.__table__.insert(), {
+                        'user_id': 1, 'amount': 1.0, 'category': 'food', 'description': name or 'primary'
+                    })
+
+    def tearDown(self):
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        # init_app registers a metadata per bind on the shared db object
+        db.metadatas.pop(REPLICA_BIND, None)
+        self.scratch.cleanup()
+
+    def _read(self):
+        return [e.description for e in Expense.query.all()]
+
+    def test_reads_default_to_primary(self):
+        """Outside replica_reads() everything uses the primary"""
+        with self.app.app_context():
+            self.assertEqual(self._read(), ['primary'])
+
+    def test_replica_reads(self):
+        """Reads inside replica_reads() go to the replica bind"""
+        with self.app.app_context():
+            with replica_reads():
+                self.assertEqual(self._read(), [REPLICA_BIND])
+
+    def test_reads_after_write_stay_on_primary(self):
+        """Once the session has flushed, its reads see its own writes"""
+        with self.app.app_context():
+            with replica_reads():
+                db.session.add(Expense(user_id=1, amount=2.0, category='food', description='new'))
+                db.session.commit()
+                self.assertEqual(sorted(self._read()), ['new', 'primary'])
+
+    def test_sticky_user_reads_primary(self):
+        """A user who wrote recently reads from the primary in later requests"""
+        mark_user_write(9001)
+        with self.app.app_context():
+            with replica_reads(user_id=9001):
+                self.assertEqual(self._read(), ['primary'])
+            with replica_reads(user_id=9002):
+                self.assertEqual(self._read(), [REPLICA_BIND])
+
+class TestWithoutReplica(unittest.TestCase):
+    def test_no_stickiness_lookup(self):
+        """Without a replica bind, replica_reads() never consults the cache"""
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(app)
+        with app.app_context(), patch('backend.utils.db_routing.is_sticky') as is_sticky:
+            with replica_reads(user_id=9001):
+                pass
+        is_sticky.assert_not_called()
+
+class TestPostgresProfile(unittest.TestCase):
+    def test_pool_and_timeouts(self):
+        """Postgres engines get a sized, pre-pinged pool and a statement timeout"""
+        options = engine_options('postgresql://u:p@db/roamiq')
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertIn('statement_timeout', options['connect_args']['options'])
+        self.assertNotIn('prepare_threshold', options['connect_args'])
+
+    def test_replica_is_read_only(self):
+        """The replica connection refuses writes at the server"""
+        options = _postgres_options('postgresql+psycopg://u:p@replica/roamiq', read_only=True)
+        self.assertIn('default_transaction_read_only=on', options['connect_args']['options'])
+        self.assertIn('prepare_threshold', options['connect_args'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Unit tests for expense rollups and the per-trip totals table
+"""
+import unittest
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from backend.extensions import db
+from backend.models.expense import Expense
+from backend.models.trip import Trip
+from backend.models.trip_expense_total import TripExpenseTotal
+from backend.services.expense_service import expense_service
+from backend.services.fx_service import fx_service
+
+class TestExpenseRollups(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        # 1 EUR = 2 USD keeps the converted figures readable
+        fx_service.load_snapshot({'base': 'USD', 'date': '2026-01-01', 'rates': {'EUR': 0.5, 'INR': 80}}, 'test')
+        start = date.today() - timedelta(days=3)
+        self.trip = Trip(user_id=1, title='Lisbon', destination='Portugal', budget=500.0,
+                         start_date=start, end_date=start + timedelta(days=9))
+        db.session.add(self.trip)
+        db.session.commit()
+        day = datetime.combine(start, datetime.min.time())
+        for offset, amount, category, currency in (
+            (0, 40.0, 'food', 'EUR'), (0, 60.0, 'transport', 'EUR'),
+            (1, 25.5, 'food', 'EUR'), (3, 100.0, 'stay', 'USD'),
+        ):
+            db.session.add(Expense(user_id=1, trip_id=self.trip.id, amount=amount, category=category,
+                                   currency=currency, date=day + timedelta(days=offset, hours=12)))
+        db.session.add(Expense(user_id=1, trip_id=None, amount=9.0, category='food', currency='EUR', date=day))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+
+    def _totals(self):
+        return {(t.category, t.currency): (round(t.total, 2), t.expense_count) for t in TripExpenseTotal.query.all()}
+
+    def test_totals_follow_inserts_updates_and_deletes(self):
+        """The totals table tracks ORM writes and matches a full rebuild"""
+        self.assertEqual(self._totals()[('food', 'EUR')], (65.5, 2))
+
+        expense = Expense.query.filter_by(category='transport').first()
+        expense.category = 'food'
+        db.session.commit()
+        self.assertEqual(self._totals()[('food', 'EUR')], (125.5, 3))
+        self.assertNotIn(('transport', 'EUR'), self._totals())
+
+        db.session.delete(Expense.query.filter_by(currency='USD').first())
+        db.session.commit()
+        self.assertNotIn(('stay', 'USD'), self._totals())
+
+        maintained = self._totals()
+        TripExpenseTotal.rebuild()
+        self.assertEqual(self._totals(), maintained)
+
+    def test_totals_table_matches_group_by(self):
+        """Per-trip rollups from the totals table equal the GROUP BY over expenses"""
+        from_totals = expense_service.summarize(1, 'category', trip_id=self.trip.id)
+        from_expenses = expense_service.summarize(1, 'category', trip_id=self.trip.id, start='2000-01-01')
+        self.assertEqual(from_totals, from_expenses)
+        self.assertEqual(from_totals['totals'], [
+            {'currency': 'EUR', 'total': 125.5, 'count': 3},
+            {'currency': 'USD', 'total': 100.0, 'count': 1},
+        ])
+
+    def test_group_by_day_with_range(self):
+        """Day groups respect the inclusive date range"""
+        first = (date.today() - timedelta(days=3)).isoformat()
+        summary = expense_service.summarize(1, 'day', start=first, end=first)
+        self.assertEqual(summary['groups'], [{'currency': 'EUR', 'total': 109.0, 'count': 3, 'day': first}])
+
+    def test_group_by_trip(self):
+        """Trip groups carry the trip title and budget and skip unassigned expenses"""
+        groups = expense_service.summarize(1, 'trip')['groups']
+        self.assertEqual({(g['title'], g['currency']) for g in groups}, {('Lisbon', 'EUR'), ('Lisbon', 'USD')})
+        self.assertEqual(expense_service.summarize(2, 'trip')['groups'], [])
+
+    def test_deleted_trip_drops_its_totals(self):
+        """Totals rows go with their trip even without foreign key enforcement"""
+        db.session.delete(self.trip)
+        db.session.commit()
+        self.assertEqual(TripExpenseTotal.query.count(), 0)
+
+    def test_invalid_arguments(self):
+        """Unknown groupings and malformed dates are rejected"""
+        with self.assertRaises(ValueError):
+            expense_service.summarize(1, 'weekday')
+        with self.assertRaises(ValueError):
+            expense_service.summarize(1, 'day', start='last week')
+
+    def test_converted_summary(self):
+        """With a target currency each group folds its currencies into one converted total"""
+        summary = expense_service.summarize(1, 'category', trip_id=self.trip.id, currency='usd')
+        self.assertEqual(summary['currency'], 'USD')
+        self.assertEqual(summary['rates_as_of'], '2026-01-01')
+        self.assertEqual(summary['totals'], [{'currency': 'USD', 'total': 351.0, 'count': 4}])
+        in_inr = expense_service.summarize(1, 'trip', currency='INR')
+        self.assertEqual(in_inr['groups'][0]['total'], 351.0 * 80)
+        with self.assertRaises(ValueError):
+            expense_service.summarize(1, 'category', currency='XYZ')
+
+    def test_trip_budget(self):
+        """Budget vs actual in one currency, with a running daily total and burn rate"""
+        budget = expense_service.trip_budget(1, self.trip.id, currency='USD')
+        self.assertEqual(budget['spent'], 351.0)
+        self.assertEqual(budget['remaining'], 149.0)
+        self.assertEqual(budget['days_elapsed'], 4)
+        self.assertEqual(budget['burn_rate'], round(351.0 / 4, 2))
+        self.assertEqual(budget['days_total'], 10)
+        self.assertEqual([d['cumulative'] for d in budget['daily']], [200.0, 251.0, 351.0])
+        self.assertIsNone(expense_service.trip_budget(2, self.trip.id))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for FX rate snapshots and conversion
+"""
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from backend.extensions import db
+from backend.models.fx_rate import FxRate
+from backend.services.cache_service import cache_service
+from backend.services.fx_service import fx_service, RateMatrix, UnknownCurrency, FX_RATES_TAG
+
+class TestRateMatrix(unittest.TestCase):
+    def setUp(self):
+        self.matrix = RateMatrix({'USD': 1.0, 'EUR': 0.5, 'INR': 80.0})
+
+    def test_cross_rates(self):
+        """Cross rates go through the USD quotes"""
+        self.assertEqual(self.matrix.rate('EUR', 'INR'), 160.0)
+        self.assertEqual(self.matrix.convert(10, 'INR', 'USD'), 0.125)
+        self.assertEqual(self.matrix.rate('EUR', 'EUR'), 1.0)
+
+    def test_convert_many(self):
+        """Bulk conversion matches converting each amount on its own"""
+        amounts, currencies = [10.0, 20.0, 160.0, 0.0], ['EUR', 'USD', 'INR', 'EUR']
+        self.assertEqual(self.matrix.convert_many(amounts, currencies, 'USD'), [20.0, 20.0, 2.0, 0.0])
+        self.assertEqual(self.matrix.convert_many([], [], 'USD'), [])
+
+    def test_unknown_currency(self):
+        """Missing rates raise a ValueError naming the currency"""
+        with self.assertRaises(UnknownCurrency) as raised:
+            self.matrix.convert_many([1.0], ['XYZ'], 'USD')
+        self.assertEqual(raised.exception.currency, 'XYZ')
+
+class TestFxSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(self.scratch.cleanup)
+        for attr in ('cache_dir', 'tags_dir', 'versions_dir'):
+            patcher = patch.object(cache_service, attr, self.scratch.name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        fx_service.invalidate()
+
+    def tearDown(self):
+        fx_service.invalidate()
+        db.session.remove()
+        self.ctx.pop()
+
+    def test_empty_table_is_not_seeded_on_read(self):
+        """Without a snapshot the matrix is empty, nothing is written and amounts stay unconverted"""
+        matrix = fx_service.matrix()
+        self.assertNotIn('USD', matrix)
+        self.assertEqual(FxRate.query.count(), 0)
+        groups = [{'currency': 'EUR', 'total': 10.0, 'count': 1}]
+        self.assertEqual(matrix.convert_groups(groups, 'USD'), ([], groups))
+        self.assertEqual(matrix.to_dict()['rates'], {})
+
+    def test_latest_rate_per_currency(self):
+        """Each currency uses its latest snapshot on or before the requested date"""
+        fx_service.load_snapshot({'base': 'EUR', 'date': '2026-01-01', 'rates': {'USD': 2.0, 'GBP': 1.0}}, 'test')
+        fx_service.load_snapshot({'base': 'USD', 'date': '2026-02-01', 'rates': {'GBP': 0.25}}, 'test')
+        self.assertEqual(fx_service.matrix().rate('USD', 'EUR'), 0.5)
+        self.assertEqual(fx_service.matrix().rate('USD', 'GBP'), 0.25)
+        self.assertEqual(fx_service.matrix().as_of, date(2026, 2, 1))
+        self.assertEqual(fx_service.matrix(as_of=date(2026, 1, 15)).rate('USD', 'GBP'), 0.5)
+
+    def test_snapshot_from_another_worker(self):
+        """A snapshot loaded elsewhere changes the version and replaces the cached matrix"""
+        fx_service.load_snapshot({'base': 'USD', 'date': '2026-01-01', 'rates': {'EUR': 0.5}}, 'test')
+        version = fx_service.version()
+        self.assertEqual(fx_service.matrix().rate('USD', 'EUR'), 0.5)
+
+        # Rows written and the tag bumped by some other process
+        db.session.add_all([FxRate(snapshot_date=date(2026, 3, 1), currency=code, per_usd=rate, source='test')
+                            for code, rate in (('USD', 1.0), ('EUR', 0.25))])
+        db.session.commit()
+        self.assertEqual(fx_service.matrix().rate('USD', 'EUR'), 0.5)
+        cache_service.bump_tag_version(FX_RATES_TAG)
+
+        self.assertNotEqual(fx_service.version(), version)
+        self.assertEqual(fx_service.matrix().rate('USD', 'EUR'), 0.25)
+
+    def test_snapshot_requires_usd(self):
+        """A snapshot without a USD quote cannot be placed on the common base"""
+        with self.assertRaises(ValueError):
+            fx_service.load_snapshot({'base': 'EUR', 'date': '2026-01-01', 'rates': {'GBP': 0.8}}, 'test')
+
+if __name__ == '__main__':
+    unittest.main()
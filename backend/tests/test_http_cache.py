@@ -0,0 +1,90 @@
+"""
+Unit tests for conditional GET caching
+"""
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, jwt_required
+from backend.extensions import db
+from backend.models.trip import Trip
+from backend.services.cache_service import cache_service
+from backend.utils.http_cache import conditional_cache
+from backend.utils.pagination import KeysetPage
+
+class TestConditionalCache(unittest.TestCase):
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(self.scratch.cleanup)
+        for attr in ('cache_dir', 'tags_dir', 'versions_dir'):
+            patcher = patch.object(cache_service, attr, self.scratch.name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.day = '2026-10-19'
+        self.calls = 0
+        app = Flask(__name__)
+        app.config['JWT_SECRET_KEY'] = 'test-secret'
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        JWTManager(app)
+        db.init_app(app)
+
+        @app.route('/budget')
+        @jwt_required()
+        @conditional_cache(vary=lambda: self.day)
+        def budget():
+            self.calls += 1
+            return jsonify({'day': self.day})
+
+        @app.route('/trips')
+        @jwt_required()
+        @conditional_cache()
+        def trips():
+            self.calls += 1
+            page = KeysetPage(Trip, (Trip.created_at, Trip.id), serializer=Trip.to_summary_dict)
+            rows = page.fetch(Trip.query.filter_by(user_id=int(get_jwt_identity())))
+            return page.add_cursor(jsonify({'trips': [page.serialize(row) for row in rows]}))
+
+        with app.app_context():
+            db.create_all()
+            db.session.add_all(Trip(user_id=7, title=f'Trip {i}', destination='Lisbon') for i in range(3))
+            db.session.commit()
+            self.headers = {'Authorization': f"Bearer {create_access_token(identity='7')}"}
+        self.client = app.test_client()
+
+    def test_etag_and_cached_body(self):
+        """A repeat GET is served from the cache, and a matching If-None-Match gets a 304"""
+        first = self.client.get('/budget', headers=self.headers)
+        second = self.client.get('/budget', headers=self.headers)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.json, {'day': self.day})
+        revalidated = self.client.get('/budget', headers={**self.headers, 'If-None-Match': first.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_vary_changes_etag(self):
+        """When the vary value moves on, old ETags and bodies no longer match"""
+        etag = self.client.get('/budget', headers=self.headers).headers['ETag']
+        self.day = '2026-10-20'
+        response = self.client.get('/budget', headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'day': '2026-10-20'})
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.calls, 2)
+
+    def test_cached_page_keeps_cursor(self):
+        """A page served from the cache still carries X-Next-Cursor"""
+        first = self.client.get('/trips?limit=2', headers=self.headers)
+        second = self.client.get('/trips?limit=2', headers=self.headers)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(first.headers.get('X-Next-Cursor'))
+        self.assertEqual(second.headers.get('X-Next-Cursor'), first.headers['X-Next-Cursor'])
+        self.assertEqual(second.json, first.json)
+
+if __name__ == '__main__':
+    unittest.main()
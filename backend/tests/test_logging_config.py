@@ -0,0 +1,75 @@
+"""
+Unit tests for the logging pipeline filters and formatter
+"""
+import unittest
+import logging
+import json
+import queue
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from unittest.mock import patch
+from backend.utils.logging_config import JsonFormatter, RateLimitFilter, DebugSamplingFilter, _ContextQueueHandler
+
+def _record(level=logging.ERROR, msg="Chat route error: %s", args=("timeout",), lineno=72):
+    return logging.LogRecord('backend.routes.ai_routes', level, 'ai_routes.py', lineno, msg, args, None)
+
+class TestRateLimitFilter(unittest.TestCase):
+    def test_repeats_suppressed_then_counted(self):
+        """Repeats past the burst are dropped and reported on the next window"""
+        limiter = RateLimitFilter(burst=2, period=60)
+        with patch('backend.utils.logging_config.time.monotonic', return_value=100.0):
+            passed = [limiter.filter(_record(args=(f"err {i}",))) for i in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+
+        with patch('backend.utils.logging_config.time.monotonic', return_value=161.0):
+            record = _record()
+            self.assertTrue(limiter.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_call_sites_limited_separately(self):
+        """Different call sites do not share a budget"""
+        limiter = RateLimitFilter(burst=1, period=60)
+        self.assertTrue(limiter.filter(_record(lineno=72)))
+        self.assertTrue(limiter.filter(_record(lineno=93)))
+        self.assertFalse(limiter.filter(_record(lineno=72)))
+
+    def test_info_not_limited(self):
+        """Only warnings and errors are rate limited"""
+        limiter = RateLimitFilter(burst=1, period=60)
+        self.assertTrue(all(limiter.filter(_record(level=logging.INFO)) for _ in range(10)))
+
+class TestDebugSampling(unittest.TestCase):
+    def test_only_debug_sampled(self):
+        """With a zero rate DEBUG is dropped and INFO kept"""
+        sampler = DebugSamplingFilter(0.0)
+        self.assertFalse(sampler.filter(_record(level=logging.DEBUG)))
+        self.assertTrue(sampler.filter(_record(level=logging.INFO)))
+
+class TestContextQueueHandler(unittest.TestCase):
+    def test_arguments_merged_before_enqueue(self):
+        """The queued message keeps the argument values from the time of the call"""
+        log_queue = queue.Queue()
+        handler = _ContextQueueHandler(log_queue)
+        trip = {'status': 'planned'}
+        handler.handle(_record(msg="Trip state: %s", args=(trip,)))
+        trip['status'] = 'cancelled'
+        record = log_queue.get_nowait()
+        self.assertEqual(record.getMessage(), "Trip state: {'status': 'planned'}")
+        self.assertIsNone(record.args)
+
+class TestJsonFormatter(unittest.TestCase):
+    def test_structured_fields(self):
+        """Arguments are merged at format time and context fields are included"""
+        record = _record()
+        record.trace_id = 'abc123'
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry['message'], 'Chat route error: timeout')
+        self.assertEqual(entry['level'], 'ERROR')
+        self.assertEqual(entry['trace_id'], 'abc123')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Unit tests for the migration manager
+"""
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+
+# Add project root to path
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy import create_engine
+from backend.extensions import db
+from backend.migrations.migration_manager import MigrationManager
+import backend.models  # noqa: F401  registers every model on db.metadata
+import backend.models.expense  # noqa: F401
+import backend.models.fx_rate  # noqa: F401
+import backend.models.user_travel_stats  # noqa: F401
+
+class TestMigrationManager(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(PROJECT_ROOT)
+        self.scratch = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.scratch.name, 'roamiq.db')
+        db.metadata.create_all(create_engine(f"sqlite:///{self.path}"))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.scratch.cleanup()
+
+    def test_migrate_sqlite(self):
+        """Every migration applies through DBAPI cursors and is recorded once"""
+        manager = MigrationManager(self.path, database_url='')
+        pending = manager.get_pending_migrations()
+        self.assertTrue(pending)
+        manager.migrate()
+        self.assertEqual(manager.get_pending_migrations(), [])
+        with sqlite3.connect(self.path) as conn:
+            applied = [row[0] for row in conn.execute("SELECT version FROM migrations ORDER BY id")]
+        self.assertEqual(applied, pending)
+        with sqlite3.connect(self.path) as conn:
+            rates = dict(conn.execute("SELECT currency, per_usd FROM fx_rates"))
+        self.assertEqual(rates['USD'], 1.0)
+        self.assertIn('INR', rates)
+
+        manager.rollback_migration(pending[-1])
+        self.assertEqual(manager.get_pending_migrations(), pending[-1:])
+
+    def test_sqlite_database_url_uses_db_path(self):
+        """A sqlite DATABASE_URL keeps the file-based connection and qmark parameters"""
+        manager = MigrationManager(self.path, database_url=f"sqlite:///{self.path}")
+        self.assertIsNone(manager.database_url)
+        self.assertEqual(manager.param, '?')
+
+if __name__ == '__main__':
+    unittest.main()
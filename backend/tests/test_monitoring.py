@@ -0,0 +1,210 @@
+"""
+Unit tests for monitoring
+"""
+import unittest
+import asyncio
+import threading
+import time
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from backend.utils.monitoring import SystemSampler
+from backend.utils.loop_monitor import LoopLagMonitor
+from backend.services.cache_service import CacheService, cache_service
+from backend.utils.profiler import (
+    SamplingProfiler, ProfilerBusy, to_collapsed, to_speedscope, init_request_profiling, get_request_profile
+)
+
+class TestSystemSampler(unittest.TestCase):
+    def setUp(self):
+        self.sampler = SystemSampler(interval=3600)
+
+    def tearDown(self):
+        self.sampler.stop()
+
+    def test_snapshot_published_on_start(self):
+        """Starting the sampler publishes a complete snapshot immediately"""
+        self.sampler.ensure_started()
+        snapshot = self.sampler.snapshot
+        for key in ('cpu_percent', 'memory_percent', 'disk_percent', 'process', 'gc'):
+            self.assertIn(key, snapshot)
+        self.assertGreater(snapshot['process']['rss_bytes'], 0)
+        self.assertEqual(len(snapshot['gc']['collections']), 3)
+
+    def test_snapshot_is_replaced_not_mutated(self):
+        """Readers holding an old snapshot keep a consistent view"""
+        self.sampler.ensure_started()
+        held = self.sampler.snapshot
+        self.sampler.sample()
+        self.assertIsNot(self.sampler.snapshot, held)
+
+    def test_started_once_per_process(self):
+        """Repeated calls reuse the running sampler thread"""
+        self.sampler.ensure_started()
+        thread = self.sampler._thread
+        self.sampler.ensure_started()
+        self.assertIs(self.sampler._thread, thread)
+
+def _blocking_lookup():
+    time.sleep(0.3)
+
+class TestLoopLagMonitor(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.monitor = LoopLagMonitor(interval=0.02, threshold=0.05)
+        self.monitor.install(self.app)
+
+        @self.app.route('/blocking')
+        async def blocking():
+            await asyncio.sleep(0.05)
+            _blocking_lookup()
+            return 'ok'
+
+        @self.app.route('/cooperative')
+        async def cooperative():
+            await asyncio.sleep(0.2)
+            return 'ok'
+
+    def test_blocking_call_site_reported(self):
+        """A synchronous call inside an async view is attributed to its call site"""
+        self.assertEqual(self.app.test_client().get('/blocking').status_code, 200)
+        report = self.monitor.report()
+        self.assertEqual(len(report), 1)
+        self.assertIn('_blocking_lookup', report[0]['site'])
+        self.assertEqual(report[0]['endpoints'], ['blocking'])
+        self.assertGreater(report[0]['total_seconds'], 0.2)
+
+    def test_awaiting_does_not_stall(self):
+        """Time spent awaiting leaves the loop free and is not reported"""
+        self.app.test_client().get('/cooperative')
+        self.assertEqual(self.monitor.report(), [])
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = SamplingProfiler()
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=self.stop.wait, name='worker-under-test')
+        self.worker.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.worker.join()
+
+    def test_samples_other_threads(self):
+        """Stacks of other threads are collected under their thread name"""
+        stacks = self.profiler.profile(0.05, interval=0.005)
+        collapsed = to_collapsed(stacks)
+        self.assertIn('worker-under-test;', collapsed)
+        self.assertIn('wait (threading.py', collapsed)
+
+    def test_speedscope_weights(self):
+        """Each thread profile's weights add up to its sampled time"""
+        stacks = self.profiler.profile(0.05, interval=0.01)
+        document = to_speedscope(stacks, 0.01)
+        for profile in document['profiles']:
+            self.assertAlmostEqual(sum(profile['weights']), profile['endValue'])
+            for sample in profile['samples']:
+                self.assertTrue(all(i < len(document['shared']['frames']) for i in sample))
+
+    def test_one_profile_at_a_time(self):
+        """A second profile is refused while one is running"""
+        running = threading.Thread(target=self.profiler.profile, args=(0.3,))
+        running.start()
+        time.sleep(0.05)
+        with self.assertRaises(ProfilerBusy):
+            self.profiler.profile(0.01)
+        running.join()
+
+    def test_background_profile(self):
+        """start() returns at once; the stacks are fetched by id once sampling ends"""
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        for attr in ('cache_dir', 'tags_dir', 'versions_dir'):
+            patcher = patch.object(cache_service, attr, scratch.name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        profile_id = self.profiler.start(0.2, interval=0.01)
+        self.assertEqual(self.profiler.fetch(profile_id)['status'], 'running')
+        with self.assertRaises(ProfilerBusy):
+            self.profiler.start(0.01)
+        deadline = time.monotonic() + 5
+        while self.profiler.busy and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        result = self.profiler.fetch(profile_id)
+        self.assertEqual(result['status'], 'done')
+        self.assertIn('worker-under-test;', to_collapsed(result['stacks']))
+        self.assertIsNone(self.profiler.fetch('unknown'))
+
+class TestRequestProfiling(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        for attr in ('cache_dir', 'tags_dir', 'versions_dir'):
+            patcher = patch.object(cache_service, attr, scratch.name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_one_cprofile_per_process(self):
+        """A second X-Profile request while one is being profiled is skipped, not failed"""
+        app = Flask(__name__)
+        init_request_profiling(app)
+        responses = {}
+        release = threading.Event()
+
+        @app.route('/slow')
+        def slow():
+            release.wait(5)
+            return 'ok'
+
+        @app.route('/fast')
+        def fast():
+            return 'ok'
+
+        with patch('backend.utils.profiler.verify_jwt_in_request'), \
+                patch('backend.utils.profiler.get_jwt_identity', return_value='1'), \
+                patch('backend.utils.profiler.is_admin', return_value=True):
+            client = app.test_client()
+            first = threading.Thread(
+                target=lambda: responses.update(slow=client.get('/slow', headers={'X-Profile': '1'})))
+            first.start()
+            time.sleep(0.1)
+            responses['fast'] = app.test_client().get('/fast', headers={'X-Profile': '1'})
+            release.set()
+            first.join()
+            again = app.test_client().get('/fast', headers={'X-Profile': '1'})
+
+        self.assertEqual(responses['fast'].headers.get('X-Profile-Skipped'), 'busy')
+        self.assertIn('X-Profile-Id', responses['slow'].headers)
+        self.assertIn('X-Profile-Id', again.headers)
+
+    def test_report_shared_through_cache(self):
+        """The report is read back from the shared cache, not this process"""
+        app = Flask(__name__)
+        init_request_profiling(app)
+
+        @app.route('/fast')
+        def fast():
+            return 'ok'
+
+        with patch('backend.utils.profiler.verify_jwt_in_request'), \
+                patch('backend.utils.profiler.get_jwt_identity', return_value='1'), \
+                patch('backend.utils.profiler.is_admin', return_value=True):
+            response = app.test_client().get('/fast', headers={'X-Profile': '1'})
+
+        profile_id = response.headers['X-Profile-Id']
+        with patch('backend.utils.profiler.cache_service', CacheService(cache_dir=cache_service.cache_dir)):
+            report = get_request_profile(profile_id)
+        self.assertEqual(report['endpoint'], 'fast')
+        self.assertIn('function calls', report['report'])
+        self.assertIsNone(get_request_profile('unknown'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, create_engine, insert, select
+from backend.extensions import db
+from backend.models.trip import Trip
+from backend.utils.pagination import (
+    InvalidCursor, KeysetPage, MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_filter, parse_fields, parse_limit
+)
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        """Cursors round-trip datetimes, dates, ints and strings"""
+        values = [datetime(2026, 1, 2, 3, 4, 5, 6), date(2026, 1, 2), 42, 'conv-1']
+        self.assertEqual(decode_cursor(encode_cursor(*values), 4), values)
+
+    def test_invalid_cursor(self):
+        """Garbage or wrongly sized cursors raise InvalidCursor"""
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor', 2)
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(encode_cursor(1, 2, 3), 2)
+
+    def test_parse_limit(self):
+        """Missing limit means unpaginated; large limits are capped"""
+        self.assertIsNone(parse_limit(None))
+        self.assertEqual(parse_limit('', default=20), 20)
+        self.assertEqual(parse_limit('5'), 5)
+        self.assertEqual(parse_limit('100000'), MAX_PAGE_SIZE)
+        for bad in ('0', '-1', 'abc'):
+            with self.assertRaises(ValueError):
+                parse_limit(bad)
+
+class TestKeysetFilter(unittest.TestCase):
+    def setUp(self):
+        metadata = MetaData()
+        self.rows = Table('rows', metadata, Column('id', Integer, primary_key=True), Column('ts', DateTime))
+        self.engine = create_engine('sqlite://')
+        metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            # Duplicate timestamps make the id tiebreaker matter
+            conn.execute(insert(self.rows), [
+                {'id': i, 'ts': datetime(2026, 1, 1 + i // 3)} for i in range(1, 11)
+            ])
+
+    def test_pages_cover_every_row_once(self):
+        """Walking pages via the last row's keys visits each row exactly once, in order"""
+        columns = (self.rows.c.ts, self.rows.c.id)
+        seen, after = [], None
+        with self.engine.connect() as conn:
+            while True:
+                query = select(self.rows).order_by(self.rows.c.ts.desc(), self.rows.c.id.desc()).limit(3)
+                if after:
+                    query = query.where(keyset_filter(columns, after))
+                page = conn.execute(query).all()
+                if not page:
+                    break
+                seen.extend(row.id for row in page)
+                after = decode_cursor(encode_cursor(page[-1].ts, page[-1].id), 2)
+        self.assertEqual(seen, sorted(range(1, 11), key=lambda i: (datetime(2026, 1, 1 + i // 3), i), reverse=True))
+
+class TestKeysetPage(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+            for i in range(5):
+                trip = Trip(user_id=1, title=f"Trip {i}", destination='Lisbon', created_at=datetime(2026, 1, 1))
+                trip.set_itinerary({'day': i})
+                db.session.add(trip)
+            db.session.commit()
+
+    def fetch(self, query_string):
+        with self.app.test_request_context(query_string=query_string):
+            page = KeysetPage(Trip, (Trip.created_at, Trip.id))
+            rows = page.fetch(Trip.query.filter_by(user_id=1))
+            return [page.serialize(row) for row in rows], page.next_cursor
+
+    def test_unpaginated_returns_full_dicts(self):
+        """Without limit every row comes back as to_dict() and no cursor is issued"""
+        trips, cursor = self.fetch({})
+        self.assertEqual([t['title'] for t in trips], [f"Trip {i}" for i in range(4, -1, -1)])
+        self.assertIn('updated_at', trips[0])
+        self.assertIsNone(cursor)
+
+    def test_cursor_walk_with_projection(self):
+        """Pages chain through X-Next-Cursor and only the projected fields are returned"""
+        first, cursor = self.fetch({'limit': 2, 'fields': 'title,itinerary'})
+        self.assertEqual(first[0], {'title': 'Trip 4', 'itinerary': {'day': 4}})
+        second, cursor = self.fetch({'limit': 2, 'fields': 'title', 'cursor': cursor})
+        third, cursor = self.fetch({'limit': 2, 'fields': 'title', 'cursor': cursor})
+        self.assertEqual([t['title'] for t in first + second + third], [f"Trip {i}" for i in range(4, -1, -1)])
+        self.assertIsNone(cursor)
+
+    def test_unknown_field_rejected(self):
+        """fields= only accepts the model's columns"""
+        with self.assertRaises(ValueError):
+            parse_fields('title,password_hash', Trip)
+
+if __name__ == '__main__':
+    unittest.main()
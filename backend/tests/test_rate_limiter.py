@@ -0,0 +1,244 @@
+"""
+Unit tests for rate limiting engines
+"""
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from unittest.mock import patch
+from backend.utils.rate_limiter import (
+    SlidingWindowLimiter, RedisSlidingWindowLimiter, FailoverLimiter, RateLimiter,
+    TokenBucketLimiter, RedisTokenBucketLimiter
+)
+from backend.utils.ip_blocklist import IPBlocklist
+
+class TestSlidingWindowLimiter(unittest.TestCase):
+    def setUp(self):
+        self.limiter = SlidingWindowLimiter()
+
+    def test_limit_within_window(self):
+        """Requests past the limit in one window are rejected"""
+        results = [self.limiter.hit('ip', 3, 60, now=1000.0 + i) for i in range(5)]
+        self.assertEqual(results, [False, False, False, True, True])
+
+    def test_previous_window_is_weighted(self):
+        """The previous window counts in proportion to its remaining overlap"""
+        for i in range(10):
+            self.limiter.hit('ip', 10, 60, now=600.0 + i)
+        # 45s into the next window, 2.5 of the previous 10 requests still count
+        allowed = 0
+        while not self.limiter.hit('ip', 10, 60, now=705.0):
+            allowed += 1
+        self.assertEqual(allowed, 8)
+
+    def test_old_windows_are_forgotten(self):
+        """Traffic two windows ago no longer counts"""
+        for i in range(5):
+            self.limiter.hit('ip', 5, 60, now=600.0 + i)
+        self.assertFalse(self.limiter.hit('ip', 5, 60, now=800.0))
+
+    def test_idle_keys_are_evicted(self):
+        """Keys idle for two windows are dropped, a bounded number per call"""
+        limiter = SlidingWindowLimiter(max_evictions=10)
+        for i in range(100):
+            limiter.hit(f'ip-{i}', 5, 60, now=600.0)
+        limiter.hit('fresh', 5, 60, now=800.0)
+        self.assertEqual(len(limiter), 91)
+        for _ in range(9):
+            limiter.hit('fresh', 5, 60, now=801.0)
+        self.assertEqual(len(limiter), 1)
+
+    def test_active_keys_survive_stale_expiries(self):
+        """An expiry recorded for an earlier window does not evict a key still in use"""
+        limiter = SlidingWindowLimiter()
+        limiter.hit('ip', 5, 60, now=600.0)
+        limiter.hit('ip', 5, 60, now=690.0)
+        limiter.hit('other', 5, 60, now=720.0)
+        self.assertEqual(len(limiter), 2)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_windows_do_not_share_counters(self):
+        """The same identifier under different windows is counted separately"""
+        limiter = RateLimiter()
+        self.assertFalse(limiter.is_rate_limited('ip', 1, 60))
+        self.assertTrue(limiter.is_rate_limited('ip', 1, 60))
+        self.assertFalse(limiter.is_rate_limited('ip', 1, 3600))
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def setUp(self):
+        self.buckets = TokenBucketLimiter()
+
+    def test_debit_until_empty(self):
+        """Costs are debited until the bucket cannot cover the next one"""
+        self.assertFalse(self.buckets.debit('u', 600, 1000, 1.0, now=0.0))
+        self.assertTrue(self.buckets.debit('u', 600, 1000, 1.0, now=0.0))
+        # 200 seconds refill 200 tokens
+        self.assertFalse(self.buckets.debit('u', 600, 1000, 1.0, now=200.0))
+
+    def test_oversized_request_runs_on_full_bucket(self):
+        """A cost above capacity is allowed once and leaves the bucket in debt"""
+        self.assertFalse(self.buckets.debit('u', 5000, 1000, 1.0, now=0.0))
+        self.assertTrue(self.buckets.debit('u', 10, 1000, 1.0, now=4000.0))
+        self.assertFalse(self.buckets.debit('u', 10, 1000, 1.0, now=4010.0))
+
+    def test_reconcile_refund_and_charge(self):
+        """adjust() refunds over-estimates and charges under-estimates"""
+        self.buckets.debit('u', 800, 1000, 1.0, now=0.0)
+        self.buckets.adjust('u', -700, 1000, 1.0, now=0.0)
+        self.assertFalse(self.buckets.debit('u', 900, 1000, 1.0, now=0.0))
+
+        self.buckets.adjust('u', 500, 1000, 1.0, now=0.0)
+        self.assertTrue(self.buckets.debit('u', 1, 1000, 1.0, now=0.0))
+
+    def test_refund_is_capped(self):
+        """Refunds never raise the balance above capacity"""
+        self.buckets.adjust('u', -5000, 1000, 1.0, now=0.0)
+        self.assertFalse(self.buckets.debit('u', 1000, 1000, 1.0, now=0.0))
+        self.assertTrue(self.buckets.debit('u', 1, 1000, 1.0, now=0.0))
+
+    def test_eviction_uses_each_buckets_own_limits(self):
+        """Buckets of other endpoints and tiers are only evicted once full by their own capacity"""
+        buckets = TokenBucketLimiter(eviction_interval=10)
+        upload, chat, pro_chat = (150000, 150000 / 3600.0), (60000, 60000 / 3600.0), (400000, 400000 / 3600.0)
+        buckets.debit('ai.analyze_file:user_1', 50000, *upload, now=0.0)
+        buckets.debit('ai.chat:user_2', 100000, *pro_chat, now=0.0)
+        buckets.debit('ai.chat:user_3', 10, *chat, now=0.0)
+        # A small-budget call runs the eviction pass
+        buckets.debit('ai.chat:user_4', 10, *chat, now=60.0)
+        self.assertEqual(len(buckets), 3)
+        # ~102.5k tokens left, not a fresh 150k
+        self.assertTrue(buckets.debit('ai.analyze_file:user_1', 140000, *upload, now=60.0))
+        self.assertFalse(buckets.debit('ai.analyze_file:user_1', 100000, *upload, now=60.0))
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+@unittest.skipUnless(fakeredis, "fakeredis[lua] required")
+class TestRedisSlidingWindowLimiter(unittest.TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.limiter = RedisSlidingWindowLimiter(self.redis)
+
+    def test_matches_local_engine(self):
+        """The Lua script makes the same decisions as the in-process engine"""
+        local = SlidingWindowLimiter()
+        timeline = [600.0 + i for i in range(12)] + [705.0 + i * 0.1 for i in range(12)]
+        for now in timeline:
+            self.assertEqual(
+                self.limiter.hit('ip', 10, 60, now=now),
+                local.hit('ip', 10, 60, now=now)
+            )
+
+    def test_shared_between_workers(self):
+        """Two limiters on the same Redis enforce one combined limit"""
+        other = RedisSlidingWindowLimiter(self.redis)
+        self.assertFalse(self.limiter.hit('ip', 2, 60, now=1000.0))
+        self.assertFalse(other.hit('ip', 2, 60, now=1000.0))
+        self.assertTrue(self.limiter.hit('ip', 2, 60, now=1000.0))
+
+    def test_keys_expire(self):
+        """Window counters carry a TTL so idle keys disappear from Redis"""
+        self.limiter.hit('ip', 2, 60, now=1000.0)
+        key = next(iter(self.redis.keys('ratelimit:*')))
+        self.assertGreater(self.redis.ttl(key), 0)
+
+@unittest.skipUnless(fakeredis, "fakeredis[lua] required")
+class TestRedisTokenBucketLimiter(unittest.TestCase):
+    def test_matches_local_engine(self):
+        """The Lua bucket makes the same decisions as the in-process one"""
+        remote = RedisTokenBucketLimiter(fakeredis.FakeRedis())
+        local = TokenBucketLimiter()
+        steps = [('debit', 600, 0.0), ('debit', 600, 0.0), ('adjust', -300, 1.0),
+                 ('debit', 600, 2.0), ('adjust', 900, 3.0), ('debit', 50, 4.0), ('debit', 50, 900.0)]
+        for method, cost, now in steps:
+            self.assertEqual(
+                getattr(remote, method)('u', cost, 1000, 1.0, now=now),
+                getattr(local, method)('u', cost, 1000, 1.0, now=now)
+            )
+
+class _BrokenEngine:
+    def __init__(self):
+        self.calls = 0
+
+    def hit(self, *args, **kwargs):
+        self.calls += 1
+        raise ConnectionError("redis down")
+
+class TestFailoverLimiter(unittest.TestCase):
+    def test_falls_back_and_backs_off(self):
+        """Errors switch to the local engine without retrying Redis on every request"""
+        broken = _BrokenEngine()
+        limiter = FailoverLimiter(broken, SlidingWindowLimiter(), retry_after=30)
+
+        self.assertFalse(limiter.hit('ip', 1, 60, now=1000.0))
+        self.assertTrue(limiter.hit('ip', 1, 60, now=1000.0))
+        self.assertEqual(broken.calls, 1)
+
+class TestIPBlocklist(unittest.TestCase):
+    def setUp(self):
+        self.blocklist = IPBlocklist()
+
+    def test_exact_block_and_expiry(self):
+        """Blocked addresses are released once their duration passes"""
+        with patch('backend.utils.ip_blocklist.time.time', return_value=1000.0):
+            self.blocklist.block('203.0.113.5', duration=60)
+            self.assertTrue(self.blocklist.is_blocked('203.0.113.5'))
+            self.assertFalse(self.blocklist.is_blocked('203.0.113.6'))
+        with patch('backend.utils.ip_blocklist.time.time', return_value=1061.0):
+            self.assertFalse(self.blocklist.is_blocked('203.0.113.5'))
+        self.assertEqual(len(self.blocklist), 0)
+
+    def test_reblock_extends_expiry(self):
+        """A later block outlives the stale heap entry of the earlier one"""
+        with patch('backend.utils.ip_blocklist.time.time', return_value=1000.0):
+            self.blocklist.block('203.0.113.5', duration=60)
+            self.blocklist.block('203.0.113.5', duration=600)
+        with patch('backend.utils.ip_blocklist.time.time', return_value=1100.0):
+            self.assertTrue(self.blocklist.is_blocked('203.0.113.5'))
+
+    def test_cidr_ranges(self):
+        """Networks block every address they contain, for both families"""
+        self.blocklist.block('198.51.100.0/24')
+        self.blocklist.block('2001:db8::/32')
+        self.assertTrue(self.blocklist.is_blocked('198.51.100.77'))
+        self.assertFalse(self.blocklist.is_blocked('198.51.101.1'))
+        self.assertTrue(self.blocklist.is_blocked('2001:db8::1'))
+        self.assertFalse(self.blocklist.is_blocked('2001:db9::1'))
+
+    def test_unblock_mirrors_block(self):
+        """Host-length networks unblock as addresses and invalid targets are ignored"""
+        self.blocklist.block('192.0.2.7/32')
+        self.blocklist.block('198.51.100.0/24')
+        self.blocklist.unblock('192.0.2.7/32')
+        self.blocklist.unblock('198.51.100.0/24')
+        self.blocklist.unblock('not-an-ip')
+        self.assertFalse(self.blocklist.is_blocked('192.0.2.7'))
+        self.assertFalse(self.blocklist.is_blocked('198.51.100.77'))
+
+    def test_bulk_import(self):
+        """Comments, blanks and invalid lines are skipped"""
+        imported = self.blocklist.bulk_import([
+            '# abuse wave',
+            '192.0.2.1',
+            '',
+            '10.0.0.0/8  # internal scanner',
+            'not-an-ip',
+        ])
+        self.assertEqual(imported, 2)
+        self.assertTrue(self.blocklist.is_blocked('10.20.30.40'))
+        self.assertTrue(self.blocklist.is_blocked('192.0.2.1'))
+
+    def test_rate_limiter_delegates(self):
+        """RateLimiter keeps its block_ip/is_blocked API"""
+        limiter = RateLimiter()
+        limiter.block_ip('192.0.2.10')
+        self.assertTrue(limiter.is_blocked('192.0.2.10'))
+        self.assertFalse(limiter.is_blocked(None))
+
+if __name__ == '__main__':
+    unittest.main()
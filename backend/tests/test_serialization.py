@@ -0,0 +1,65 @@
+"""
+Unit tests for column-tuple serialization and the orjson JSON provider
+"""
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from backend.extensions import db
+from backend.models.expense import Expense
+from backend.models.ticket import Ticket
+from backend.utils.serialization import OrjsonProvider, encoder_for, orjson
+
+class TestRowEncoder(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+
+    def assert_matches_to_dict(self, model, instance):
+        db.session.add(instance)
+        db.session.commit()
+        encoder = encoder_for(model)
+        row = db.session.query(*encoder.columns).filter(model.id == instance.id).one()
+        self.assertEqual(encoder.encode(row), instance.to_dict())
+
+    def test_expense_matches_to_dict(self):
+        """Column tuples encode to exactly what Expense.to_dict returns"""
+        self.assert_matches_to_dict(Expense, Expense(
+            user_id=1, amount=12.5, category='food', description='Pastéis', date=datetime(2026, 3, 1, 9, 30)
+        ))
+
+    def test_ticket_json_and_optional_dates(self):
+        """JSON columns are parsed and empty datetimes stay None"""
+        ticket = Ticket(user_id=1, ticket_type='train', title='Porto', valid_from=None)
+        ticket.set_additional_info({'seat': '12A'})
+        self.assert_matches_to_dict(Ticket, ticket)
+
+@unittest.skipUnless(orjson, "orjson required")
+class TestOrjsonProvider(unittest.TestCase):
+    def test_matches_default_provider(self):
+        """orjson output parses to the same document as the stdlib provider's"""
+        app = Flask(__name__)
+        payload = {'b': [1, 2.5, None, True], 'a': {'nested': 'é'}, 'when': datetime(2026, 1, 1)}
+        with app.app_context():
+            fast = OrjsonProvider(app).response(payload)
+            slow = DefaultJSONProvider(app).response(payload)
+        self.assertEqual(fast.mimetype, 'application/json')
+        self.assertEqual(fast.get_json(), slow.get_json())
+        self.assertTrue(fast.get_data().startswith(b'{"a":'))
+
+if __name__ == '__main__':
+    unittest.main()
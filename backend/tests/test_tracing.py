@@ -0,0 +1,84 @@
+"""
+Unit tests for request tracing
+"""
+import unittest
+import asyncio
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils.tracing import Tracer
+
+class _MemoryExporter:
+    def __init__(self):
+        self.traces = []
+
+    def submit(self, spans):
+        self.traces.append(spans)
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.exporter = _MemoryExporter()
+        self.tracer = Tracer(self.exporter, sample_rate=1.0, slow_threshold=10.0)
+
+    def test_nested_spans_across_tasks(self):
+        """Spans opened in gathered tasks are children of the span that awaited them"""
+        async def stage(name):
+            with self.tracer.span(name):
+                await asyncio.sleep(0)
+
+        async def handler():
+            with self.tracer.span('request') as root:
+                await asyncio.gather(stage('history'), stage('rag'))
+            return root
+
+        root = asyncio.run(handler())
+        spans = {span.name: span for span in self.exporter.traces[0]}
+        self.assertEqual(set(spans), {'request', 'history', 'rag'})
+        self.assertEqual(spans['history'].parent_id, root.span_id)
+        self.assertEqual(spans['rag'].trace_id, root.trace_id)
+
+    def test_unsampled_fast_trace_dropped(self):
+        """Traces outside the head sample are dropped when fast and error-free"""
+        self.tracer.sample_rate = 0.0
+        with self.tracer.span('request'):
+            pass
+        self.assertEqual(self.exporter.traces, [])
+
+    def test_tail_sampling_keeps_slow_and_failed(self):
+        """Slow or failed traces are exported even when not head-sampled"""
+        self.tracer.sample_rate = 0.0
+        self.tracer.slow_threshold = 0.0
+        with self.tracer.span('slow'):
+            pass
+        self.tracer.slow_threshold = 10.0
+        with self.assertRaises(ValueError):
+            with self.tracer.span('request'):
+                with self.tracer.span('tool'):
+                    raise ValueError("boom")
+        self.assertEqual(len(self.exporter.traces), 2)
+        failed = {span.name: span for span in self.exporter.traces[1]}
+        self.assertEqual(failed['tool'].error, 'ValueError: boom')
+
+    def test_traceparent_is_continued(self):
+        """A valid W3C traceparent sets the trace id, parent and sampling flag"""
+        self.tracer.sample_rate = 0.0
+        span, token = self.tracer.start_span(
+            'request', traceparent='00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01'
+        )
+        self.tracer.end_span(span, token)
+        self.assertEqual(span.trace_id, '0af7651916cd43dd8448eb211c80319c')
+        self.assertEqual(span.parent_id, 'b7ad6b7169203331')
+        self.assertEqual(len(self.exporter.traces), 1)
+
+    def test_disabled_tracer_is_noop(self):
+        """Without an exporter spans cost nothing and nothing is recorded"""
+        tracer = Tracer(None)
+        with tracer.span('request') as span:
+            span.set_attribute('ignored', True)
+        self.assertIsNone(span.trace_id)
+
+if __name__ == '__main__':
+    unittest.main()
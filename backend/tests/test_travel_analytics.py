@@ -0,0 +1,166 @@
+"""
+Unit tests for the precomputed per-user travel analytics
+"""
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from sqlalchemy import event
+from backend.extensions import db
+from backend.models.expense import Expense
+from backend.models.preference import UserPreference
+from backend.models.trip import Trip
+from backend.models.user import User
+from backend.models.user_travel_stats import UserTravelStats
+from backend.services.fx_service import fx_service
+from backend.services.travel_analytics import travel_analytics, build_stats, build_stats_frame, pd
+
+TRIP_ROWS = [
+    (1, 'Lisbon', 100.0, 'leisure', 'completed'),
+    (1, 'Lisbon', 200.0, 'leisure', 'planned'),
+    (1, 'Kyoto', 300.0, 'adventure', 'completed'),
+    (1, 'Oslo', 400.0, None, 'planned'),
+    (2, '', None, 'business', 'planned'),
+]
+SPEND_ROWS = [(1, 'food', 'EUR', 50.0, 2), (1, None, 'USD', 5.0, 1), (3, 'stay', 'USD', 80.0, 1)]
+
+class TestBuildStats(unittest.TestCase):
+    def test_aggregates(self):
+        """Counts, budget average and percentiles, ranked destinations and spend per user"""
+        stats = build_stats(TRIP_ROWS, SPEND_ROWS)
+        self.assertEqual(stats[1]['trip_count'], 4)
+        self.assertEqual(stats[1]['completed_trip_count'], 2)
+        self.assertEqual(stats[1]['average_budget'], 250.0)
+        self.assertEqual((stats[1]['budget_p50'], stats[1]['budget_p90']), (250.0, 370.0))
+        self.assertEqual(stats[1]['top_destinations'][0], {'destination': 'Lisbon', 'count': 2})
+        self.assertEqual(stats[1]['trip_types'], [{'trip_type': 'leisure', 'count': 2}, {'trip_type': 'adventure', 'count': 1}])
+        self.assertIsNone(stats[2]['average_budget'])
+        self.assertEqual(stats[2]['top_destinations'], [])
+        self.assertEqual(stats[3]['trip_count'], 0)
+        self.assertEqual(stats[3]['spend_by_category'], [{'category': 'stay', 'currency': 'USD', 'total': 80.0, 'count': 1}])
+
+    @unittest.skipIf(pd is None, "pandas not installed")
+    def test_pandas_path_matches(self):
+        """The vectorized batch produces exactly the rows the incremental path does"""
+        self.assertEqual(build_stats_frame(TRIP_ROWS, SPEND_ROWS), build_stats(TRIP_ROWS, SPEND_ROWS))
+
+class TestIncrementalStats(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        fx_service.load_snapshot({'base': 'USD', 'date': '2026-01-01', 'rates': {'EUR': 0.5}}, 'test')
+        self.user = User(username='u', email='u@example.com', password_hash='x', preferred_currency='USD')
+        db.session.add(self.user)
+        db.session.commit()
+        db.session.add(UserPreference(user_id=self.user.id, travel_style='cultural', activity_interests=['museums']))
+        for destination, budget in (('Lisbon', 100.0), ('Lisbon', 300.0), ('Kyoto', 500.0)):
+            db.session.add(Trip(user_id=self.user.id, title=destination, destination=destination,
+                                budget=budget, trip_type='leisure'))
+        db.session.add(Expense(user_id=self.user.id, amount=40.0, category='food', currency='EUR'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+
+    def _stats(self):
+        db.session.expire_all()
+        return db.session.get(UserTravelStats, self.user.id)
+
+    def test_commits_refresh_the_row(self):
+        """Trip and expense commits update the user's row in the same transaction"""
+        stats = self._stats()
+        self.assertEqual(stats.trip_count, 3)
+        self.assertEqual(stats.average_budget, 300.0)
+        self.assertEqual(stats.top_destinations[0], {'destination': 'Lisbon', 'count': 2})
+
+        db.session.delete(Trip.query.filter_by(destination='Kyoto').first())
+        db.session.add(Expense(user_id=self.user.id, amount=10.0, category='food', currency='EUR'))
+        db.session.commit()
+        stats = self._stats()
+        self.assertEqual(stats.trip_count, 2)
+        self.assertEqual(stats.budget_p90, 280.0)
+        self.assertEqual(stats.spend_by_category, [{'category': 'food', 'currency': 'EUR', 'total': 50.0, 'count': 2}])
+
+    def test_rollback_discards_pending_refresh(self):
+        """Changes rolled back never reach the stats row"""
+        db.session.add(Trip(user_id=self.user.id, title='X', destination='X'))
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        self.assertEqual(self._stats().trip_count, 3)
+
+    def test_commits_apply_deltas_without_rescanning(self):
+        """Once a row exists, a commit reads only that row, never the user's other trips or expenses"""
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            trip = Trip.query.filter_by(destination='Kyoto').first()
+            statements.clear()
+            trip.destination, trip.budget, trip.status = 'Lisbon', 900.0, 'completed'
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        reads = [statement for statement in statements if statement.lstrip().upper().startswith('SELECT')]
+        self.assertEqual(len(reads), 1)
+        self.assertIn('user_travel_stats', reads[0])
+
+        stats = self._stats()
+        self.assertEqual(stats.completed_trip_count, 1)
+        self.assertEqual(stats.top_destinations, [{'destination': 'Lisbon', 'count': 3}])
+        self.assertEqual((stats.budget_p50, stats.budget_p90), (300.0, 780.0))
+
+    def test_batch_matches_incremental(self):
+        """The nightly recompute rebuilds the rows the deltas produced"""
+        trip = Trip.query.filter_by(destination='Kyoto').first()
+        trip.trip_type, trip.budget = 'business', None
+        db.session.add(Expense(user_id=self.user.id, amount=7.5, category=None, currency='USD'))
+        db.session.delete(Trip.query.filter_by(budget=100.0).first())
+        db.session.commit()
+
+        columns = ('budget_counts', 'destination_counts')
+        before = self._stats()
+        before = dict(before.to_dict(), **{column: getattr(before, column) for column in columns})
+        self.assertEqual(travel_analytics.recompute_all(), 1)
+        after = self._stats()
+        after = dict(after.to_dict(), **{column: getattr(after, column) for column in columns})
+        before.pop('updated_at'), after.pop('updated_at')
+        self.assertEqual(after, before)
+
+    def test_user_patterns(self):
+        """Patterns come from the stats row, with spend converted to the preferred currency"""
+        result = travel_analytics.user_patterns(self.user.id)
+        patterns = result['patterns']
+        self.assertEqual(patterns['travel_frequency'], 3)
+        self.assertEqual(patterns['favorite_destinations'], ['Lisbon', 'Kyoto'])
+        self.assertEqual(patterns['preferred_travel_style'], 'cultural')
+        self.assertEqual(patterns['common_activities'], ['museums'])
+        self.assertEqual(patterns['spend_by_category'], [{'category': 'food', 'currency': 'USD', 'total': 80.0, 'count': 1}])
+        self.assertTrue(any('Lisbon' in line for line in result['recommendations']))
+
+    def test_missing_row_is_computed_on_read(self):
+        """Users without a row yet get computed stats on read; only writes or the batch store them"""
+        UserTravelStats.query.delete()
+        db.session.commit()
+        result = travel_analytics.user_patterns(self.user.id)
+        self.assertEqual(result['patterns']['travel_frequency'], 3)
+        self.assertIsNone(result['stats_updated_at'])
+        self.assertIsNone(self._stats())
+        self.assertEqual(travel_analytics.user_patterns(None)['patterns']['travel_frequency'], 0)
+
+        # The next write stores the full row once
+        db.session.add(Trip(user_id=self.user.id, title='Oslo', destination='Oslo'))
+        db.session.commit()
+        self.assertEqual(self._stats().trip_count, 4)
+
+if __name__ == '__main__':
+    unittest.main()
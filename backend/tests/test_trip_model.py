@@ -0,0 +1,78 @@
+"""
+Unit tests for Trip serialization
+"""
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from flask import Flask
+from sqlalchemy import event
+from backend.extensions import db
+from backend.models.trip import Trip
+from backend.models.preference import UserPreference
+
+class TestTripSerialization(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        trip = Trip(user_id=1, title='Kyoto', destination='Japan', created_at=datetime(2026, 4, 1))
+        trip.set_itinerary({'days': [{'day': 1, 'activities': [{'activity': 'Fushimi Inari', 'type': 'culture'}]}]})
+        db.session.add(trip)
+        db.session.add(Trip(user_id=1, title='Bare', destination='Nowhere', created_at=datetime(2026, 4, 2)))
+        db.session.add(UserPreference(user_id=1, activity_interests=['hiking', 'food']))
+        db.session.commit()
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+
+    def test_summary_skips_blobs(self):
+        """to_summary_dict works off the list query alone, leaving the JSON blobs unloaded"""
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            trip = Trip.query.filter_by(title='Kyoto').first()
+            summary = trip.to_summary_dict()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(summary['title'], 'Kyoto')
+        self.assertNotIn('itinerary', summary)
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn('itinerary', statements[0])
+
+    def test_json_parse_is_memoized(self):
+        """Parsed JSON is reused until the column value changes"""
+        trip = Trip.query.filter_by(title='Kyoto').first()
+        first = trip.get_itinerary()
+        self.assertIs(trip.get_itinerary(), first)
+        trip.set_itinerary({'days': []})
+        self.assertEqual(trip.get_itinerary(), {'days': []})
+
+    def test_json_columns_round_trip(self):
+        """JSON columns store documents natively and read back as Python values"""
+        trip = Trip.query.filter_by(title='Kyoto').first()
+        self.assertEqual(trip.itinerary['days'][0]['activities'][0]['type'], 'culture')
+        self.assertEqual(Trip.query.filter_by(title='Bare').first().get_places_visited(), [])
+
+    def test_activity_type_filter(self):
+        """Trips can be filtered by activity type inside the itinerary"""
+        self.assertEqual([t.title for t in Trip.query.filter(Trip.has_activity_type('culture'))], ['Kyoto'])
+        self.assertEqual(Trip.query.filter(Trip.has_activity_type('nightlife')).count(), 0)
+
+    def test_activity_interest_filter(self):
+        """Preferences can be filtered by a value in activity_interests"""
+        self.assertEqual(UserPreference.query.filter(UserPreference.has_activity_interest('hiking')).count(), 1)
+        self.assertEqual(UserPreference.query.filter(UserPreference.has_activity_interest('golf')).count(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+"""
+Access control for operational (admin-only) endpoints
+"""
+import os
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import get_jwt_identity
+
+# Comma-separated user ids allowed to use /api/admin endpoints
+ADMIN_USER_IDS = {uid.strip() for uid in os.getenv('ADMIN_USER_IDS', '').split(',') if uid.strip()}
+
+def is_admin(user_id) -> bool:
+    return user_id is not None and str(user_id) in ADMIN_USER_IDS
+
+def admin_required(f):
+    """Reject non-admin users; apply below @jwt_required()"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not is_admin(get_jwt_identity()):
+            return jsonify({'error': 'Admin access required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,129 @@
+"""
+Token-budget rate limiting for AI endpoints
+"""
+import inspect
+import json
+import logging
+import os
+from functools import wraps
+from flask import request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from backend.utils.rate_limiter import rate_limiter
+from backend.services.ai.llm_provider import track_token_usage
+
+logger = logging.getLogger(__name__)
+
+# LLM tokens per hour, by user tier and endpoint; 'default' covers unlisted endpoints.
+# Override with AI_TOKEN_BUDGETS='{"free": {"default": 30000}}'
+DEFAULT_AI_TOKEN_BUDGETS = {
+    'free': {
+        'default': 60000,
+        'ai.analyze_file': 150000,
+        'ai.transcribe_audio': 100000,
+    },
+    'pro': {
+        'default': 400000,
+        'ai.analyze_file': 1000000,
+        'ai.transcribe_audio': 600000,
+    },
+}
+
+# Rough size of the system prompt, history and completion around a chat message
+CHAT_OVERHEAD_TOKENS = 1500
+
+def _load_budgets():
+    budgets = {tier: dict(limits) for tier, limits in DEFAULT_AI_TOKEN_BUDGETS.items()}
+    override = os.getenv('AI_TOKEN_BUDGETS')
+    if override:
+        try:
+            for tier, limits in json.loads(override).items():
+                budgets.setdefault(tier, {}).update(limits)
+        except (ValueError, AttributeError) as e:
+            logger.error("Ignoring invalid AI_TOKEN_BUDGETS: %s", e)
+    return budgets
+
+AI_TOKEN_BUDGETS = _load_budgets()
+PRO_USER_IDS = {uid.strip() for uid in os.getenv('AI_PRO_USER_IDS', '').split(',') if uid.strip()}
+
+def resolve_tier(user_id) -> str:
+    """Budget tier for a user"""
+    return 'pro' if str(user_id) in PRO_USER_IDS else 'free'
+
+def get_budget(tier: str, endpoint: str) -> int:
+    limits = AI_TOKEN_BUDGETS.get(tier) or AI_TOKEN_BUDGETS['free']
+    return limits.get(endpoint, limits.get('default', DEFAULT_AI_TOKEN_BUDGETS['free']['default']))
+
+# Cost estimators: tokens a request is expected to use, computed before the view runs
+
+def estimate_chat_cost() -> int:
+    data = request.get_json(silent=True) or {}
+    return len(str(data.get('message', ''))) // 4 + CHAT_OVERHEAD_TOKENS
+
+def estimate_upload_cost() -> int:
+    # Text uploads are ~4 bytes/token; binary parts are usually cheaper, and
+    # reconciliation corrects the difference after the call
+    return (request.content_length or 0) // 4 + 500
+
+def estimate_audio_cost() -> int:
+    # Compressed speech is ~2KB/s and billed at ~32 tokens/s, plus the follow-up chat turn
+    return (request.content_length or 0) // 64 + CHAT_OVERHEAD_TOKENS
+
+def fixed_cost(tokens: int):
+    """Estimator for generation endpoints whose size does not depend on the request"""
+    return lambda: tokens
+
+def cost_limit(estimate):
+    """Debit an endpoint's token budget up front and reconcile with actual usage.
+
+    Apply below @jwt_required(). The estimate is charged before the view runs;
+    afterwards the difference between provider-reported tokens and the estimate
+    is charged or refunded. Calls that report no usage (mock responses,
+    failures) are refunded in full.
+    """
+    def decorator(f):
+        def _debit():
+            user_id = get_jwt_identity() or request.remote_addr
+            endpoint = request.endpoint or f.__name__
+            budget = get_budget(resolve_tier(user_id), endpoint)
+            key = f"{endpoint}:user_{user_id}"
+            cost = max(1, int(estimate()))
+            limits = (budget, budget / 3600.0)
+            if rate_limiter.buckets.debit(key, cost, *limits):
+                logger.info("AI token budget exceeded for %s (cost %s, budget %s/h)", key, cost, budget)
+                return None, None
+            return key, (cost, limits)
+
+        def _reconcile(key, charged, usage):
+            cost, limits = charged
+            actual = usage.total_tokens if usage.calls else 0
+            if actual != cost:
+                rate_limiter.buckets.adjust(key, actual - cost, *limits)
+
+        def _rejected():
+            return jsonify({'error': 'AI usage budget exceeded. Please try again later.'}), 429
+
+        if inspect.iscoroutinefunction(f):
+            @wraps(f)
+            async def async_decorated_function(*args, **kwargs):
+                key, charged = _debit()
+                if key is None:
+                    return _rejected()
+                with track_token_usage() as usage:
+                    try:
+                        return await f(*args, **kwargs)
+                    finally:
+                        _reconcile(key, charged, usage)
+            return async_decorated_function
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key, charged = _debit()
+            if key is None:
+                return _rejected()
+            with track_token_usage() as usage:
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    _reconcile(key, charged, usage)
+        return decorated_function
+    return decorator
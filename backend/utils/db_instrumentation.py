@@ -0,0 +1,154 @@
+"""
+SQL query instrumentation: per-request query counts, DB time, slow-query log and N+1 detection
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.utils.monitoring import (
+    DATABASE_QUERIES, DB_QUERY_DURATION, REQUEST_QUERY_COUNT, QUERY_HEAVY_REQUESTS
+)
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their fingerprint
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+# A request is flagged when it runs more queries than this in total...
+QUERY_COUNT_THRESHOLD = int(os.getenv('QUERY_COUNT_THRESHOLD', 30))
+# ...or repeats one statement shape this many times (the N+1 signature)
+REPEATED_QUERY_THRESHOLD = int(os.getenv('REPEATED_QUERY_THRESHOLD', 10))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so queries differing only in literals compare equal"""
+    normalized = _STRING_LITERAL.sub('?', statement)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _IN_LIST.sub('(?...)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:10].split(None, 1)
+    return head[0].upper() if head else 'UNKNOWN'
+
+class QueryStats:
+    """Queries issued while serving one request"""
+    __slots__ = ('count', 'total_time', 'slowest_time', 'slowest_statement', 'fingerprints')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        shape = fingerprint(statement)
+        self.fingerprints[shape] += 1
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = shape
+
+    def most_repeated(self):
+        """(fingerprint, count) of the most frequently repeated statement"""
+        if not self.fingerprints:
+            return None, 0
+        return self.fingerprints.most_common(1)[0]
+
+    def is_query_heavy(self) -> bool:
+        return self.count > QUERY_COUNT_THRESHOLD or self.most_repeated()[1] >= REPEATED_QUERY_THRESHOLD
+
+def current_query_stats():
+    """Stats for the request being served, or None outside a request"""
+    if has_request_context():
+        return g.get('query_stats')
+    return None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start_time'].pop()
+    elapsed = time.perf_counter() - started
+    operation = _operation(statement)
+
+    DATABASE_QUERIES.labels(operation=operation).inc()
+    DB_QUERY_DURATION.labels(operation=operation).observe(elapsed)
+
+    stats = current_query_stats()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            elapsed * 1000,
+            request.endpoint if has_request_context() else 'background',
+            fingerprint(statement)
+        )
+
+def instrument_engine(engine: Engine):
+    """Attach the cursor hooks to an engine (idempotent)"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+def init_db_instrumentation(app):
+    """Instrument the app's engines and collect query stats per request.
+
+    With SQL_DEBUG_HEADERS=1 (or in debug mode) responses carry
+    X-DB-Query-Count, X-DB-Slowest-Query-Ms and a Server-Timing entry for
+    the DB time.
+    """
+    from backend.extensions import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    debug_headers = app.debug or os.getenv('SQL_DEBUG_HEADERS', '').lower() in ('1', 'true', 'yes')
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def finish_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_QUERY_COUNT.labels(endpoint=endpoint).observe(stats.count)
+
+        if stats.is_query_heavy():
+            QUERY_HEAVY_REQUESTS.labels(endpoint=endpoint).inc()
+            shape, repeats = stats.most_repeated()
+            logger.warning(
+                "Query-heavy request %s %s: %d queries in %.1f ms; repeated %d times: %s; slowest %.1f ms: %s",
+                request.method, endpoint, stats.count, stats.total_time * 1000, repeats, shape,
+                stats.slowest_time * 1000, stats.slowest_statement
+            )
+
+        if debug_headers:
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Slowest-Query-Ms'] = f'{stats.slowest_time * 1000:.1f}'
+            response.headers.add(
+                'Server-Timing', f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries"'
+            )
+        return response
+
+    logger.info("Database instrumentation initialized")
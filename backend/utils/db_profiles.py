@@ -0,0 +1,194 @@
+"""
+Per-database engine profiles: connection options, connect-time settings and upkeep jobs
+"""
+import logging
+import os
+import threading
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from backend.extensions import db
+from backend.utils.db_routing import REPLICA_BIND
+
+logger = logging.getLogger(__name__)
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 30000))
+SQLITE_PRAGMAS = (
+    # Readers no longer block the writer (or each other); persists in the file
+    ('journal_mode', 'WAL'),
+    # Durable across app crashes; only an OS crash can lose the last commits
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', SQLITE_BUSY_TIMEOUT_MS),
+    # Negative = KiB of page cache per connection
+    ('cache_size', -int(os.getenv('SQLITE_CACHE_SIZE_KB', 32768))),
+    ('mmap_size', int(os.getenv('SQLITE_MMAP_SIZE', 268435456))),
+    ('temp_store', 'MEMORY'),
+)
+# WAL size (pages) past which the periodic checkpoint truncates the file
+SQLITE_WAL_TRUNCATE_PAGES = int(os.getenv('SQLITE_WAL_TRUNCATE_PAGES', 10000))
+
+# Postgres: pool sizes are per engine per worker, so the server sees up to
+# workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections per engine
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 15000))
+
+def _is_memory_sqlite(uri: str) -> bool:
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+def normalize_database_url(url: str) -> str:
+    """Render/Heroku style postgres:// URLs are not accepted by SQLAlchemy"""
+    if url and url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+def _postgres_options(uri: str, read_only: bool = False) -> dict:
+    server_options = [f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"]
+    if read_only:
+        server_options.append("-c default_transaction_read_only=on")
+    connect_args = {
+        'options': ' '.join(server_options),
+        'connect_timeout': 5,
+        'application_name': 'roamiq-backend',
+    }
+    if uri.startswith('postgresql+psycopg:'):
+        # psycopg 3 prepares statements server-side after this many executions;
+        # psycopg2 has no equivalent, so only SQLAlchemy's compiled cache applies
+        connect_args['prepare_threshold'] = 5
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        # Recycle before managed Postgres / proxies drop idle connections
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True,
+        # Compiled SQL cache per engine (SQLAlchemy's default is 500)
+        'query_cache_size': int(os.getenv('DB_QUERY_CACHE_SIZE', 1200)),
+        'connect_args': connect_args,
+    }
+
+def engine_options(uri: str, read_only: bool = False) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database"""
+    if uri.startswith('sqlite') and not _is_memory_sqlite(uri):
+        # Local file, so no pre-ping: it would add a query per checkout for
+        # connections that cannot go stale. Each worker keeps a few
+        # connections open so the pragmas and page cache are reused.
+        return {
+            'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+            'poolclass': QueuePool,
+            'pool_size': int(os.getenv('SQLITE_POOL_SIZE', 5)),
+            'max_overflow': int(os.getenv('SQLITE_MAX_OVERFLOW', 10)),
+        }
+    if uri.startswith('sqlite'):
+        return {'connect_args': {'timeout': 30}}
+    if uri.startswith('postgresql'):
+        return _postgres_options(uri, read_only)
+    return {}
+
+def configure_engines(app):
+    """Engine options for the primary and, with DATABASE_REPLICA_URL, a read-replica bind.
+
+    Call before db.init_app. Reads are sent to the replica only inside
+    backend.utils.db_routing.replica_reads().
+    """
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+
+    replica_url = normalize_database_url(os.getenv('DATABASE_REPLICA_URL'))
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: {'url': replica_url, **engine_options(replica_url, read_only=True)}
+        }
+        logger.info("Read replica configured")
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+class SqliteMaintenance:
+    """
+    Periodic WAL checkpoint and PRAGMA optimize on a daemon thread.
+
+    A PASSIVE checkpoint copies committed pages back into the database
+    without waiting on readers; when the WAL has still grown past
+    SQLITE_WAL_TRUNCATE_PAGES a TRUNCATE checkpoint resets it, which briefly
+    waits for readers. Every worker runs its own copy; the work is
+    idempotent and cheap when there is nothing to do.
+    """
+
+    def __init__(self, engine, interval=300):
+        self.engine = engine
+        self.interval = interval
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def ensure_started(self):
+        """Start the job in this process; threads do not survive a worker fork"""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sqlite-maintenance', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning("SQLite maintenance failed: %s", e)
+
+    def run_once(self) -> dict:
+        """Checkpoint and optimize once; returns the checkpoint result"""
+        with self.engine.connect() as conn:
+            busy, wal_pages, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)").one()
+            mode = 'PASSIVE'
+            if wal_pages > SQLITE_WAL_TRUNCATE_PAGES:
+                busy, wal_pages, checkpointed = conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").one()
+                mode = 'TRUNCATE'
+            # Bounded ANALYZE of tables whose statistics have drifted
+            conn.exec_driver_sql("PRAGMA analysis_limit = 400")
+            conn.exec_driver_sql("PRAGMA optimize")
+        result = {'mode': mode, 'busy': bool(busy), 'wal_pages': wal_pages, 'checkpointed': checkpointed}
+        logger.debug("SQLite maintenance: %s", result)
+        return result
+
+def init_db_profile(app):
+    """Connect-time settings and upkeep for the app's engines; call after db.init_app"""
+    with app.app_context():
+        engines = dict(db.engines)
+    for engine in engines.values():
+        # Connections opened before a fork (e.g. gunicorn --preload) must not be
+        # shared with the children; they start with an empty pool instead.
+        os.register_at_fork(after_in_child=lambda engine=engine: engine.dispose(close=False))
+        if engine.dialect.name == 'sqlite' and not _is_memory_sqlite(str(engine.url)):
+            event.listen(engine, 'connect', _apply_sqlite_pragmas)
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not uri.startswith('sqlite') or _is_memory_sqlite(uri):
+        return
+    engine = engines[None]
+
+    interval = float(os.getenv('SQLITE_MAINTENANCE_INTERVAL', 300))
+    if interval > 0:
+        maintenance = SqliteMaintenance(engine, interval)
+        app.extensions['sqlite_maintenance'] = maintenance
+
+        @app.before_request
+        def start_sqlite_maintenance():
+            maintenance.ensure_started()
+
+    logger.info("SQLite profile applied (WAL, pool size %s)", engine.pool.size())
@@ -0,0 +1,97 @@
+"""
+Read-replica routing for db.session with read-your-writes stickiness
+"""
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+# How long after a user's write their reads stay on the primary; should exceed replica lag
+STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+
+_replica_reads: ContextVar[bool] = ContextVar('replica_reads', default=False)
+
+def _sticky_key(user_id) -> str:
+    return f"replica_sticky:{user_id}"
+
+def _current_user_id():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+def mark_user_write(user_id):
+    """Keep this user's reads on the primary until the replica has caught up"""
+    if user_id is None:
+        return
+    from backend.services.cache_service import cache_service
+    cache_service.set(_sticky_key(user_id), True, STICKY_SECONDS)
+
+def is_sticky(user_id) -> bool:
+    if user_id is None:
+        return False
+    from backend.services.cache_service import cache_service
+    return bool(cache_service.get(_sticky_key(user_id)))
+
+def _replica_configured() -> bool:
+    from flask import has_app_context
+    from backend.extensions import db
+    return has_app_context() and REPLICA_BIND in db.engines
+
+@contextmanager
+def replica_reads(user_id=None):
+    """Send this block's reads to the replica bind, if one is configured.
+
+    Usable as `with replica_reads():` or as a view/function decorator
+    `@replica_reads()`. Reads stay on the primary for a user who wrote in
+    the last DB_REPLICA_STICKY_SECONDS (user_id defaults to the JWT
+    identity), and for the rest of the session once it has flushed.
+    Without a replica bind this is a no-op and skips the stickiness lookup.
+    """
+    use_replica = _replica_configured() and not is_sticky(user_id if user_id is not None else _current_user_id())
+    token = _replica_reads.set(use_replica)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+class RoutingSession(Session):
+    """
+    db.session that sends reads inside replica_reads() to the replica bind.
+
+    Flushes, DML statements and every read after this session has written
+    go to the primary, so a request always sees its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and _replica_reads.get()
+            and not self._flushing
+            and not self.info.get('wrote')
+            and not getattr(clause, 'is_dml', False)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_write(session, flush_context):
+    # 'wrote' lasts for the session (one app context); 'unmarked' until the commit
+    session.info['wrote'] = True
+    session.info['unmarked'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_after_write(session):
+    if session.info.pop('unmarked', False) and REPLICA_BIND in session._db.engines:
+        try:
+            mark_user_write(_current_user_id())
+        except Exception as e:
+            logger.warning("Could not record replica stickiness: %s", e)
@@ -7,16 +7,6 @@ from functools import wraps
 from flask import jsonify, request
 from werkzeug.exceptions import HTTPException
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('backend_error.log'),
-        logging.StreamHandler()
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
 class APIError(Exception):
@@ -36,17 +26,17 @@ def handle_api_error(error):
     if error.payload:
         response.update(error.payload)
     
-    logger.error(f"API Error: {error.message} - Status: {error.status_code}")
+    logger.error("API Error: %s - Status: %s", error.message, error.status_code)
     return jsonify(response), error.status_code
 
 def handle_http_exception(error):
     """Handle HTTP exceptions"""
-    logger.error(f"HTTP Exception: {error.description} - Status: {error.code}")
+    logger.error("HTTP Exception: %s - Status: %s", error.description, error.code)
     return jsonify({'error': error.description}), error.code
 
 def handle_generic_exception(error):
     """Handle unexpected exceptions"""
-    logger.error(f"Unexpected error: {str(error)}\n{traceback.format_exc()}")
+    logger.error("Unexpected error: %s\n%s", error, traceback.format_exc())
     return jsonify({
         'success': False,
         'error': 'Internal server error'
@@ -54,7 +44,7 @@ def handle_generic_exception(error):
 
 def log_request_info():
     """Log incoming request information"""
-    logger.info(f"{request.method} {request.path} - IP: {request.remote_addr}")
+    logger.info("%s %s - IP: %s", request.method, request.path, request.remote_addr)
 
 import inspect
 import asyncio
@@ -0,0 +1,77 @@
+"""
+Conditional GET and per-user response caching for read endpoints
+"""
+import hashlib
+import logging
+from functools import wraps
+from typing import Callable, Optional
+from flask import request, make_response, Response
+from flask_jwt_extended import get_jwt_identity
+from backend.services.cache_service import cache_service, user_tag
+
+logger = logging.getLogger(__name__)
+
+# Response headers that are part of the payload (paging) and are stored and
+# replayed with a cached body
+CACHED_HEADERS = ('X-Next-Cursor',)
+
+def _compute_etag(user_id, version: str, extra: str = '') -> str:
+    """Strong ETag for the current URL as seen by this user at this data version"""
+    raw = f"{user_id}|{version}|{extra}|{request.full_path}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def _finalize(response, etag: str):
+    response.set_etag(etag)
+    # Per-user payloads: browsers may keep them but must revalidate every time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+    return response
+
+def conditional_cache(ttl_seconds: int = 86400, cache_body: bool = True,
+                      vary: Optional[Callable[[], str]] = None):
+    """Serve 304s and cached bodies for per-user GET endpoints.
+
+    The ETag is derived from the user's cache tag version, which every write
+    path bumps through cache_service.invalidate_user, so a matching
+    If-None-Match is answered without running the view or loading any rows.
+    Responses that also depend on something other than the user's rows
+    (today's date, shared reference data) pass vary, a callable whose
+    result is mixed into the ETag. Must be applied below @jwt_required().
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user_id = get_jwt_identity()
+            tag = user_tag(user_id)
+            etag = _compute_etag(user_id, cache_service.get_tag_version(tag), vary() if vary else '')
+
+            if request.if_none_match.contains(etag):
+                return _finalize(Response(status=304), etag)
+
+            body_key = f"http_response:{etag}"
+            if cache_body:
+                cached = cache_service.get(body_key)
+                # Entries written before headers were cached are misses
+                if cached and 'headers' in cached:
+                    response = Response(cached['body'], status=200, mimetype=cached['mimetype'])
+                    response.headers.update(cached['headers'])
+                    return _finalize(response, etag)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if cache_body:
+                cache_service.set(
+                    body_key,
+                    {
+                        'body': response.get_data(as_text=True),
+                        'mimetype': response.mimetype,
+                        'headers': {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+                    },
+                    ttl_seconds,
+                    tags=[tag]
+                )
+            return _finalize(response, etag)
+        return decorated_function
+    return decorator
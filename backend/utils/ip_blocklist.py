@@ -0,0 +1,173 @@
+"""
+IP blocklist with O(1) exact lookups, CIDR ranges and lazy expiry
+"""
+import heapq
+import ipaddress
+import logging
+import math
+import socket
+import threading
+import time
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class _PrefixTrie:
+    """Binary trie over address bits; a node carrying an expiry blocks its whole subtree"""
+
+    def __init__(self, bits):
+        self.bits = bits
+        # Nodes are [child0, child1, expiry]
+        self.root = [None, None, None]
+        self.size = 0
+
+    def insert(self, network_int, prefixlen, expiry):
+        node = self.root
+        for i in range(prefixlen):
+            bit = (network_int >> (self.bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        if node[2] is None:
+            self.size += 1
+        node[2] = expiry if node[2] is None else max(node[2], expiry)
+
+    def remove(self, network_int, prefixlen, expiry=None):
+        """Clear a prefix; with expiry given, only if it has not been extended since"""
+        node = self.root
+        for i in range(prefixlen):
+            node = node[(network_int >> (self.bits - 1 - i)) & 1]
+            if node is None:
+                return
+        if node[2] is not None and (expiry is None or node[2] <= expiry):
+            node[2] = None
+            self.size -= 1
+
+    def match(self, address_int, now):
+        node = self.root
+        shift = self.bits - 1
+        while node is not None:
+            if node[2] is not None and node[2] > now:
+                return True
+            if shift < 0:
+                return False
+            node = node[(address_int >> shift) & 1]
+            shift -= 1
+        return False
+
+class IPBlocklist:
+    """
+    Blocked addresses and networks with expiry.
+
+    Single addresses live in a dict, so the common check is one hash lookup.
+    Networks live in a per-family prefix trie walked only when non-empty.
+    Expiries sit in a min-heap and are purged lazily from the front, so no
+    request ever pays for a full scan of the list.
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._tries = {4: _PrefixTrie(32), 6: _PrefixTrie(128)}
+        self._expiries = []
+        self._lock = threading.Lock()
+
+    def block(self, target: str, duration: Optional[float] = 3600) -> bool:
+        """Block an address or CIDR network; duration None blocks until restart"""
+        expiry = math.inf if duration is None else time.time() + duration
+        try:
+            if '/' in target:
+                network = ipaddress.ip_network(target.strip(), strict=False)
+                if network.prefixlen == network.max_prefixlen:
+                    return self._block_address(str(network.network_address), expiry)
+                return self._block_network(network, expiry)
+            return self._block_address(str(ipaddress.ip_address(target.strip())), expiry)
+        except ValueError:
+            logger.warning("Ignoring invalid blocklist entry: %r", target)
+            return False
+
+    def unblock(self, target: str):
+        """Remove an address or network regardless of its expiry"""
+        try:
+            if '/' in target:
+                network = ipaddress.ip_network(target.strip(), strict=False)
+                address = str(network.network_address) if network.prefixlen == network.max_prefixlen else None
+            else:
+                network, address = None, str(ipaddress.ip_address(target.strip()))
+        except ValueError:
+            logger.warning("Ignoring invalid blocklist entry: %r", target)
+            return
+        with self._lock:
+            if address is not None:
+                self._exact.pop(address, None)
+            else:
+                self._tries[network.version].remove(int(network.network_address), network.prefixlen)
+
+    def bulk_import(self, entries: Iterable[str], duration: Optional[float] = None) -> int:
+        """Block every address/network in entries; blank lines and '#' comments are skipped"""
+        imported = 0
+        for line in entries:
+            entry = line.split('#', 1)[0].strip()
+            if entry and self.block(entry, duration):
+                imported += 1
+        logger.info("Imported %d blocklist entries", imported)
+        return imported
+
+    def load_file(self, path: str, duration: Optional[float] = None) -> int:
+        """Import a plain-text block list, one address or CIDR per line"""
+        with open(path) as f:
+            return self.bulk_import(f, duration)
+
+    def is_blocked(self, ip: str) -> bool:
+        """Check if an address is blocked directly or by a covering network"""
+        if not ip:
+            return False
+        now = time.time()
+        with self._lock:
+            if self._expiries and self._expiries[0][0] <= now:
+                self._purge(now)
+
+            expiry = self._exact.get(ip)
+            if expiry is not None and expiry > now:
+                return True
+
+            if not (self._tries[4].size or self._tries[6].size):
+                return False
+        # inet_pton is several times cheaper than constructing an ipaddress object
+        try:
+            version, address_int = 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        except OSError:
+            try:
+                version, address_int = 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+            except OSError:
+                return False
+        with self._lock:
+            return self._tries[version].match(address_int, now)
+
+    def __len__(self):
+        return len(self._exact) + self._tries[4].size + self._tries[6].size
+
+    def _block_address(self, ip, expiry):
+        with self._lock:
+            current = self._exact.get(ip)
+            if current is None or expiry > current:
+                self._exact[ip] = expiry
+                if expiry != math.inf:
+                    heapq.heappush(self._expiries, (expiry, ip, None))
+        return True
+
+    def _block_network(self, network, expiry):
+        with self._lock:
+            self._tries[network.version].insert(int(network.network_address), network.prefixlen, expiry)
+            if expiry != math.inf:
+                heapq.heappush(self._expiries, (expiry, str(network), network))
+        return True
+
+    def _purge(self, now):
+        """Drop entries whose expiry has passed; heap entries superseded by a later block are skipped"""
+        while self._expiries and self._expiries[0][0] <= now:
+            expiry, key, network = heapq.heappop(self._expiries)
+            if network is None:
+                if self._exact.get(key) == expiry:
+                    del self._exact[key]
+            else:
+                self._tries[network.version].remove(int(network.network_address), network.prefixlen, expiry)
@@ -0,0 +1,163 @@
+"""
+Queue-based logging pipeline: requests enqueue records, one background thread formats and writes them
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_listener = None
+_configure_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        trace_id = getattr(record, 'trace_id', None)
+        if trace_id:
+            entry['trace_id'] = trace_id
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry['suppressed'] = suppressed
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{message} (+{suppressed} similar suppressed)" if suppressed else message
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps only a fraction of DEBUG records; INFO and above always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+class RateLimitFilter(logging.Filter):
+    """
+    Caps repeats of the same WARNING/ERROR line (same logger, call site and
+    message template) to `burst` per `period` seconds. The first record let
+    through after a suppressed run carries the number dropped.
+    """
+
+    def __init__(self, burst: int = 5, period: float = 60.0, max_keys: int = 10000):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.max_keys = max_keys
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.pathname, record.lineno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                if len(self._windows) >= self.max_keys:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                record.suppressed = 0
+                return True
+            window[2] += 1
+            return False
+
+class _ContextQueueHandler(QueueHandler):
+    """
+    Enqueues records with their message rendered but not formatted.
+
+    The stock QueueHandler formats in the caller's thread so records can be
+    pickled; our queue is in-process, so formatting (JSON, timestamps,
+    tracebacks) is left to the listener. The msg % args merge happens here:
+    args may be mutable objects or ORM instances that change, or expire
+    with their session, before the listener gets to them. Context that only
+    exists on the calling thread (the trace id) is captured here too. The
+    filters have already run on the unmerged template.
+    """
+
+    def prepare(self, record):
+        from backend.utils.tracing import current_span
+        record.msg = record.getMessage()
+        record.args = None
+        record.trace_id = current_span().trace_id
+        return record
+
+def _build_sink(log_format: str):
+    log_file = os.getenv('LOG_FILE')
+    if log_file:
+        sink = RotatingFileHandler(log_file, maxBytes=10000000, backupCount=5)
+    else:
+        sink = logging.StreamHandler(sys.stderr)
+    sink.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+    return sink
+
+def configure_logging():
+    """Route every logger through one queue and one sink.
+
+    LOG_LEVEL (default INFO), LOG_FORMAT json|text (default json),
+    LOG_FILE (rotating file; stderr when unset), LOG_DEBUG_SAMPLE_RATE
+    (fraction of DEBUG records kept, default 1.0) and LOG_RATE_LIMIT_BURST /
+    LOG_RATE_LIMIT_PERIOD for repeated warnings and errors.
+    Safe to call more than once.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        log_queue = queue.Queue(-1)
+        handler = _ContextQueueHandler(log_queue)
+        handler.addFilter(DebugSamplingFilter(float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 1.0))))
+        handler.addFilter(RateLimitFilter(
+            burst=int(os.getenv('LOG_RATE_LIMIT_BURST', 5)),
+            period=float(os.getenv('LOG_RATE_LIMIT_PERIOD', 60))
+        ))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+        _listener = QueueListener(log_queue, _build_sink(os.getenv('LOG_FORMAT', 'json').lower()))
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
@@ -0,0 +1,205 @@
+"""
+Event-loop lag and blocking-call detection for async views
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from flask import has_request_context, request
+from backend.utils.monitoring import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_HANDLE_ADDRESS = re.compile(r' at 0x[0-9a-f]+')
+
+def _short_path(filename):
+    """Project-relative path for our own files, unchanged for libraries"""
+    if filename.startswith(_BACKEND_DIR):
+        return os.path.relpath(filename, os.path.dirname(_BACKEND_DIR))
+    return filename
+
+class _LoopState:
+    """Heartbeat bookkeeping for one event loop running an async view"""
+    __slots__ = ('thread_id', 'endpoint', 'deadline', 'site')
+
+    def __init__(self, thread_id, endpoint, deadline):
+        self.thread_id = thread_id
+        self.endpoint = endpoint
+        # When the next heartbeat tick is due; a loop past it by more than the
+        # threshold is blocked
+        self.deadline = deadline
+        # Blocking site captured for the current stall, if any
+        self.site = None
+
+class _SlowCallbackHandler(logging.Handler):
+    """Feeds asyncio debug-mode 'Executing <handle> took N seconds' warnings into the report"""
+
+    def __init__(self, monitor):
+        super().__init__(logging.WARNING)
+        self.monitor = monitor
+
+    def emit(self, record):
+        if isinstance(record.msg, str) and record.msg.startswith('Executing') and len(record.args or ()) == 2:
+            handle, seconds = record.args
+            self.monitor.record_slow_callback(_HANDLE_ADDRESS.sub('', str(handle)), float(seconds))
+
+class LoopLagMonitor:
+    """
+    Opt-in lag monitor for the event loops Flask runs async views on.
+
+    A heartbeat task on each loop sleeps for `interval` and records how late
+    it wakes up. A watchdog thread notices loops whose heartbeat is overdue by
+    more than `threshold` and captures the loop thread's stack at that moment,
+    which points at the blocking call itself rather than at the task that
+    eventually resumed. Stalls are aggregated by application call site.
+    """
+
+    def __init__(self, interval=0.05, threshold=0.1, max_sites=100, asyncio_debug=False):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_sites = max_sites
+        self.asyncio_debug = asyncio_debug
+        self.enabled = False
+        self._states = {}
+        self._sites = {}
+        self._lock = threading.Lock()
+        self._watchdog = None
+
+    def install(self, app):
+        """Run every async view of the app under the monitor"""
+        original = app.async_to_sync
+
+        def async_to_sync(func):
+            async def monitored(*args, **kwargs):
+                return await self.watch(func(*args, **kwargs))
+            return original(monitored)
+
+        app.async_to_sync = async_to_sync
+        if self.asyncio_debug:
+            logging.getLogger('asyncio').addHandler(_SlowCallbackHandler(self))
+        self.enabled = True
+
+    async def watch(self, coro):
+        """Await coro while measuring the lag of the running loop"""
+        loop = asyncio.get_running_loop()
+        if self.asyncio_debug:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+
+        endpoint = (request.endpoint if has_request_context() else None) or 'unknown'
+        state = _LoopState(threading.get_ident(), endpoint, time.monotonic() + self.interval)
+        self._ensure_watchdog()
+        with self._lock:
+            self._states[id(state)] = state
+        heartbeat = loop.create_task(self._heartbeat(state))
+        try:
+            return await coro
+        finally:
+            heartbeat.cancel()
+            with self._lock:
+                self._states.pop(id(state), None)
+            self._end_stall(state, time.monotonic() - state.deadline)
+
+    async def _heartbeat(self, state):
+        while True:
+            state.deadline = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - state.deadline)
+            EVENT_LOOP_LAG.labels(endpoint=state.endpoint).observe(lag)
+            self._end_stall(state, lag)
+
+    def _ensure_watchdog(self):
+        if self._watchdog and self._watchdog.is_alive():
+            return
+        with self._lock:
+            if self._watchdog and self._watchdog.is_alive():
+                return
+            self._watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.threshold / 2)
+            now = time.monotonic()
+            with self._lock:
+                stalled = [s for s in self._states.values() if s.site is None and now - s.deadline > self.threshold]
+            if not stalled:
+                continue
+            frames = sys._current_frames()
+            for state in stalled:
+                frame = frames.get(state.thread_id)
+                if frame is not None:
+                    state.site = self._record_stall(state, frame)
+
+    def _record_stall(self, state, frame):
+        stack = traceback.extract_stack(frame, limit=40)
+        # Attribute the stall to the innermost frame in our own code
+        app_frame = next(
+            (f for f in reversed(stack) if f.filename.startswith(_BACKEND_DIR) and f.filename != __file__),
+            stack[-1]
+        )
+        key = ('stack', app_frame.filename, app_frame.lineno)
+        EVENT_LOOP_STALLS.labels(endpoint=state.endpoint).inc()
+        with self._lock:
+            site = self._get_site(key, f"{_short_path(app_frame.filename)}:{app_frame.lineno} in {app_frame.name}")
+            site['count'] += 1
+            site['endpoints'].add(state.endpoint)
+            site['blocked_in'] = f"{stack[-1].filename}:{stack[-1].lineno} in {stack[-1].name}"
+            site['stack'] = traceback.format_list(stack)
+        logger.warning("Event loop blocked in %s at %s", state.endpoint, site['site'])
+        return site
+
+    def _end_stall(self, state, lag):
+        site = state.site
+        if site is None:
+            return
+        state.site = None
+        with self._lock:
+            site['total_seconds'] += lag
+            site['max_seconds'] = max(site['max_seconds'], lag)
+
+    def record_slow_callback(self, handle: str, seconds: float):
+        with self._lock:
+            site = self._get_site(('asyncio', handle), f"asyncio callback {handle}")
+            site['count'] += 1
+            site['total_seconds'] += seconds
+            site['max_seconds'] = max(site['max_seconds'], seconds)
+
+    def _get_site(self, key, label):
+        site = self._sites.get(key)
+        if site is None:
+            if len(self._sites) >= self.max_sites:
+                key, label = ('other',), 'other (site limit reached)'
+                site = self._sites.get(key)
+            if site is None:
+                site = {'site': label, 'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                        'endpoints': set(), 'blocked_in': None, 'stack': None}
+                self._sites[key] = site
+        return site
+
+    def report(self, limit: int = 20):
+        """Blocking call sites ranked by total time the loop spent blocked"""
+        with self._lock:
+            sites = sorted(self._sites.values(), key=lambda s: s['total_seconds'], reverse=True)[:limit]
+            return [{**site, 'endpoints': sorted(site['endpoints'])} for site in sites]
+
+    def reset(self):
+        with self._lock:
+            self._sites.clear()
+
+loop_monitor = LoopLagMonitor(
+    interval=float(os.getenv('LOOP_LAG_INTERVAL_MS', 50)) / 1000,
+    threshold=float(os.getenv('LOOP_LAG_THRESHOLD_MS', 100)) / 1000,
+    asyncio_debug=os.getenv('LOOP_LAG_ASYNCIO_DEBUG', '').lower() in ('1', 'true', 'yes')
+)
+
+def init_loop_monitor(app):
+    """Install the loop monitor when LOOP_LAG_MONITOR is set"""
+    if os.getenv('LOOP_LAG_MONITOR', '').lower() in ('1', 'true', 'yes'):
+        loop_monitor.install(app)
+        logger.info("Event loop lag monitor enabled")
@@ -1,34 +1,163 @@
 """
 Application monitoring and metrics collection
 """
+import gc
+import os
 import time
 import logging
+import threading
+from contextlib import contextmanager
 from functools import wraps
 from flask import request, g
-from prometheus_client import Counter, Histogram, Gauge, generate_latest
+from prometheus_client import (
+    Counter, Histogram, Gauge, CollectorRegistry, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+)
 import psutil
+from backend.utils.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+# Under gunicorn each worker is its own process. With PROMETHEUS_MULTIPROC_DIR set
+# (gunicorn.conf.py does this) every worker writes its samples to files in that
+# directory and /metrics aggregates them, whichever worker serves the scrape.
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
 # Prometheus metrics
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP requests', ['method', 'endpoint', 'status'])
 REQUEST_DURATION = Histogram('http_request_duration_seconds', 'HTTP request duration', ['method', 'endpoint'])
-ACTIVE_USERS = Gauge('active_users_total', 'Number of active users')
+ACTIVE_USERS = Gauge('active_users_total', 'Number of active users', multiprocess_mode='livesum')
 AI_REQUESTS = Counter('ai_requests_total', 'Total AI requests', ['model', 'status'])
 AI_RESPONSE_TIME = Histogram('ai_response_duration_seconds', 'AI response time', ['model'])
+CHAT_STAGE_DURATION = Histogram(
+    'ai_chat_stage_duration_seconds', 'Time spent in each stage of a chat response',
+    ['stage', 'model', 'provider', 'tool'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 20, 40)
+)
+EVENT_LOOP_LAG = Histogram(
+    'event_loop_lag_seconds', 'Event loop scheduling delay in async views', ['endpoint'],
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+)
+EVENT_LOOP_STALLS = Counter('event_loop_stalls_total', 'Event loop blocked past the stall threshold', ['endpoint'])
 DATABASE_QUERIES = Counter('database_queries_total', 'Total database queries', ['operation'])
+DB_QUERY_DURATION = Histogram(
+    'database_query_duration_seconds', 'Database statement execution time', ['operation'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+REQUEST_QUERY_COUNT = Histogram(
+    'http_request_db_queries', 'Database statements issued per request', ['endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200)
+)
+QUERY_HEAVY_REQUESTS = Counter(
+    'http_query_heavy_requests_total', 'Requests over the query-count or repeated-query threshold', ['endpoint']
+)
 CACHE_HITS = Counter('cache_hits_total', 'Cache hits', ['cache_type'])
 CACHE_MISSES = Counter('cache_misses_total', 'Cache misses', ['cache_type'])
 
-# System metrics
-CPU_USAGE = Gauge('system_cpu_usage_percent', 'CPU usage percentage')
-MEMORY_USAGE = Gauge('system_memory_usage_bytes', 'Memory usage in bytes')
-DISK_USAGE = Gauge('system_disk_usage_percent', 'Disk usage percentage')
+# System metrics: host-wide, so any live worker's latest sample is the value
+CPU_USAGE = Gauge('system_cpu_usage_percent', 'CPU usage percentage', multiprocess_mode='livemostrecent')
+MEMORY_USAGE = Gauge('system_memory_usage_bytes', 'Memory usage in bytes', multiprocess_mode='livemostrecent')
+DISK_USAGE = Gauge('system_disk_usage_percent', 'Disk usage percentage', multiprocess_mode='livemostrecent')
+
+# Process metrics: one series per live worker (pid label in multiprocess mode)
+PROCESS_RSS = Gauge('app_process_rss_bytes', 'Resident set size of this worker', multiprocess_mode='liveall')
+PROCESS_OPEN_FDS = Gauge('app_process_open_fds', 'Open file descriptors of this worker', multiprocess_mode='liveall')
+PROCESS_THREADS = Gauge('app_process_threads', 'Threads in this worker', multiprocess_mode='liveall')
+GC_TRACKED_OBJECTS = Gauge('app_gc_tracked_objects', 'Objects awaiting collection per GC generation', ['generation'],
+                           multiprocess_mode='liveall')
+GC_COLLECTIONS = Gauge('app_gc_collections', 'Collections run per GC generation', ['generation'],
+                       multiprocess_mode='liveall')
+
+class SystemSampler:
+    """
+    Samples system and process resources on a daemon thread.
+
+    Each pass builds a new snapshot dict and swaps it in with a single
+    assignment, so readers (/metrics, /api/health) never block on psutil and
+    never see a half-updated snapshot.
+    """
+
+    def __init__(self, interval=15):
+        self.interval = interval
+        self.snapshot = {}
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def ensure_started(self):
+        """Start the sampler in this process; threads do not survive a worker fork"""
+        if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._process = psutil.Process()
+            # The first non-blocking cpu_percent call only sets the baseline
+            psutil.cpu_percent(interval=None)
+            self.sample()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='system-sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Take one sample and publish it"""
+        try:
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
+            with self._process.oneshot():
+                rss = self._process.memory_info().rss
+                threads = self._process.num_threads()
+                open_fds = self._process.num_fds() if hasattr(self._process, 'num_fds') else None
+            gc_counts = gc.get_count()
+            gc_stats = gc.get_stats()
+
+            snapshot = {
+                'timestamp': time.time(),
+                'cpu_percent': psutil.cpu_percent(interval=None),
+                'memory_used': memory.used,
+                'memory_percent': memory.percent,
+                'disk_percent': disk.percent,
+                'process': {
+                    'rss_bytes': rss,
+                    'open_fds': open_fds,
+                    'threads': threads,
+                },
+                'gc': {
+                    'tracked_objects': list(gc_counts),
+                    'collections': [stat['collections'] for stat in gc_stats],
+                },
+            }
+        except Exception as e:
+            logger.error("Error sampling system metrics: %s", e)
+            return
+
+        CPU_USAGE.set(snapshot['cpu_percent'])
+        MEMORY_USAGE.set(snapshot['memory_used'])
+        DISK_USAGE.set(snapshot['disk_percent'])
+        PROCESS_RSS.set(rss)
+        PROCESS_THREADS.set(threads)
+        if open_fds is not None:
+            PROCESS_OPEN_FDS.set(open_fds)
+        for generation, count in enumerate(gc_counts):
+            GC_TRACKED_OBJECTS.labels(generation=str(generation)).set(count)
+        for generation, collections in enumerate(snapshot['gc']['collections']):
+            GC_COLLECTIONS.labels(generation=str(generation)).set(collections)
+
+        self.snapshot = snapshot
 
 class PerformanceMonitor:
     def __init__(self):
         self.start_time = time.time()
         self.active_requests = 0
+        self.sampler = SystemSampler(interval=float(os.getenv('SYSTEM_METRICS_INTERVAL', 15)))
     
     def track_request(self, f):
         """Decorator to track request metrics"""
@@ -86,6 +215,19 @@ class PerformanceMonitor:
         
         return AIRequestTracker(model)
     
+    @contextmanager
+    def track_chat_stage(self, stage: str, model: str = '', provider: str = '', tool: str = ''):
+        """Time one stage of a chat response (history, rag, user_lookup, llm, tool, persist)"""
+        start_time = time.perf_counter()
+        span_name = f"chat.{stage}" + (f" {tool}" if tool else '')
+        try:
+            with tracer.span(span_name, model=model, provider=provider, **({'tool': tool} if tool else {})):
+                yield
+        finally:
+            CHAT_STAGE_DURATION.labels(
+                stage=stage, model=model, provider=provider, tool=tool
+            ).observe(time.perf_counter() - start_time)
+    
     def track_database_query(self, operation: str):
         """Track database query"""
         DATABASE_QUERIES.labels(operation=operation).inc()
@@ -99,26 +241,17 @@ class PerformanceMonitor:
         CACHE_MISSES.labels(cache_type=cache_type).inc()
     
     def update_system_metrics(self):
-        """Update system resource metrics"""
-        try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            CPU_USAGE.set(cpu_percent)
-            
-            # Memory usage
-            memory = psutil.virtual_memory()
-            MEMORY_USAGE.set(memory.used)
-            
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            DISK_USAGE.set(disk.percent)
-            
-        except Exception as e:
-            logger.error(f"Error updating system metrics: {e}")
+        """Refresh system resource metrics immediately (non-blocking)"""
+        self.sampler.ensure_started()
+        self.sampler.sample()
     
     def get_metrics(self):
-        """Get current metrics as text"""
-        self.update_system_metrics()
+        """Get current metrics as text, aggregated across workers in multiprocess mode"""
+        self.sampler.ensure_started()
+        if MULTIPROC_DIR:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return generate_latest(registry)
         return generate_latest()
     
     def get_health_status(self):
@@ -126,15 +259,18 @@ class PerformanceMonitor:
         try:
             # Check database connection
             from backend.extensions import db
-            db.session.execute('SELECT 1')
+            from sqlalchemy import text
+            db.session.execute(text('SELECT 1'))
             db_status = 'healthy'
         except:
             db_status = 'unhealthy'
         
-        # Check system resources
-        cpu_percent = psutil.cpu_percent()
-        memory_percent = psutil.virtual_memory().percent
-        disk_percent = psutil.disk_usage('/').percent
+        # System resources come from the sampler's last snapshot
+        self.sampler.ensure_started()
+        snapshot = self.sampler.snapshot
+        cpu_percent = snapshot.get('cpu_percent', 0.0)
+        memory_percent = snapshot.get('memory_percent', 0.0)
+        disk_percent = snapshot.get('disk_percent', 0.0)
         
         overall_status = 'healthy'
         if cpu_percent > 90 or memory_percent > 90 or disk_percent > 90:
@@ -150,8 +286,10 @@ class PerformanceMonitor:
             'system': {
                 'cpu_percent': cpu_percent,
                 'memory_percent': memory_percent,
-                'disk_percent': disk_percent
+                'disk_percent': disk_percent,
+                'sampled_at': snapshot.get('timestamp')
             },
+            'process': snapshot.get('process', {}),
             'active_requests': self.active_requests
         }
 
@@ -161,6 +299,11 @@ monitor = PerformanceMonitor()
 def init_monitoring(app):
     """Initialize monitoring for Flask app"""
     
+    @app.before_request
+    def start_sampler():
+        # Started lazily so each forked worker gets its own sampler thread
+        monitor.sampler.ensure_started()
+    
     @app.before_request
     def before_request():
         g.start_time = time.time()
@@ -185,11 +328,12 @@ def init_monitoring(app):
     @app.route('/metrics')
     def metrics():
         """Prometheus metrics endpoint"""
-        return monitor.get_metrics(), 200, {'Content-Type': 'text/plain'}
+        return monitor.get_metrics(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
     
-    @app.route('/api/health')
-    def health():
-        """Health check endpoint"""
-        return monitor.get_health_status()
+    @app.route('/api/health/ready')
+    def readiness():
+        """Readiness check: database and resource status; /api/health stays a cheap liveness probe"""
+        status = monitor.get_health_status()
+        return status, 503 if status['status'] == 'unhealthy' else 200
     
     logger.info("Monitoring initialized")
\ No newline at end of file
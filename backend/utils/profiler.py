@@ -0,0 +1,246 @@
+"""
+On-demand statistical profiling for production workers
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from flask import g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from backend.services.cache_service import cache_service
+from backend.utils.admin import is_admin
+
+logger = logging.getLogger(__name__)
+
+MAX_PROFILE_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', 60))
+MIN_INTERVAL_SECONDS = 0.001
+# How long background profile results and request reports stay available
+PROFILE_RESULT_TTL_SECONDS = 3600
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is already running in this worker"""
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread in the process at a fixed interval.
+
+    Sampling only reads sys._current_frames(), so the profiled code runs at
+    full speed; cost is paid by the profiling thread and grows with the
+    sampling rate. Only one profile runs at a time per worker.
+
+    start() samples on a background thread so no request (and no worker
+    timeout) waits on it; the result is stored in the shared cache under
+    the returned id, where fetch() finds it from any worker.
+    """
+
+    def __init__(self):
+        self._running = threading.Lock()
+
+    def profile(self, seconds: float, interval: float = 0.005) -> Counter:
+        """Sample for `seconds` on the calling thread; returns a Counter of (thread name, frames...) stacks"""
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        try:
+            return self._sample(seconds, interval)
+        finally:
+            self._running.release()
+
+    def start(self, seconds: float, interval: float = 0.005) -> str:
+        """Begin a background profile; returns its id for fetch()"""
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        profile_id = uuid.uuid4().hex
+        try:
+            cache_service.set(_profile_key(profile_id), {'status': 'running', 'pid': os.getpid()},
+                              PROFILE_RESULT_TTL_SECONDS)
+            threading.Thread(
+                target=self._run_in_background, args=(profile_id, seconds, interval),
+                name='sampling-profiler', daemon=True
+            ).start()
+        except Exception:
+            self._running.release()
+            raise
+        return profile_id
+
+    def fetch(self, profile_id: str):
+        """{'status': 'running' | 'done' | 'failed', ...} for a started profile, or None.
+
+        Finished profiles carry 'stacks' as a Counter, like profile() returns.
+        """
+        result = cache_service.get(_profile_key(profile_id))
+        if result and result.get('status') == 'done':
+            # Stored as JSON-friendly lists; frames must be tuples again to be hashable
+            result['stacks'] = Counter({
+                (stack[0],) + tuple(tuple(frame) for frame in stack[1:]): count
+                for stack, count in result['stacks']
+            })
+        return result
+
+    def _run_in_background(self, profile_id, seconds, interval):
+        try:
+            stacks = self._sample(seconds, interval)
+            result = {
+                'status': 'done', 'pid': os.getpid(), 'interval': max(interval, MIN_INTERVAL_SECONDS),
+                'stacks': [[list(stack), count] for stack, count in stacks.items()],
+            }
+        except Exception as e:
+            logger.exception("Background profile %s failed", profile_id)
+            result = {'status': 'failed', 'pid': os.getpid(), 'error': str(e)}
+        try:
+            cache_service.set(_profile_key(profile_id), result, PROFILE_RESULT_TTL_SECONDS)
+        finally:
+            self._running.release()
+
+    def _sample(self, seconds: float, interval: float) -> Counter:
+        seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+        interval = max(interval, MIN_INTERVAL_SECONDS)
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stacks[(names.get(thread_id, str(thread_id)),) + _frame_stack(frame)] += 1
+            time.sleep(interval)
+        return stacks
+
+    @property
+    def busy(self) -> bool:
+        return self._running.locked()
+
+def _profile_key(profile_id: str) -> str:
+    return f"worker_profile:{profile_id}"
+
+def _request_profile_key(profile_id: str) -> str:
+    return f"request_profile:{profile_id}"
+
+def _frame_stack(frame):
+    """Frames root-first as (function, file, first line) tuples"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+def to_collapsed(stacks: Counter) -> str:
+    """Brendan Gregg collapsed-stack format, as read by flamegraph.pl and speedscope"""
+    lines = []
+    for stack, count in stacks.most_common():
+        thread, frames = stack[0], stack[1:]
+        names = [thread] + [f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in frames]
+        lines.append(f"{';'.join(n.replace(';', ':') for n in names)} {count}")
+    return '\n'.join(lines) + '\n'
+
+def to_speedscope(stacks: Counter, interval: float, name: str = 'RoamIQ worker profile') -> dict:
+    """speedscope file format: one sampled profile per thread"""
+    frame_index = {}
+    frames = []
+    profiles = {}
+    for stack, count in stacks.items():
+        thread, stack_frames = stack[0], stack[1:]
+        indexes = []
+        for frame in stack_frames:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            indexes.append(frame_index[frame])
+        profile = profiles.setdefault(thread, {
+            'type': 'sampled', 'name': thread, 'unit': 'seconds',
+            'startValue': 0, 'endValue': 0, 'samples': [], 'weights': []
+        })
+        profile['samples'].append(indexes)
+        profile['weights'].append(count * interval)
+        profile['endValue'] += count * interval
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'roamiq',
+        'shared': {'frames': frames},
+        'profiles': list(profiles.values()),
+    }
+
+sampling_profiler = SamplingProfiler()
+
+# Only one cProfile can be active per process
+_request_profile_active = threading.Lock()
+
+def get_request_profile(profile_id: str):
+    """Report of an X-Profile request from any worker, or None once expired"""
+    return cache_service.get(_request_profile_key(profile_id))
+
+def init_request_profiling(app):
+    """Per-request cProfile for admins sending `X-Profile: 1`.
+
+    The response carries X-Profile-Id; the pstats report is stored in the
+    shared cache and available from /api/admin/profile/requests/<id> on any
+    worker for PROFILE_RESULT_TTL_SECONDS. cProfile only follows the request
+    thread, so the body of an async view shows up as time spent waiting on
+    its event loop. One request per worker is profiled at a time; while
+    one is, others get `X-Profile-Skipped: busy` instead.
+    """
+    @app.before_request
+    def start_request_profile():
+        if request.headers.get('X-Profile') != '1':
+            return
+        try:
+            verify_jwt_in_request(optional=True)
+        except Exception:
+            return
+        if not is_admin(get_jwt_identity()):
+            return
+        if not _request_profile_active.acquire(blocking=False):
+            g.request_profile_skipped = True
+            return
+        g.request_profiler = cProfile.Profile()
+        try:
+            g.request_profiler.enable()
+        except ValueError:
+            # Some other profiler (not ours) is active in this process
+            g.pop('request_profiler')
+            _request_profile_active.release()
+            g.request_profile_skipped = True
+
+    @app.teardown_request
+    def release_request_profile(exc):
+        # after_request is skipped on unhandled errors; never leave the lock held
+        profiler = g.pop('request_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _request_profile_active.release()
+
+    @app.after_request
+    def finish_request_profile(response):
+        if g.pop('request_profile_skipped', False):
+            response.headers['X-Profile-Skipped'] = 'busy'
+            return response
+        profiler = g.pop('request_profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        _request_profile_active.release()
+
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats('cumulative').print_stats(50)
+        profile_id = uuid.uuid4().hex
+        cache_service.set(_request_profile_key(profile_id), {
+            'endpoint': request.endpoint,
+            'path': request.full_path,
+            'pid': os.getpid(),
+            'total_seconds': stats.total_tt,
+            'report': output.getvalue(),
+        }, PROFILE_RESULT_TTL_SECONDS)
+
+        response.headers['X-Profile-Id'] = profile_id
+        return response
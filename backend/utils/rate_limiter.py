@@ -1,45 +1,344 @@
 """
 Rate limiting and security utilities
 """
+import heapq
+import os
 import time
+import threading
+import logging
 from functools import wraps
 from flask import request, jsonify, g
-from collections import defaultdict, deque
 import hashlib
 import hmac
+from backend.utils.ip_blocklist import IPBlocklist
+
+logger = logging.getLogger(__name__)
+
+class _WindowState:
+    """Counters for one key: requests in the current and the previous fixed window"""
+    __slots__ = ('window', 'current', 'previous', 'expires')
+
+    def __init__(self, window):
+        self.window = window
+        self.current = 0
+        self.previous = 0
+        self.expires = 0.0
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window-counter rate limiter.
+
+    Each key keeps two integer counters instead of one timestamp per request; the
+    request count over the trailing window is estimated by weighting the previous
+    window's count by how much of it still overlaps. Keys are filed under the time
+    their counters both age out (few distinct values, kept in a heap), and each
+    call evicts at most max_evictions of the expired ones, so memory is bounded by
+    active keys without ever scanning them all under the lock.
+    """
+
+    def __init__(self, max_evictions=16):
+        self.states = {}
+        self.max_evictions = max_evictions
+        # expires -> keys filed under it; a key is stale there once it moved to a later window
+        self._expiring = {}
+        self._expiry_heap = []
+        self._lock = threading.Lock()
+
+    def hit(self, key, max_requests, window_seconds, now=None):
+        """Record one request for key; returns True if it must be rejected"""
+        if now is None:
+            now = time.time()
+        window = int(now // window_seconds)
+
+        with self._lock:
+            self._evict(now)
+
+            state = self.states.get(key)
+            if state is None:
+                state = self.states[key] = _WindowState(window)
+            elif state.window != window:
+                # Roll forward; anything older than the previous window no longer counts
+                state.previous = state.current if state.window == window - 1 else 0
+                state.current = 0
+                state.window = window
+
+            estimated = state.current
+            if state.previous:
+                overlap = 1 - (now - window * window_seconds) / window_seconds
+                estimated += state.previous * overlap
+            if estimated >= max_requests:
+                return True
+
+            state.current += 1
+            # Once two full windows pass without traffic both counters are zero
+            expires = (window + 2) * window_seconds
+            if expires != state.expires:
+                state.expires = expires
+                keys = self._expiring.get(expires)
+                if keys is None:
+                    keys = self._expiring[expires] = []
+                    heapq.heappush(self._expiry_heap, expires)
+                keys.append(key)
+            return False
+
+    def _evict(self, now):
+        budget = self.max_evictions
+        heap = self._expiry_heap
+        while budget and heap and heap[0] <= now:
+            expires = heap[0]
+            keys = self._expiring[expires]
+            while budget and keys:
+                key = keys.pop()
+                budget -= 1
+                state = self.states.get(key)
+                if state is not None and state.expires == expires:
+                    del self.states[key]
+            if not keys:
+                heapq.heappop(heap)
+                del self._expiring[expires]
+
+    def __len__(self):
+        return len(self.states)
+
+class RedisSlidingWindowLimiter:
+    """
+    Sliding-window-counter limiter shared by every worker through Redis.
+
+    The read-estimate-increment sequence runs as one Lua script, so the check
+    is atomic and costs a single round trip.
+    """
+
+    SCRIPT = """
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+    local estimated = current + previous * tonumber(ARGV[3])
+    if estimated >= tonumber(ARGV[1]) then
+        return 1
+    end
+    redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]) * 2)
+    return 0
+    """
+
+    def __init__(self, redis_client, prefix='ratelimit'):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self._script = redis_client.register_script(self.SCRIPT)
+
+    def hit(self, key, max_requests, window_seconds, now=None):
+        """Record one request for key; returns True if it must be rejected"""
+        if now is None:
+            now = time.time()
+        window = int(now // window_seconds)
+        overlap = 1 - (now - window * window_seconds) / window_seconds
+        # Braces keep both windows of a key in the same Redis Cluster slot
+        keys = [f"{self.prefix}:{{{key}}}:{window}", f"{self.prefix}:{{{key}}}:{window - 1}"]
+        return bool(self._script(keys=keys, args=[max_requests, window_seconds, overlap]))
+
+class _BucketState:
+    """Token balance of one key, when it was last refilled, and the limits it refills under"""
+    __slots__ = ('tokens', 'updated', 'capacity', 'refill_per_second')
+
+    def __init__(self, tokens, updated, capacity, refill_per_second):
+        self.tokens = tokens
+        self.updated = updated
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+class TokenBucketLimiter:
+    """
+    Token bucket for cost-weighted limits.
+
+    A request debits its estimated cost up front and is later reconciled with
+    its real cost through adjust(). The balance may go negative, so a request
+    that turned out expensive delays the next ones instead of being free.
+    """
+
+    def __init__(self, eviction_interval=60):
+        self.states = {}
+        self.eviction_interval = eviction_interval
+        self._next_eviction = None
+        self._lock = threading.Lock()
+
+    def debit(self, key, cost, capacity, refill_per_second, now=None):
+        """Take cost from the bucket; returns True if the request must be rejected.
+
+        Only min(cost, capacity) has to be available, so a single request larger
+        than the whole budget can still run once the bucket is full.
+        """
+        with self._lock:
+            state = self._refill(key, capacity, refill_per_second, now)
+            if state.tokens < min(cost, capacity):
+                return True
+            state.tokens -= cost
+            return False
+
+    def adjust(self, key, delta, capacity, refill_per_second, now=None):
+        """Charge (positive delta) or refund (negative delta) after the fact"""
+        with self._lock:
+            state = self._refill(key, capacity, refill_per_second, now)
+            state.tokens = min(capacity, state.tokens - delta)
+
+    def _refill(self, key, capacity, refill_per_second, now):
+        if now is None:
+            now = time.time()
+        if self._next_eviction is None:
+            self._next_eviction = now + self.eviction_interval
+        elif now >= self._next_eviction:
+            self._evict(now)
+
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = _BucketState(capacity, now, capacity, refill_per_second)
+        else:
+            if now > state.updated:
+                state.tokens = min(capacity, state.tokens + (now - state.updated) * refill_per_second)
+                state.updated = now
+            state.capacity = capacity
+            state.refill_per_second = refill_per_second
+        return state
+
+    def _evict(self, now):
+        # A bucket that has refilled completely is indistinguishable from a new one.
+        # Keys share the limiter across endpoints and tiers, so each bucket is
+        # judged by the limits it was last charged under.
+        full = [key for key, state in self.states.items()
+                if state.tokens + (now - state.updated) * state.refill_per_second >= state.capacity]
+        for key in full:
+            del self.states[key]
+        self._next_eviction = now + self.eviction_interval
+
+    def __len__(self):
+        return len(self.states)
+
+class RedisTokenBucketLimiter:
+    """Token bucket shared through Redis; debit and adjust are single Lua calls"""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    if now > updated then
+        tokens = math.min(capacity, tokens + (now - updated) * rate)
+        updated = now
+    end
+    local rejected = 0
+    if ARGV[5] == 'debit' then
+        if tokens < math.min(cost, capacity) then
+            rejected = 1
+        else
+            tokens = tokens - cost
+        end
+    else
+        tokens = math.min(capacity, tokens - cost)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(updated))
+    redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+    return rejected
+    """
+
+    def __init__(self, redis_client, prefix='tokenbucket'):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self._script = redis_client.register_script(self.SCRIPT)
+
+    def debit(self, key, cost, capacity, refill_per_second, now=None):
+        return self._run(key, cost, capacity, refill_per_second, now, 'debit')
+
+    def adjust(self, key, delta, capacity, refill_per_second, now=None):
+        self._run(key, delta, capacity, refill_per_second, now, 'adjust')
+
+    def _run(self, key, cost, capacity, refill_per_second, now, mode):
+        if now is None:
+            now = time.time()
+        return bool(self._script(
+            keys=[f"{self.prefix}:{key}"],
+            args=[capacity, refill_per_second, now, cost, mode]
+        ))
+
+class FailoverLimiter:
+    """Use the primary engine, dropping to the fallback while the primary is erroring"""
+
+    def __init__(self, primary, fallback, retry_after=30):
+        self.primary = primary
+        self.fallback = fallback
+        self.retry_after = retry_after
+        self._primary_down_until = 0.0
+
+    def hit(self, *args, **kwargs):
+        return self._dispatch('hit', *args, **kwargs)
+
+    def debit(self, *args, **kwargs):
+        return self._dispatch('debit', *args, **kwargs)
+
+    def adjust(self, *args, **kwargs):
+        return self._dispatch('adjust', *args, **kwargs)
+
+    def _dispatch(self, method, *args, **kwargs):
+        if time.time() >= self._primary_down_until:
+            try:
+                return getattr(self.primary, method)(*args, **kwargs)
+            except Exception as e:
+                logger.warning("Rate limit backend unavailable, using local limits for %ss: %s", self.retry_after, e)
+                self._primary_down_until = time.time() + self.retry_after
+        return getattr(self.fallback, method)(*args, **kwargs)
+
+def _create_redis_client():
+    """Redis client for shared limits when REDIS_HOST is configured"""
+    if not os.getenv('REDIS_HOST'):
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.warning("REDIS_HOST set but redis package missing; using local rate limits")
+        return None
+    logger.info("Using Redis for rate limiting")
+    return redis.Redis(
+        host=os.getenv('REDIS_HOST'),
+        port=int(os.getenv('REDIS_PORT', 6379)),
+        db=int(os.getenv('RATE_LIMIT_REDIS_DB', 0)),
+        # A slow Redis must not stall every request
+        socket_connect_timeout=0.25,
+        socket_timeout=0.25
+    )
 
 class RateLimiter:
-    def __init__(self):
-        self.requests = defaultdict(deque)
-        self.blocked_ips = set()
+    def __init__(self, engine=None, buckets=None):
+        client = None if engine and buckets else _create_redis_client()
+        if engine is None:
+            engine = SlidingWindowLimiter()
+            if client is not None:
+                engine = FailoverLimiter(RedisSlidingWindowLimiter(client), engine)
+        if buckets is None:
+            buckets = TokenBucketLimiter()
+            if client is not None:
+                buckets = FailoverLimiter(RedisTokenBucketLimiter(client), buckets)
+        self.engine = engine
+        self.buckets = buckets
+        self.blocklist = IPBlocklist()
+        blocklist_file = os.getenv('IP_BLOCKLIST_FILE')
+        if blocklist_file:
+            try:
+                self.blocklist.load_file(blocklist_file)
+            except OSError as e:
+                logger.error("Could not load IP blocklist %s: %s", blocklist_file, e)
     
     def is_rate_limited(self, identifier, max_requests=100, window_seconds=3600):
         """Check if identifier is rate limited"""
-        now = time.time()
-        window_start = now - window_seconds
-        
-        # Clean old requests
-        while self.requests[identifier] and self.requests[identifier][0] < window_start:
-            self.requests[identifier].popleft()
-        
-        # Check if limit exceeded
-        if len(self.requests[identifier]) >= max_requests:
-            return True
-        
-        # Add current request
-        self.requests[identifier].append(now)
-        return False
+        # Limits with different windows must not share counters
+        return self.engine.hit(f"{identifier}|{window_seconds}", max_requests, window_seconds)
     
     def block_ip(self, ip, duration=3600):
-        """Block IP for specified duration"""
-        self.blocked_ips.add((ip, time.time() + duration))
+        """Block an IP or CIDR range for specified duration"""
+        self.blocklist.block(ip, duration)
     
     def is_blocked(self, ip):
         """Check if IP is blocked"""
-        now = time.time()
-        # Remove expired blocks
-        self.blocked_ips = {(blocked_ip, expiry) for blocked_ip, expiry in self.blocked_ips if expiry > now}
-        return any(blocked_ip == ip for blocked_ip, _ in self.blocked_ips)
+        return self.blocklist.is_blocked(ip)
 
 rate_limiter = RateLimiter()
 
@@ -0,0 +1,109 @@
+"""
+Fast read-only serialization: column-tuple row encoders and an orjson JSON provider
+"""
+import logging
+from functools import lru_cache
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _encode_datetime(value):
+    return value.isoformat() + 'Z' if value is not None else None
+
+def _encode_date(value):
+    return value.isoformat() if value is not None else None
+
+def _json_default(empty):
+    def default(value):
+        return value if value is not None else empty()
+    return default
+
+class RowEncoder:
+    """
+    Turns column tuples into the dicts the models' to_dict() produce.
+
+    The per-column conversions are worked out once from the column types
+    (DateTime -> ISO + 'Z', Date -> ISO, empty model.JSON_FIELDS -> {} / []), so
+    encoding a row is a zip plus a handful of calls, with no ORM instance
+    or identity-map bookkeeping involved.
+    """
+
+    def __init__(self, model, fields):
+        self.names = tuple(fields)
+        self.columns = tuple(getattr(model, name) for name in self.names)
+        json_fields = getattr(model, 'JSON_FIELDS', {})
+        converters = []
+        for i, name in enumerate(self.names):
+            column_type = model.__table__.columns[name].type
+            if name in json_fields:
+                converters.append((i, _json_default(json_fields[name])))
+            elif isinstance(column_type, DateTime):
+                converters.append((i, _encode_datetime))
+            elif isinstance(column_type, Date):
+                converters.append((i, _encode_date))
+        self._converters = tuple(converters)
+
+    def encode(self, row) -> dict:
+        if not self._converters:
+            return dict(zip(self.names, row))
+        values = list(row[:len(self.names)])
+        for i, convert in self._converters:
+            values[i] = convert(values[i])
+        return dict(zip(self.names, values))
+
+    def encode_all(self, rows) -> list:
+        return [self.encode(row) for row in rows]
+
+@lru_cache(maxsize=None)
+def encoder_for(model, fields=None) -> RowEncoder:
+    """Cached encoder for `fields` (a tuple), or the model's SERIALIZED_FIELDS"""
+    return RowEncoder(model, fields or model.SERIALIZED_FIELDS)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Output matches the default provider (keys sorted, compact unless debug,
+    datetimes handed back to Flask's HTTP-date encoding) except that
+    non-ASCII text is written as UTF-8 rather than \\u escapes.
+    Responses are built from orjson's bytes directly, skipping the str round
+    trip.
+    """
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj, indent=False) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs.keys() - {'indent', 'separators'}:
+            # Options orjson has no equivalent for (cls, ensure_ascii=False, ...)
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if not kwargs else super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
+
+def init_json_provider(app):
+    """Use orjson for jsonify and request.get_json when it is installed"""
+    if orjson is None:
+        logger.info("orjson not installed; using the standard JSON provider")
+        return
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,310 @@
+"""
+Lightweight in-process request tracing with head and tail sampling
+"""
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'roamiq-backend'
+MAX_SPANS_PER_TRACE = 1000
+
+class _Trace:
+    """Spans finished so far in one trace; exported together when the root ends"""
+    __slots__ = ('trace_id', 'sampled', 'spans', 'has_error', 'root')
+
+    def __init__(self, trace_id, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+        self.has_error = False
+        self.root = None
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, trace, name, parent_id=None, kind='internal', attributes=None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes or {}
+        self.error = None
+
+    @property
+    def trace_id(self):
+        return self.trace.trace_id
+
+    @property
+    def duration(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.error = f"{type(error).__name__}: {error}"
+        self.trace.has_error = True
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+class _NoopSpan:
+    """Stands in for a span when tracing is disabled"""
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_error(self, error):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+def current_span():
+    return _current_span.get() or _NOOP_SPAN
+
+class JsonlSpanExporter:
+    """Appends one JSON object per span to a local file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + '\n')
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+class OtlpHttpSpanExporter:
+    """Posts spans as OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+    def __init__(self, endpoint, timeout=2.0):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.timeout = timeout
+
+    def export(self, spans):
+        import requests
+
+        payload = {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{
+                'scope': {'name': 'backend.utils.tracing'},
+                'spans': [self._encode(span) for span in spans],
+            }],
+        }]}
+        requests.post(self.url, json=payload, timeout=self.timeout).raise_for_status()
+
+    def _encode(self, span):
+        encoded = {
+            'traceId': span.trace.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': self.KINDS.get(span.kind, 1),
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()],
+            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+        }
+        if span.parent_id:
+            encoded['parentSpanId'] = span.parent_id
+        return encoded
+
+class BackgroundExporter:
+    """Hands finished traces to an exporter on a worker thread so requests never wait on I/O"""
+
+    def __init__(self, exporter, max_queue=1000, batch_size=50):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+
+    def submit(self, spans):
+        if self._pid != os.getpid():
+            # Started lazily so each forked worker gets its own thread
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = list(self._queue.get())
+            while len(batch) < self.batch_size:
+                try:
+                    batch.extend(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                logger.warning("Trace export failed (%d spans): %s", len(batch), e)
+
+class Tracer:
+    """
+    Creates spans and decides which traces to keep.
+
+    Head sampling keeps `sample_rate` of traces up front. Every trace is still
+    recorded in memory, so traces that turn out slow (root longer than
+    `slow_threshold` seconds) or contain an error are kept too (tail sampling).
+    Traces are exported when their root span ends.
+    """
+
+    def __init__(self, exporter=None, sample_rate=0.1, slow_threshold=1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name, kind='internal', traceparent=None, **attributes):
+        """Start a span under the current one (or a new trace) and make it current.
+
+        Returns (span, token); pass both to end_span.
+        """
+        if not self.enabled:
+            return _NOOP_SPAN, None
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(parent.trace, name, parent.span_id, kind, attributes)
+        else:
+            trace_id, parent_id, sampled = _parse_traceparent(traceparent)
+            if sampled is None:
+                sampled = random.random() < self.sample_rate
+            span = Span(_Trace(trace_id or os.urandom(16).hex(), sampled), name, parent_id, kind, attributes)
+            span.trace.root = span
+        return span, _current_span.set(span)
+
+    def end_span(self, span, token, error=None):
+        if token is None:
+            return
+        _current_span.reset(token)
+        if error is not None:
+            span.record_error(error)
+        span.end_ns = time.time_ns()
+        trace = span.trace
+        if len(trace.spans) < MAX_SPANS_PER_TRACE:
+            trace.spans.append(span)
+
+        if span is trace.root and (trace.sampled or trace.has_error or span.duration >= self.slow_threshold):
+            self.exporter.submit(trace.spans)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Trace a block; exceptions are recorded on the span and re-raised"""
+        span, token = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, token, error=e)
+            raise
+        else:
+            self.end_span(span, token)
+
+def _parse_traceparent(header):
+    """W3C traceparent -> (trace_id, parent_span_id, sampled); Nones if absent or invalid"""
+    if not header:
+        return None, None, None
+    parts = header.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None, None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None, None, None
+    return parts[1], parts[2], sampled
+
+def _build_tracer():
+    exporter_name = os.getenv('TRACE_EXPORTER', 'none').lower()
+    exporter = None
+    if exporter_name == 'jsonl':
+        exporter = BackgroundExporter(JsonlSpanExporter(os.getenv('TRACE_FILE', 'traces.jsonl')))
+    elif exporter_name == 'otlp':
+        exporter = BackgroundExporter(OtlpHttpSpanExporter(os.getenv('OTLP_ENDPOINT', 'http://localhost:4318')))
+    return Tracer(
+        exporter,
+        sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', 0.1)),
+        slow_threshold=float(os.getenv('TRACE_SLOW_MS', 1000)) / 1000
+    )
+
+tracer = _build_tracer()
+
+def init_tracing(app):
+    """Open a server span per request and return its trace id in X-Trace-Id.
+
+    Enabled with TRACE_EXPORTER=jsonl (TRACE_FILE) or TRACE_EXPORTER=otlp
+    (OTLP_ENDPOINT). Incoming W3C traceparent headers are continued.
+    """
+    if not tracer.enabled:
+        return
+
+    @app.before_request
+    def start_request_span():
+        span, token = tracer.start_span(
+            f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+            kind='server',
+            traceparent=request.headers.get('traceparent'),
+            **{'http.method': request.method, 'http.route': request.endpoint or 'unknown'}
+        )
+        g.trace_span = (span, token)
+
+    @app.after_request
+    def tag_response(response):
+        if 'trace_span' in g:
+            span = g.trace_span[0]
+            span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.trace.has_error = True
+            response.headers['X-Trace-Id'] = span.trace_id
+        return response
+
+    @app.teardown_request
+    def end_request_span(error=None):
+        span_token = g.pop('trace_span', None)
+        if span_token is not None:
+            tracer.end_span(*span_token, error=error)
+
+    logger.info("Request tracing initialized")
@@ -56,7 +56,7 @@ const GenAIHub = () => {
 
     const fetchUpcomingTrip = React.useCallback(async () => {
         try {
-            const res = await axios.get('/api/travel/trips');
+            const res = await axios.get('/api/travel/trips', { params: { view: 'summary' } });
             const trips = res.data.trips || [];
             if (trips.length > 0) {
                 const now = new Date();
@@ -34,7 +34,7 @@ const Dashboard = () => {
 
   const fetchTrips = React.useCallback(async () => {
     try {
-      const response = await axios.get('/api/travel/trips');
+      const response = await axios.get('/api/travel/trips', { params: { view: 'summary' } });
       const tripsData = response.data.trips;
       setTrips(tripsData);
 
@@ -8,9 +8,22 @@ import { useCurrency } from '../../contexts/CurrencyContext';
 const ExpenseTracker = ({ tripId }) => {
     const { formatCurrency, currentCurrency } = useCurrency();
     const [expenses, setExpenses] = useState([]);
+    const [total, setTotal] = useState(0);
     const [showAddModal, setShowAddModal] = useState(false);
     const [isLoading, setIsLoading] = useState(false);
 
+    // Totals come from the server so they cover every page of expenses.
+    // Converted to USD, the base formatCurrency converts from.
+    const fetchTotal = React.useCallback(async () => {
+        try {
+            const params = { group_by: 'currency', currency: 'USD', ...(tripId ? { trip_id: tripId } : {}) };
+            const response = await axios.get('/api/travel/expenses/summary', { params });
+            setTotal(response.data.totals.reduce((sum, t) => sum + t.total, 0));
+        } catch (error) {
+            console.error('Failed to fetch expense total', error);
+        }
+    }, [tripId]);
+
     // Fetch expenses on load or currency change
     React.useEffect(() => {
         const fetchExpenses = async () => {
@@ -24,7 +37,8 @@ const ExpenseTracker = ({ tripId }) => {
             }
         };
         fetchExpenses();
-    }, [tripId]);
+        fetchTotal();
+    }, [tripId, fetchTotal]);
     const [newExpense, setNewExpense] = useState({
         category: 'Other',
         amount: '',
@@ -46,6 +60,7 @@ const ExpenseTracker = ({ tripId }) => {
 
             const response = await axios.post('/api/travel/expenses', expenseData);
             setExpenses([response.data, ...expenses]);
+            fetchTotal();
             toast.success('Expense added!');
             setShowAddModal(false);
             setNewExpense({
@@ -66,13 +81,13 @@ const ExpenseTracker = ({ tripId }) => {
         try {
             await axios.delete(`/api/travel/expenses/${id}`);
             setExpenses(expenses.filter(e => e.id !== id));
+            fetchTotal();
             toast.info('Expense deleted');
         } catch (error) {
             toast.error('Failed to delete expense');
         }
     };
 
-    const total = expenses.reduce((sum, e) => sum + e.amount, 0);
 
     return (
         <div className="expense-tracker mt-4">
@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration, loaded automatically by `gunicorn backend.app:app`
+
+Puts prometheus_client in multiprocess mode so /metrics reports the sum of
+all workers instead of whichever worker happened to serve the scrape.
+"""
+import glob
+import os
+import tempfile
+
+# Must be in the environment before workers import prometheus_client
+multiproc_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'roamiq_prometheus')
+)
+os.makedirs(multiproc_dir, exist_ok=True)
+
+def on_starting(server):
+    """Drop metric files left by a previous master; they would be aggregated as live data"""
+    for path in glob.glob(os.path.join(multiproc_dir, '*.db')):
+        os.remove(path)
+
+def child_exit(server, worker):
+    """Remove the exited worker's live gauges; its counters and histograms are kept"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)